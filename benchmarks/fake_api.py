@@ -0,0 +1,284 @@
+"""Local stand-in for the Telegram Bot API
+
+    python benchmarks/fake_api.py --port 8081
+    TELEGRAM_BASE_URL=http://127.0.0.1:8081 python main.py
+
+Implements the methods the bot uses (getMe, getUpdates, setWebhook,
+deleteWebhook, sendMessage, sendDocument, editMessageText,
+editMessageReplyMarkup, answerCallbackQuery); anything else answers
+``true``. Updates are fed in with FakeBotAPI.inject(), or POST /inject with
+the update as JSON, and delivered through getUpdates long polling or
+POSTed to the webhook once one is set. Every bot request is recorded per
+chat so a driver can wait for replies and click the inline buttons the
+bot sent.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Sunday League', 'username': 'sunday_league_bot'}
+
+
+def parse_params(content_type: str, body: bytes) -> Dict[str, Any]:
+    """Bot API parameters from a JSON, url-encoded or multipart request body"""
+    if not body:
+        return {}
+    if content_type.startswith("application/json"):
+        return json.loads(body)
+    if content_type.startswith("multipart/form-data"):
+        message = BytesParser(policy=HTTP).parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+        raw = {
+            part.get_param('name', header='content-disposition'): part.get_content()
+            for part in message.iter_parts() if part.get_filename() is None
+        }
+    else:
+        raw = dict(parse_qsl(body.decode("utf-8"), keep_blank_values=True))
+
+    params = {}
+    for key, value in raw.items():
+        if isinstance(value, str) and value[:1] in "{[":
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        params[key] = value
+    return params
+
+
+class ChatLog:
+    """Messages the bot keeps in one chat and when it last answered there"""
+
+    def __init__(self):
+        self.messages: Dict[int, Dict] = {}
+        self.responses = 0
+        self.last_response = 0.0
+        self.activity = asyncio.Event()
+
+    def record(self) -> None:
+        self.responses += 1
+        self.last_response = time.perf_counter()
+        self.activity.set()
+
+    def find_button(self, match: Callable[[str], bool]) -> Optional[Tuple[int, str]]:
+        """(message id, callback data) of the newest inline button whose text matches"""
+        for message_id in sorted(self.messages, reverse=True):
+            markup = self.messages[message_id].get('reply_markup') or {}
+            for row in markup.get('inline_keyboard', []):
+                for button in row:
+                    if 'callback_data' in button and match(button['text']):
+                        return message_id, button['callback_data']
+        return None
+
+
+class FakeBotAPI:
+    """Minimal HTTP/1.1 Bot API server on asyncio streams"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.chats: Dict[int, ChatLog] = {}
+        self.calls: Dict[str, int] = {}
+        self.ready = asyncio.Event()
+        self.webhook: Optional[Dict[str, Any]] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._updates: List[Dict] = []
+        self._new_updates = asyncio.Condition()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1000)
+        self._callback_chats: Dict[str, int] = {}
+        self._deliveries: set = set()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in list(self._deliveries):
+            task.cancel()
+
+    def chat(self, chat_id: int) -> ChatLog:
+        log = self.chats.get(chat_id)
+        if log is None:
+            log = self.chats[chat_id] = ChatLog()
+        return log
+
+    # Updates
+
+    async def inject(self, update: Dict) -> int:
+        """Queue an update for the bot and return its update_id"""
+        update = {'update_id': next(self._update_ids), **update}
+        query = update.get('callback_query')
+        if query is not None:
+            self._callback_chats[query['id']] = query['message']['chat']['id']
+        if self.webhook is not None:
+            task = asyncio.create_task(self._deliver(update))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+        else:
+            async with self._new_updates:
+                self._updates.append(update)
+                self._new_updates.notify_all()
+        return update['update_id']
+
+    async def _deliver(self, update: Dict) -> None:
+        """POST one update to the webhook"""
+        target = urlsplit(self.webhook['url'])
+        body = json.dumps(update).encode()
+        headers = [
+            f"POST {target.path or '/'} HTTP/1.1",
+            f"Host: {target.netloc}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        if self.webhook.get('secret_token'):
+            headers.append(f"X-Telegram-Bot-Api-Secret-Token: {self.webhook['secret_token']}")
+        reader, writer = await asyncio.open_connection(target.hostname, target.port or 80)
+        try:
+            writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+            await writer.drain()
+            await reader.read()
+        finally:
+            writer.close()
+
+    async def _get_updates(self, params: Dict) -> List[Dict]:
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        self.ready.set()
+        async with self._new_updates:
+            # Updates below the offset have been confirmed by the bot
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+            if not self._updates and timeout:
+                try:
+                    await asyncio.wait_for(self._new_updates.wait_for(lambda: self._updates), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return self._updates[:limit]
+
+    # Bot API methods
+
+    def _message(self, chat_id: int, params: Dict, message_id: Optional[int] = None) -> Dict:
+        message = {
+            'message_id': message_id or next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group', 'title': f"chat {chat_id}"},
+            'from': BOT_USER,
+            'text': params.get('text') or params.get('caption') or "",
+        }
+        markup = params.get('reply_markup')
+        # Reply keyboards are not part of the returned message, inline keyboards are
+        if isinstance(markup, dict) and 'inline_keyboard' in markup:
+            message['reply_markup'] = markup
+        return message
+
+    async def _call(self, method: str, params: Dict) -> Any:
+        if method == 'getUpdates':
+            return await self._get_updates(params)
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'setWebhook':
+            self.webhook = {'url': params['url'], 'secret_token': params.get('secret_token')}
+            self.ready.set()
+            return True
+        if method == 'deleteWebhook':
+            self.webhook = None
+            return True
+        if method == 'getWebhookInfo':
+            return {'url': (self.webhook or {}).get('url', ""), 'has_custom_certificate': False, 'pending_update_count': 0}
+        if method == 'answerCallbackQuery':
+            # Sent before the handler runs, so it does not count as the bot's reply
+            self._callback_chats.pop(params.get('callback_query_id'), None)
+            return True
+
+        if 'chat_id' not in params:
+            return True
+        chat_id = int(params['chat_id'])
+        log = self.chat(chat_id)
+        if method in ('editMessageText', 'editMessageReplyMarkup', 'editMessageCaption'):
+            message_id = int(params['message_id'])
+            stored = log.messages.get(message_id, {})
+            text = stored.get('text', "") if method == 'editMessageReplyMarkup' else params.get('text', "")
+            message = self._message(chat_id, {**params, 'text': text}, message_id)
+            # An edit without reply_markup removes the inline keyboard, as on Telegram
+            log.messages[message_id] = {'text': message['text'], 'reply_markup': message.get('reply_markup')}
+        else:
+            message = self._message(chat_id, params)
+            if method == 'sendDocument':
+                message['document'] = {'file_id': f"doc{message['message_id']}", 'file_unique_id': f"u{message['message_id']}"}
+            log.messages[message['message_id']] = {'text': message['text'], 'reply_markup': message.get('reply_markup')}
+        log.record()
+        return message
+
+    # HTTP
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+
+                method = path.split("?")[0].rsplit("/", 1)[-1]
+                self.calls[method] = self.calls.get(method, 0) + 1
+                try:
+                    if path == "/inject":
+                        result = await self.inject(json.loads(body))
+                    else:
+                        result = await self._call(method, parse_params(headers.get('content-type', ""), body))
+                    status, payload = 200, {'ok': True, 'result': result}
+                except Exception as e:
+                    status, payload = 400, {'ok': False, 'error_code': 400, 'description': f"Bad Request: {e}"}
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Bad Request'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Pending long polls when the server shuts down
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str, port: int) -> None:
+    api = FakeBotAPI(host, port)
+    await api.start()
+    print(f"Fake Bot API on {api.url} (set TELEGRAM_BASE_URL={api.url})")
+    await asyncio.Event().wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
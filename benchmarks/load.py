@@ -0,0 +1,353 @@
+"""End-to-end load test of the whole bot against the fake Bot API
+
+    python benchmarks/load.py                              # 20 chats, polling
+    python benchmarks/load.py --chats 100 --spectators 3
+    python benchmarks/load.py --run-mode webhook
+    python benchmarks/load.py --workers 4                  # supervisor.py, 4 sharded workers
+    python benchmarks/load.py --attach --port 8081         # bot started separately
+
+Starts benchmarks/fake_api.py in this process and main.py as a subprocess
+pointed at it with TELEGRAM_BASE_URL (unless --attach; supervisor.py
+with --workers). Every chat then
+replays one organizer session (add teams, start, enter results round by
+round, finish) interleaved with spectators viewing the table, stats, info
+and the current round. All chats run concurrently, steps within a chat run
+one after another.
+
+A step's latency runs from injecting its update to the bot's last reply in
+that chat, where the bot counts as done once it has been quiet for
+--settle seconds (answerCallbackQuery is not a reply). A click waits until
+its button has been sent, so a reply arriving after the settle time delays
+the next click rather than breaking the session. Reports updates/sec and
+p50/p95/p99 latency overall and per action.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_api import FakeBotAPI  # noqa: E402
+
+TOKEN = "123456:load-test"
+SPECTATOR_ACTIONS = ("📊 View Table", "📈 Detailed Stats", "ℹ️ Tournament Info", "📅 View Round")
+
+# A step is (user role, kind, value, action): kind "text" sends value, "click"
+# presses the newest inline button whose text contains value ("⏳" picks a
+# pending match); latencies are reported per action
+Step = Tuple[str, str, str, str]
+
+
+def organizer_steps(teams: int, rounds: int, results: int, rng: random.Random) -> List[Step]:
+    def step(kind: str, value: str, action: str = None) -> Step:
+        return 'organizer', kind, value, action or value
+
+    steps = [step('text', "/start"), step('text', "⚽ Setup Tournament")]
+    for number in range(1, teams + 1):
+        steps += [step('click', "➕ Add Team"), step('text', f"Team {number}", "team name")]
+    steps += [step('click', "🎯 Start Tournament"), step('click', f"{rounds} Round", "rounds")]
+    for round_num in range(1, rounds + 1):
+        steps.append(step('text', "🏆 Enter Results"))
+        for _ in range(results):
+            steps += [step('click', "⏳", "pick match"), step('text', f"{rng.randint(0, 4)}-{rng.randint(0, 4)}", "score")]
+        if round_num < rounds:
+            steps.append(step('text', "🔄 Next Round"))
+    steps += [step('text', "🏁 Finish Tournament"), step('click', "Yes, Finish Now", "confirm finish")]
+    return steps
+
+
+def chat_script(args, rng: random.Random) -> List[Step]:
+    """The organizer session with spectator steps inserted at random points"""
+    steps = organizer_steps(args.teams, args.rounds, args.results, rng)
+    for spectator in range(args.spectators):
+        for _ in range(args.spectator_steps):
+            position = rng.randint(2, len(steps))
+            action = rng.choice(SPECTATOR_ACTIONS)
+            steps.insert(position, (f"spectator{spectator}", 'text', action, action))
+    return steps
+
+
+def user(chat_id: int, role: str) -> Dict:
+    user_id = abs(chat_id) * 10 + (0 if role == 'organizer' else int(role[len('spectator'):]) + 1)
+    return {'id': user_id, 'is_bot': False, 'first_name': role}
+
+
+def text_update(chat_id: int, role: str, text: str) -> Dict:
+    message = {
+        'message_id': 1,
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'group', 'title': f"chat {chat_id}"},
+        'from': user(chat_id, role),
+        'text': text,
+    }
+    if text.startswith("/"):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return {'message': message}
+
+
+def click_update(api: FakeBotAPI, chat_id: int, role: str, label: str, query_id: int) -> Optional[Dict]:
+    button = api.chat(chat_id).find_button(lambda text: label in text)
+    if button is None:
+        return None
+    message_id, data = button
+    return {'callback_query': {
+        'id': str(query_id),
+        'from': user(chat_id, role),
+        'chat_instance': str(chat_id),
+        'data': data,
+        'message': {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'group', 'title': f"chat {chat_id}"},
+            'from': {'id': 1, 'is_bot': True, 'first_name': 'Sunday League'},
+            'text': api.chat(chat_id).messages[message_id]['text'],
+        },
+    }}
+
+
+async def perform(api: FakeBotAPI, chat_id: int, update: Dict, settle: float, timeout: float) -> Optional[float]:
+    """Inject an update and return the time until the bot's last reply, None on timeout"""
+    log = api.chat(chat_id)
+    before = log.responses
+    started = time.perf_counter()
+    await api.inject(update)
+
+    deadline = started + timeout
+    while log.responses == before:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return None
+        log.activity.clear()
+        try:
+            await asyncio.wait_for(log.activity.wait(), remaining)
+        except asyncio.TimeoutError:
+            return None
+    while True:
+        log.activity.clear()
+        try:
+            await asyncio.wait_for(log.activity.wait(), settle)
+        except asyncio.TimeoutError:
+            break
+    return log.last_response - started
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.timeouts = 0
+        self.missing_buttons = 0
+
+    def add(self, action: str, latency: Optional[float]) -> None:
+        if latency is None:
+            self.timeouts += 1
+        else:
+            self.latencies.setdefault(action, []).append(latency)
+
+    def all(self) -> List[float]:
+        return [latency for values in self.latencies.values() for latency in values]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+
+def summary(values: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(values),
+        'p50_ms': percentile(values, 0.50) * 1000,
+        'p95_ms': percentile(values, 0.95) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+        'max_ms': max(values, default=0.0) * 1000,
+    }
+
+
+async def wait_for_click(api: FakeBotAPI, chat_id: int, role: str, label: str, query_id: int, timeout: float) -> Optional[Dict]:
+    """Click update for a button, waiting for the bot to send it if a reply is still on its way"""
+    log = api.chat(chat_id)
+    deadline = time.perf_counter() + timeout
+    while True:
+        update = click_update(api, chat_id, role, label, query_id)
+        remaining = deadline - time.perf_counter()
+        if update is not None or remaining <= 0:
+            return update
+        log.activity.clear()
+        try:
+            await asyncio.wait_for(log.activity.wait(), remaining)
+        except asyncio.TimeoutError:
+            return None
+
+
+async def run_chat(api: FakeBotAPI, chat_id: int, steps: List[Step], args, results: Results, query_ids) -> None:
+    for role, kind, value, action in steps:
+        if kind == 'text':
+            update = text_update(chat_id, role, value)
+        else:
+            update = await wait_for_click(api, chat_id, role, value, next(query_ids), args.timeout)
+            if update is None:
+                results.missing_buttons += 1
+                continue
+        latency = await perform(api, chat_id, update, args.settle, args.timeout)
+        results.add(action, latency)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_port(port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def start_bot(api: FakeBotAPI, args) -> asyncio.subprocess.Process:
+    """Run main.py (supervisor.py with --workers) against the fake API with a throwaway data directory"""
+    data_dir = tempfile.mkdtemp(prefix="sunday-league-load-")
+    env = {
+        **os.environ,
+        'BOT_TOKEN': TOKEN,
+        'TELEGRAM_BASE_URL': api.url,
+        'DATA_DIR': data_dir,
+        'LOG_DIR': data_dir,
+        'LOG_LEVEL': args.log_level,
+        'RUN_MODE': args.run_mode,
+        'STORAGE_BACKEND': args.storage,
+        'SEND_RATE_LIMIT_ENABLED': "true" if args.flood_control else "false",
+    }
+    if args.run_mode == "webhook":
+        env.update(WEBHOOK_LISTEN="127.0.0.1", WEBHOOK_PORT=str(args.webhook_port), WEBHOOK_URL=f"http://127.0.0.1:{args.webhook_port}")
+    script = "main.py"
+    if args.workers:
+        script = "supervisor.py"
+        env.update(SHARD_WORKERS=str(args.workers), SHARD_BASE_PORT=str(args.shard_base_port))
+    return await asyncio.create_subprocess_exec(sys.executable, str(ROOT / script), cwd=str(ROOT), env=env)
+
+
+async def main(args, before_stop: Optional[Callable[[], Awaitable[None]]] = None) -> Dict:
+    """Run every chat script once; before_stop is awaited while the bot is still up"""
+    api = FakeBotAPI(port=args.port)
+    await api.start()
+    bot = None
+    if not args.attach:
+        bot = await start_bot(api, args)
+    print(f"Fake Bot API on {api.url}, waiting for the bot...", file=sys.stderr)
+    try:
+        await asyncio.wait_for(api.ready.wait(), args.startup_timeout)
+        if api.webhook is not None:
+            await wait_for_port(urlsplit(api.webhook['url']).port, args.startup_timeout)
+        for index in range(args.workers):
+            await wait_for_port(args.shard_base_port + index, args.startup_timeout)
+
+        rng = random.Random(args.seed)
+        scripts = {-(100000 + number): chat_script(args, rng) for number in range(args.chats)}
+        results = Results()
+        query_ids = iter(range(1, 1 << 62))
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            run_chat(api, chat_id, steps, args, results, query_ids) for chat_id, steps in scripts.items()
+        ))
+        elapsed = time.perf_counter() - started
+        if before_stop is not None:
+            await before_stop()
+    finally:
+        if bot is not None and bot.returncode is None:
+            bot.send_signal(signal.SIGINT)
+            await bot.wait()
+        await api.stop()
+
+    latencies = results.all()
+    return {
+        'chats': args.chats,
+        'run_mode': args.run_mode,
+        'workers': args.workers,
+        'updates': len(latencies) + results.timeouts,
+        'seconds': elapsed,
+        'updates_per_second': (len(latencies) + results.timeouts) / elapsed if elapsed else 0.0,
+        'timeouts': results.timeouts,
+        'missing_buttons': results.missing_buttons,
+        'latency': summary(latencies),
+        'actions': {action: summary(values) for action, values in sorted(results.latencies.items())},
+        'api_calls': dict(sorted(api.calls.items())),
+    }
+
+
+def report(result: Dict) -> None:
+    latency = result['latency']
+    mode = result['run_mode'] + (f", {result['workers']} workers" if result['workers'] else "")
+    print(
+        f"{result['updates']} updates from {result['chats']} chats in {result['seconds']:.2f}s "
+        f"({result['updates_per_second']:.1f} updates/s, {mode})"
+    )
+    print(
+        f"latency  p50 {latency['p50_ms']:.1f}ms  p95 {latency['p95_ms']:.1f}ms  "
+        f"p99 {latency['p99_ms']:.1f}ms  max {latency['max_ms']:.1f}ms"
+    )
+    if result['timeouts'] or result['missing_buttons']:
+        print(f"timeouts {result['timeouts']}, missing buttons {result['missing_buttons']}")
+    print()
+    print(f"{'action':<32} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for action, stats in sorted(result['actions'].items(), key=lambda item: -item[1]['p95_ms']):
+        print(f"{action[:32]:<32} {stats['count']:>6} {stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms")
+    print()
+    print("Bot API calls: " + ", ".join(f"{method} {count}" for method, count in result['api_calls'].items()))
+
+
+def parse_args(argv: Optional[List[str]] = None, description: str = __doc__) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=20, help="concurrent chats, one organizer each")
+    parser.add_argument("--spectators", type=int, default=2, help="spectators per chat")
+    parser.add_argument("--spectator-steps", type=int, default=5, help="views per spectator")
+    parser.add_argument("--teams", type=int, default=6)
+    parser.add_argument("--rounds", type=int, default=2, choices=range(1, 6))
+    parser.add_argument("--results", type=int, default=5, help="results entered one by one per round")
+    parser.add_argument("--settle", type=float, default=0.05, help="quiet seconds after which a step is done")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for a first reply")
+    parser.add_argument("--run-mode", choices=("polling", "webhook"), default="polling")
+    parser.add_argument("--storage", choices=("sqlite", "journal"), default="sqlite")
+    parser.add_argument("--flood-control", action="store_true", help="keep the outbound rate limiter on")
+    parser.add_argument("--log-level", default="WARNING", help="LOG_LEVEL of the bot subprocess")
+    parser.add_argument("--port", type=int, default=0, help="fake API port (default: any free port)")
+    parser.add_argument("--webhook-port", type=int, default=0, help="bot webhook port (default: any free port)")
+    parser.add_argument("--workers", type=int, default=0, help="run supervisor.py with this many sharded workers")
+    parser.add_argument("--attach", action="store_true", help="do not start main.py, wait for a bot to connect")
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+    if args.run_mode == "webhook" and not args.webhook_port:
+        args.webhook_port = free_port()
+    # Workers listen on consecutive ports from here
+    args.shard_base_port = free_port()
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    result = asyncio.run(main(args))
+    report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2, ensure_ascii=False))
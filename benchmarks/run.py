@@ -0,0 +1,164 @@
+"""Offline benchmarks of the tournament model, statistics and rendering hot paths
+
+    python benchmarks/run.py                  # compare against baselines.json
+    python benchmarks/run.py --save           # record new baselines
+    python benchmarks/run.py --threshold 0.5  # allow 50% slowdown
+
+Every repeat of a benchmark is followed by a fixed reference workload and
+divided by its time, so both run under the same machine load; baselines
+hold the median of these ratios, which carries over between machines.
+Exits with status 1 when any benchmark's ratio exceeds its baseline ratio
+by more than the threshold, also when measured a second time.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+
+# Settings need a token and somewhere to write, neither touches the network
+os.environ.setdefault("BOT_TOKEN", "benchmark")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="sunday-league-bench-"))
+os.environ.setdefault("LOG_DIR", os.environ["DATA_DIR"])
+sys.path.insert(0, str(ROOT))
+
+from bot.config.settings import settings  # noqa: E402
+from bot.utils.helpers import calculate_team_statistics, format_detailed_stats, format_tournament_table  # noqa: E402
+from bot.utils.keyboards import Keyboards  # noqa: E402
+from benchmarks.synthetic import build_tournament, cases  # noqa: E402
+
+
+def detailed_stats(tournament) -> str:
+    """The detailed stats view as rendered after a result (applied in memory only)"""
+    for match_id, result in tournament.match_results.items():
+        tournament._apply_result(tournament._match_index[match_id], match_id, result['home_score'], result['away_score'])
+        break
+    return format_detailed_stats(tournament.get_team_statistics(), tournament.rounds, tournament.get_round_totals())
+
+
+def benchmarks(tournament):
+    """Callables to time against one synthetic tournament"""
+    last_round = max(tournament.rounds)
+    return {
+        'calculate_team_statistics': lambda: calculate_team_statistics(tournament.teams, tournament.iter_results()),
+        'format_tournament_table': lambda: format_tournament_table(tournament.get_team_statistics()),
+        'format_detailed_stats': lambda: detailed_stats(tournament),
+        'save_data': tournament.save_data,
+        'load_data': tournament.load_data,
+        'is_round_complete': lambda: tournament.is_round_complete(last_round),
+        'get_tournament_progress': tournament.get_tournament_progress,
+        'match_results_keyboard': lambda: Keyboards.match_results(
+            tournament.rounds[last_round]['matches'], last_round, tournament.round_results(last_round),
+            page_size=settings.results_page_size
+        ),
+    }
+
+
+def reference() -> str:
+    """Fixed pure-Python workload (dict updates, sorting, formatting) every timing is divided by"""
+    table = {}
+    for number in range(2000):
+        row = table.setdefault(f"Team {number % 97}", [0, 0, 0])
+        row[0] += number % 5
+        row[1] += number % 3
+        row[2] += 1
+    ranked = sorted(table.items(), key=lambda item: (-item[1][0], item[1][1] - item[1][0], item[0]))
+    return "\n".join(f"{team}: {played} {goals_for}-{goals_against}" for team, (goals_for, goals_against, played) in ranked)
+
+
+def measure(func, repeat: int) -> float:
+    """Median over repeats of the time per call divided by the reference's, timed right after it"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    reference_timer = timeit.Timer(reference)
+    reference_number, _ = reference_timer.autorange()
+    ratios = []
+    for _ in range(repeat):
+        seconds = timer.timeit(number) / number
+        ratios.append(seconds / (reference_timer.timeit(reference_number) / reference_number))
+    return statistics.median(ratios)
+
+
+def run(repeat: int, only=None, only_cases=None) -> dict:
+    """Time every benchmark as a ratio to the reference workload"""
+    ratios = {}
+    db_path = Path(settings.data_dir) / "bench.db"
+    for case in cases():
+        if only_cases and case.name not in only_cases:
+            continue
+        tournament = build_tournament(case, db_path)
+        ratios[case.name] = {}
+        for name, func in benchmarks(tournament).items():
+            if only and name not in only:
+                continue
+            ratios[case.name][name] = measure(func, repeat)
+            print(f"{case.name:<12} {name:<26} {ratios[case.name][name]:>12.4g}x", flush=True)
+    return {'ratios': ratios}
+
+
+def compare(results: dict, baselines: dict, threshold: float) -> list:
+    """Benchmarks whose ratio to the reference exceeds the baseline ratio * (1 + threshold)"""
+    regressions = []
+    for case, ratios in results['ratios'].items():
+        for name, ratio in ratios.items():
+            baseline = baselines['ratios'].get(case, {}).get(name)
+            if baseline and ratio > baseline * (1 + threshold):
+                regressions.append((case, name, baseline, ratio))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baselines")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown ratio (default 0.25)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats per benchmark")
+    parser.add_argument("--baselines", type=Path, default=BASELINES, help="baselines JSON file")
+    parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.only)
+
+    if args.save:
+        if args.only and args.baselines.exists():
+            # Only refresh the benchmarks that were run
+            with open(args.baselines) as f:
+                baselines = json.load(f)
+            for case, ratios in results['ratios'].items():
+                baselines['ratios'].setdefault(case, {}).update(ratios)
+            results = baselines
+        with open(args.baselines, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baselines saved to {args.baselines}")
+        return 0
+
+    if not args.baselines.exists():
+        print(f"No baselines at {args.baselines}, run with --save first")
+        return 0
+
+    with open(args.baselines) as f:
+        baselines = json.load(f)
+    regressions = compare(results, baselines, args.threshold)
+    if regressions:
+        # A slowdown only counts if it shows up again, a busy machine rarely stays busy for both runs
+        print(f"Measuring {len(regressions)} slower benchmarks again with {args.repeat * 3} repeats")
+        again = run(args.repeat * 3, {name for _, name, _, _ in regressions}, {case for case, _, _, _ in regressions})
+        for case, ratios in again['ratios'].items():
+            for name, ratio in ratios.items():
+                results['ratios'][case][name] = min(results['ratios'][case][name], ratio)
+        regressions = compare(results, baselines, args.threshold)
+    for case, name, baseline, ratio in regressions:
+        print(f"REGRESSION {case}/{name}: {baseline:.4g}x -> {ratio:.4g}x the reference ({ratio / baseline - 1:+.0%})")
+    if regressions:
+        return 1
+    print(f"No regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Multi-process test of supervisor.py: chat ownership and throughput scaling
+
+    python benchmarks/sharding.py                        # 1 worker, then one per core (at least 2)
+    python benchmarks/sharding.py --scale 1,2,4 --chats 60
+    python benchmarks/sharding.py --min-speedup 1.5      # fail unless the largest run is 1.5x faster
+
+Runs the load test (benchmarks/load.py, any of its options apply) against
+supervisor.py in webhook mode once per worker count. Before the bot is
+stopped the health of every worker is read through the supervisor, and the
+run fails unless no worker received an update for a chat it does not own
+and every chat's tournament is loaded on exactly the worker shard_for()
+names. Reports updates/sec for each worker count and the speedup over the
+first. Exits with status 1 on any violation.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Settings need a token and somewhere to write
+os.environ.setdefault("BOT_TOKEN", "sharding-test")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="sunday-league-shards-"))
+os.environ.setdefault("LOG_DIR", os.environ["DATA_DIR"])
+
+from benchmarks import load  # noqa: E402
+from bot.sharding import shard_for  # noqa: E402
+
+
+def check_ownership(health: Dict, chats: List[int]) -> List[str]:
+    """Routing violations found in the supervisor's health report"""
+    workers = health['workers']
+    problems = []
+    owners: Dict[str, List[int]] = {}
+    for worker in workers:
+        shard = worker['health'].get('shard')
+        if shard is None:
+            problems.append(f"worker {worker['index']} is unreachable: {worker['health'].get('error')}")
+            continue
+        if shard['misrouted']:
+            problems.append(f"worker {worker['index']} received {shard['misrouted']} updates for chats it does not own")
+        for tournament_id in shard['tournaments']:
+            owners.setdefault(tournament_id, []).append(worker['index'])
+    for chat_id in chats:
+        expected = [shard_for(chat_id, len(workers))]
+        found = owners.get(str(chat_id), [])
+        if found != expected:
+            problems.append(f"chat {chat_id} is loaded on workers {found}, expected {expected}")
+    return problems
+
+
+async def run(args) -> Dict:
+    health: Dict = {}
+
+    async def read_health() -> None:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(f"http://127.0.0.1:{args.webhook_port}/healthz")
+            health.update(response.json())
+
+    result = await load.main(args, before_stop=read_health)
+    chats = [-(100000 + number) for number in range(args.chats)]
+    result['problems'] = check_ownership(health, chats)
+    result['per_worker'] = {worker['index']: worker['forwarded'] for worker in health['workers']}
+    result['health'] = health
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default=f"1,{max(2, os.cpu_count() or 1)}", help="worker counts to run, comma separated")
+    parser.add_argument("--min-speedup", type=float, default=0.0, help="required speedup of the last over the first run")
+    own, rest = parser.parse_known_args()
+    scale = [int(count) for count in own.scale.split(",")]
+
+    results = []
+    for workers in scale:
+        args = load.parse_args(rest + ["--run-mode", "webhook", "--workers", str(workers)])
+        result = asyncio.run(run(args))
+        results.append(result)
+        load.report(result)
+        print(f"updates per worker: {result['per_worker']}")
+        for problem in result['problems']:
+            print(f"FAIL {problem}")
+        print()
+
+    failed = any(result['problems'] for result in results)
+    base = results[0]['updates_per_second']
+    print(f"{'workers':>7} {'updates/s':>10} {'speedup':>8}")
+    for result in results:
+        speedup = result['updates_per_second'] / base if base else 0.0
+        print(f"{result['workers']:>7} {result['updates_per_second']:>10.1f} {speedup:>7.2f}x")
+    speedup = results[-1]['updates_per_second'] / base if base else 0.0
+    if own.min_speedup and speedup < own.min_speedup:
+        print(f"FAIL speedup {speedup:.2f}x is below {own.min_speedup:.2f}x ({os.cpu_count()} CPU cores)")
+        failed = True
+    if not failed:
+        print(f"Every chat was handled by its own worker only ({len(scale)} runs)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import random
+from pathlib import Path
+from typing import NamedTuple
+from bot.config.settings import settings
+from bot.database.storage import TournamentStorage
+from bot.models.tournament import FootballTournament, match_id
+
+
+class Case(NamedTuple):
+    """Shape of a synthetic tournament"""
+    name: str
+    teams: int
+    rounds: int
+    played: float
+
+
+def cases():
+    """Benchmark cases from the smallest legal tournament up to the configured limits"""
+    most_rounds = settings.max_rounds + settings.max_additional_rounds
+    return [
+        Case("tiny", 2, 1, 1.0),
+        Case("small", 6, 3, 0.5),
+        Case("medium", 12, settings.max_rounds // 2, 1.0),
+        Case("max-partial", settings.max_teams, most_rounds, 0.5),
+        Case("max-full", settings.max_teams, most_rounds, 1.0),
+    ]
+
+
+def build_tournament(case: Case, db_path: Path, seed: int = 0) -> FootballTournament:
+    """Create a tournament of the given shape with random scores"""
+    rng = random.Random(seed)
+    tournament = FootballTournament(
+        data_file=None,
+        storage=TournamentStorage(db_path, case.name),
+        tournament_id=case.name
+    )
+    with tournament.storage.batch():
+        for i in range(case.teams):
+            tournament.add_team(f"Team {i + 1:02d}")
+        tournament.create_tournament_structure(min(case.rounds, settings.max_rounds))
+        if case.rounds > settings.max_rounds:
+            tournament.add_additional_rounds(case.rounds - settings.max_rounds)
+
+        fixtures = [
+            (round_num, index)
+            for round_num, round_data in tournament.rounds.items()
+            for index in range(len(round_data['matches']))
+        ]
+        for round_num, index in fixtures[:int(len(fixtures) * case.played)]:
+            tournament.record_result(match_id(round_num, index), rng.randint(0, 5), rng.randint(0, 5))
+    return tournament
@@ -8,6 +8,8 @@ class Settings(BaseSettings):
     # Bot Configuration
     bot_token: str = Field(..., env="BOT_TOKEN")
     bot_name: str = Field(default="FootballTournamentBot", env="BOT_NAME")
+    # Bot API server, e.g. http://127.0.0.1:8081 for benchmarks/fake_api.py (default: api.telegram.org)
+    telegram_base_url: Optional[str] = Field(default=None, env="TELEGRAM_BASE_URL")
     
     # Environment
     environment: str = Field(default="development", env="ENVIRONMENT")
@@ -16,14 +18,69 @@ class Settings(BaseSettings):
     # Paths
     data_dir: Path = Field(default=Path("./data"), env="DATA_DIR")
     log_dir: Path = Field(default=Path("./logs"), env="LOG_DIR")
+    database_file: str = Field(default="tournament.db", env="DATABASE_FILE")
     
-    # Logging
+    # Storage
+    storage_backend: str = Field(default="sqlite", env="STORAGE_BACKEND")
+    journal_fsync_batch: int = Field(default=32, env="JOURNAL_FSYNC_BATCH")
+    journal_fsync_interval: float = Field(default=1.0, env="JOURNAL_FSYNC_INTERVAL")
+    journal_compact_bytes: int = Field(default=1_048_576, env="JOURNAL_COMPACT_BYTES")
+    persist_coalesce_window: float = Field(default=0.5, env="PERSIST_COALESCE_WINDOW")
+    max_cached_tournaments: int = Field(default=256, env="MAX_CACHED_TOURNAMENTS")
+    legacy_chat_id: Optional[int] = Field(default=None, env="LEGACY_CHAT_ID")
+    render_cache_size: int = Field(default=512, env="RENDER_CACHE_SIZE")
+    # Finished seasons are appended to DATA_DIR/archive/<tournament> for all-time queries
+    archive_enabled: bool = Field(default=True, env="ARCHIVE_ENABLED")
+    # Conversation state (user_data) survives restarts, written every interval seconds
+    conversation_persistence: bool = Field(default=True, env="CONVERSATION_PERSISTENCE")
+    conversation_flush_interval: float = Field(default=5.0, env="CONVERSATION_FLUSH_INTERVAL")
+    
+    # Update delivery: "polling" or "webhook"
+    run_mode: str = Field(default="polling", env="RUN_MODE")
+    webhook_listen: str = Field(default="0.0.0.0", env="WEBHOOK_LISTEN")
+    webhook_port: int = Field(default=8443, env="WEBHOOK_PORT")
+    webhook_path: str = Field(default="/telegram", env="WEBHOOK_PATH")
+    webhook_health_path: str = Field(default="/healthz", env="WEBHOOK_HEALTH_PATH")
+    webhook_url: Optional[str] = Field(default=None, env="WEBHOOK_URL")
+    webhook_secret_token: Optional[str] = Field(default=None, env="WEBHOOK_SECRET_TOKEN")
+    concurrent_updates: int = Field(default=8, env="CONCURRENT_UPDATES")
+    
+    # Sharding (supervisor.py): worker processes (0 = one per CPU core) on SHARD_BASE_PORT + n
+    shard_workers: int = Field(default=0, env="SHARD_WORKERS")
+    shard_base_port: int = Field(default=8600, env="SHARD_BASE_PORT")
+    # Set by the supervisor for each worker
+    shard_index: Optional[int] = Field(default=None, env="SHARD_INDEX")
+    shard_count: int = Field(default=1, env="SHARD_COUNT")
+    
+    # Outbound flood control (messages per second, groups per minute, 0 disables a budget)
+    send_rate_limit_enabled: bool = Field(default=True, env="SEND_RATE_LIMIT_ENABLED")
+    send_global_rate: float = Field(default=30, env="SEND_GLOBAL_RATE")
+    send_chat_rate: float = Field(default=1.0, env="SEND_CHAT_RATE")
+    send_group_per_minute: float = Field(default=20, env="SEND_GROUP_PER_MINUTE")
+    send_burst: float = Field(default=3, env="SEND_BURST")
+    send_max_retries: int = Field(default=3, env="SEND_MAX_RETRIES")
+    
+    # Metrics (Prometheus text format on METRICS_LISTEN:METRICS_PORT/metrics)
+    metrics_enabled: bool = Field(default=False, env="METRICS_ENABLED")
+    metrics_listen: str = Field(default="127.0.0.1", env="METRICS_LISTEN")
+    metrics_port: int = Field(default=9108, env="METRICS_PORT")
+    
+    # Logging (written from a background thread, see bot/utils/log.py)
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
+    log_format: str = Field(default="text", env="LOG_FORMAT")
+    log_max_bytes: int = Field(default=10_485_760, env="LOG_MAX_BYTES")
+    log_backup_count: int = Field(default=5, env="LOG_BACKUP_COUNT")
+    log_rotate_when: Optional[str] = Field(default=None, env="LOG_ROTATE_WHEN")
+    # Keep one in N records below WARNING per logger, e.g. "httpx=20,bot.handlers.callbacks=10"
+    log_sample: str = Field(default="httpx=20,bot.handlers.callbacks=10,bot.handlers.tournament=10", env="LOG_SAMPLE")
     
     # Bot Limits
     max_teams: int = Field(default=20, env="MAX_TEAMS")
     max_rounds: int = Field(default=20, env="MAX_ROUNDS")
     max_additional_rounds: int = Field(default=10, env="MAX_ADDITIONAL_ROUNDS")
+    results_page_size: int = Field(default=10, env="RESULTS_PAGE_SIZE")
+    # Table order: points, goal_difference, goals_for, won, h2h_points, h2h_goal_difference, h2h_goals_for
+    tiebreakers: str = Field(default="points,goal_difference,goals_for", env="TIEBREAKERS")
     
     # Security
     allowed_users: Optional[List[int]] = Field(default=None, env="ALLOWED_USERS")
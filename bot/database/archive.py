@@ -0,0 +1,250 @@
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from bot.config.settings import settings
+from bot.models.columnar import ResultColumns, all_time_table, team_history, team_table
+from bot.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RESULTS_FILE = "results.bin"
+INDEX_FILE = "index.json"
+
+# One played match: round, home team id, away team id (uint16), home score, away score (uint32)
+RECORD = struct.Struct("<HHHII")
+
+
+class SeasonArchive:
+    """Finished seasons of one tournament as fixed-size binary result records
+
+    results.bin holds the results of every archived season back to back,
+    one record per match. index.json interns the team names and lists each
+    season with its finish time, record range, teams and final order. The
+    index is held in memory with a team -> seasons map, so a query reads
+    only the record ranges of the seasons it needs from a memory map.
+    Records past the indexed end (a write interrupted before its index
+    update) are truncated on open.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._teams: List[str] = []
+        self._team_index: Dict[str, int] = {}
+        self._seasons: List[Dict] = []
+        self._by_team: Dict[int, List[int]] = {}
+        self._read_index()
+        self._truncate_tail()
+
+    @property
+    def _results_path(self) -> Path:
+        return self.directory / RESULTS_FILE
+
+    def _read_index(self) -> None:
+        path = self.directory / INDEX_FILE
+        if not path.exists():
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        for team in index.get('teams', []):
+            self._team_id(team)
+        for season in index.get('seasons', []):
+            self._index_season(season)
+
+    def _truncate_tail(self) -> None:
+        end = self._end()
+        path = self._results_path
+        if path.exists() and path.stat().st_size > end:
+            logger.warning(f"Archive {self.directory}: dropping {path.stat().st_size - end} unindexed bytes")
+            os.truncate(path, end)
+
+    def _end(self) -> int:
+        """Byte offset just past the last indexed record"""
+        if not self._seasons:
+            return 0
+        last = self._seasons[-1]
+        return last['offset'] + last['count'] * RECORD.size
+
+    def _team_id(self, team: str) -> int:
+        index = self._team_index.get(team)
+        if index is None:
+            index = self._team_index[team] = len(self._teams)
+            self._teams.append(team)
+        return index
+
+    def _index_season(self, season: Dict) -> None:
+        self._seasons.append(season)
+        for team in season['teams']:
+            self._by_team.setdefault(team, []).append(season['number'])
+
+    def _write_index(self) -> None:
+        path = self.directory / INDEX_FILE
+        tmp_path = self.directory / (INDEX_FILE + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'teams': self._teams, 'seasons': self._seasons}, f, separators=(',', ':'), ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+            metrics.inc('storage_bytes_written_total', f.tell(), backend='archive')
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self._seasons)
+
+    @contextmanager
+    def batch(self):
+        """Persistence worker hook, every season is written and synced on its own"""
+        yield self
+
+    def flush(self) -> None:
+        """Persistence worker hook, nothing is buffered"""
+
+    def close(self) -> None:
+        """Nothing is kept open between writes and queries"""
+
+    def add_season(self, season: Dict) -> int:
+        """Append a finished season and return its number
+
+        ``season`` holds ``teams``, ``rounds``, ``standings`` (team names in
+        final order), ``finished_at`` (epoch seconds) and ``results`` as
+        (round, home, away, home score, away score) tuples.
+        """
+        with self._lock:
+            team_id = self._team_id
+            data = b"".join(
+                RECORD.pack(round_num, team_id(home), team_id(away), home_score, away_score)
+                for round_num, home, away, home_score, away_score in season['results']
+            )
+            offset = self._end()
+            with open(self._results_path, 'ab') as f:
+                f.truncate(offset)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            metrics.inc('storage_bytes_written_total', len(data), backend='archive')
+
+            number = len(self._seasons) + 1
+            self._index_season({
+                'number': number,
+                'finished_at': int(season.get('finished_at') or time.time()),
+                'offset': offset,
+                'count': len(data) // RECORD.size,
+                'rounds': season['rounds'],
+                'teams': [team_id(team) for team in season['teams']],
+                'standings': [team_id(team) for team in season['standings']]
+            })
+            self._write_index()
+        logger.info(f"Archived season {number} in {self.directory} ({len(data) // RECORD.size} results)")
+        return number
+
+    def season_info(self, season: Dict) -> Dict:
+        """A season index entry with team names instead of ids"""
+        return {
+            'number': season['number'],
+            'finished_at': season['finished_at'],
+            'rounds': season['rounds'],
+            'matches': season['count'],
+            'teams': [self._teams[team] for team in season['teams']],
+            'standings': [self._teams[team] for team in season['standings']]
+        }
+
+    def seasons(self, since: Optional[float] = None, until: Optional[float] = None) -> List[Dict]:
+        """Archived seasons finished in [since, until), oldest first"""
+        with self._lock:
+            seasons = self._seasons
+            # Seasons are appended as they finish, so finish times are sorted
+            dates = [season['finished_at'] for season in seasons]
+            start = bisect.bisect_left(dates, since) if since is not None else 0
+            stop = bisect.bisect_left(dates, until) if until is not None else len(seasons)
+            return [self.season_info(season) for season in seasons[start:stop]]
+
+    def find_team(self, name: str) -> Optional[str]:
+        """Archived team name matching name, ignoring case"""
+        with self._lock:
+            if name in self._team_index:
+                return name
+            folded = name.casefold()
+            return next((team for team in self._teams if team.casefold() == folded), None)
+
+    def team_seasons(self, team: str) -> List[int]:
+        """Numbers of the seasons a team played in"""
+        with self._lock:
+            index = self._team_index.get(team)
+            return list(self._by_team.get(index, [])) if index is not None else []
+
+    def columns(self, numbers: Optional[List[int]] = None, pair: Optional[Tuple[str, str]] = None) -> ResultColumns:
+        """Load the results of some seasons (all by default) into columns
+
+        With ``pair`` only the matches between those two teams are kept.
+        """
+        with self._lock:
+            columns = ResultColumns(self._teams)
+            selected = self._seasons if numbers is None else [self._seasons[n - 1] for n in numbers]
+            selected = [season for season in selected if season['count']]
+            if not selected:
+                return columns
+            wanted = None
+            if pair is not None:
+                wanted = {self._team_index.get(pair[0]), self._team_index.get(pair[1])}
+
+            with open(self._results_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for season in selected:
+                    index = columns.add_season(season_label(season))
+                    start = season['offset']
+                    records = RECORD.iter_unpack(data[start:start + season['count'] * RECORD.size])
+                    columns.extend(
+                        (index,) + record for record in records
+                        if wanted is None or {record[1], record[2]} == wanted
+                    )
+            return columns
+
+    def all_time(self) -> Dict[str, Dict[str, int]]:
+        """All-time table of every archived season, with seasons played and titles won"""
+        table = all_time_table(self.columns())
+        with self._lock:
+            titles: Dict[str, int] = {}
+            for season in self._seasons:
+                if season['standings']:
+                    champion = self._teams[season['standings'][0]]
+                    titles[champion] = titles.get(champion, 0) + 1
+        for team, row in table.items():
+            row['titles'] = titles.get(team, 0)
+        return table
+
+    def team_record(self, team: str) -> Tuple[Optional[Dict[str, int]], Dict[str, Dict[str, int]]]:
+        """All-time totals and season by season record of one team"""
+        numbers = self.team_seasons(team)
+        if not numbers:
+            return None, {}
+        columns = self.columns(numbers)
+        return all_time_table(columns)[team], team_history(columns, team)
+
+    def head_to_head(self, team: str, opponent: str) -> Tuple[Dict[str, Dict[str, int]], List[Tuple[str, int, str, str, int, int]]]:
+        """Totals of both teams in their meetings and the meetings themselves"""
+        numbers = sorted(set(self.team_seasons(team)) & set(self.team_seasons(opponent)))
+        columns = self.columns(numbers, pair=(team, opponent))
+        meetings = [
+            (columns.seasons[season], int(round_num), columns.teams[home], columns.teams[away], int(home_score), int(away_score))
+            for season, round_num, home, away, home_score, away_score in zip(
+                *(columns.column(name) for name in ('season', 'round', 'home', 'away', 'home_score', 'away_score'))
+            )
+        ]
+        return team_table(columns, [team, opponent]), meetings
+
+
+def season_label(season: Dict) -> str:
+    """Display name of an archived season"""
+    return f"Season {season['number']} ({time.strftime('%Y-%m-%d', time.localtime(season['finished_at']))})"
+
+
+def open_archive(tournament_id: str = "default") -> SeasonArchive:
+    """Open a tournament's archive (reads its index), see FootballTournament.archive()"""
+    return SeasonArchive(settings.data_dir / "archive" / tournament_id)
@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from bot.config.settings import settings
+from bot.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_PREFIX = "journal."
+SEGMENT_SUFFIX = ".log"
+
+
+def pack_state(state: Dict) -> Dict:
+    """Convert tournament state to the compact snapshot form (fixtures stored once)"""
+    templates: Dict[Tuple, int] = {}
+    fixtures: List[List] = []
+    rounds = {}
+    for round_num, round_data in state.get('rounds', {}).items():
+        matches = tuple(tuple(match) for match in round_data['matches'])
+        template = templates.get(matches)
+        if template is None:
+            template = templates[matches] = len(fixtures)
+            fixtures.append([list(match) for match in matches])
+        rounds[str(round_num)] = [template, int(bool(round_data.get('completed')))]
+
+    packed = {key: value for key, value in state.items() if key != 'rounds'}
+    packed['fixtures'] = fixtures
+    packed['rounds'] = rounds
+    return packed
+
+
+def unpack_state(packed: Dict) -> Dict:
+    """Expand a compact snapshot back to the tournament state shape"""
+    fixtures = [tuple(tuple(match) for match in template) for template in packed.get('fixtures', [])]
+    state = {key: value for key, value in packed.items() if key not in ('rounds', 'fixtures')}
+    state['rounds'] = {
+        int(round_num): {'matches': fixtures[template], 'completed': bool(completed)}
+        for round_num, (template, completed) in packed.get('rounds', {}).items()
+    }
+    state.setdefault('teams', [])
+    state.setdefault('match_results', {})
+    return state
+
+
+def apply_event(state: Dict, event: Dict) -> Dict:
+    """Apply one journal event to an unpacked state and return the new state"""
+    kind = event['e']
+    if kind == 'state':
+        return unpack_state(event['s'])
+    if kind == 'result':
+        state['match_results'][event['m']] = {'home_score': event['h'], 'away_score': event['a']}
+    elif kind == 'results':
+        for match_id, home_score, away_score in event['r']:
+            state['match_results'][match_id] = {'home_score': home_score, 'away_score': away_score}
+    elif kind == 'team':
+        state['teams'] = state['teams'][:event['p']] + [event['n']]
+    elif kind == 'round_done':
+        if event['r'] in state['rounds']:
+            state['rounds'][event['r']]['completed'] = True
+    elif kind == 'rounds':
+        matches = tuple(tuple(match) for match in event['f'])
+        for round_num in event['r']:
+            state['rounds'][round_num] = {'matches': matches, 'completed': False}
+        state['total_rounds'] = event['t']
+    elif kind == 'meta':
+        state.update(event['s'])
+    else:
+        logger.warning(f"Unknown journal event: {kind}")
+    return state
+
+
+class JournalStorage:
+    """Append-only journal storage with periodic snapshot compaction
+
+    Every mutation is appended as one compact JSON line. Appends are
+    fsync'ed in batches (by event count or elapsed time). Once the active
+    segment passes settings.journal_compact_bytes it is rotated and a
+    background thread folds the closed segments into a new snapshot.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._compacting = threading.Lock()
+        self._unsynced = 0
+        self._batch_depth = 0
+        self._last_sync = time.monotonic()
+
+        segments = self._segments()
+        self._segment = segments[-1] if segments else self._snapshot_seq()
+        self._file = self._open_segment()
+
+    def _open_segment(self):
+        """Open the active segment for appending, dropping a torn final line first
+
+        A crash mid-append leaves a line without its newline; appending to
+        it would make the next event unreadable as well.
+        """
+        path = self._segment_path(self._segment)
+        if path.exists():
+            with open(path, 'rb+') as f:
+                end = f.seek(0, os.SEEK_END)
+                position = end
+                while position > 0:
+                    start = max(0, position - 4096)
+                    f.seek(start)
+                    newline = f.read(position - start).rfind(b"\n")
+                    if newline >= 0:
+                        position = start + newline + 1
+                        break
+                    position = start
+                if position < end:
+                    logger.warning(f"Dropping {end - position} bytes of a torn line at the end of segment {self._segment}")
+                    f.truncate(position)
+                    f.flush()
+                    os.fsync(f.fileno())
+        return open(path, 'a', encoding='utf-8')
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}"
+
+    def _segments(self) -> List[int]:
+        """Return journal segment numbers in replay order"""
+        return sorted(
+            int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for path in self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+        )
+
+    def _read_snapshot(self) -> Tuple[int, Optional[Dict]]:
+        path = self.directory / SNAPSHOT_FILE
+        if not path.exists():
+            return 0, None
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        return snapshot['seq'], unpack_state(snapshot['state'])
+
+    def _snapshot_seq(self) -> int:
+        return self._read_snapshot()[0]
+
+    def _replay(self, state: Optional[Dict], segments: List[int]) -> Optional[Dict]:
+        """Replay journal segments on top of a snapshot state"""
+        for seq in segments:
+            with open(self._segment_path(seq), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line after a crash, everything before it is intact
+                        logger.warning(f"Skipping corrupt journal line in segment {seq}")
+                        continue
+                    if state is None and event['e'] != 'state':
+                        state = unpack_state({})
+                    state = apply_event(state, event)
+        return state
+
+    def close(self) -> None:
+        """Sync and close the active segment"""
+        with self._lock:
+            self.flush()
+            self._file.close()
+
+    def exists(self) -> bool:
+        """Check if this tournament has been stored before"""
+        return (self.directory / SNAPSHOT_FILE).exists() or any(
+            self._segment_path(seq).stat().st_size > 0 for seq in self._segments()
+        )
+
+    def load(self) -> Optional[Dict]:
+        """Load the latest snapshot and replay the journal tail"""
+        with self._lock, self._compacting:
+            self.flush()
+            seq, state = self._read_snapshot()
+            return self._replay(state, [s for s in self._segments() if s >= seq])
+
+    def flush(self) -> None:
+        """Force buffered journal lines to disk"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            if self._unsynced:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    @contextmanager
+    def batch(self):
+        """Append several events with a single fsync at the end"""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self.flush()
+                    if self._file.tell() >= settings.journal_compact_bytes:
+                        self._rotate()
+
+    def _append(self, event: Dict) -> None:
+        line = json.dumps(event, separators=(',', ':'), ensure_ascii=False)
+        with self._lock:
+            if self._file.closed:
+                self._file = self._open_segment()
+            self._file.write(line + "\n")
+            self._unsynced += 1
+            if metrics.enabled:
+                metrics.inc('storage_bytes_written_total', len(line.encode('utf-8')) + 1, backend='journal')
+            if self._batch_depth:
+                return
+            if (self._unsynced >= settings.journal_fsync_batch
+                    or time.monotonic() - self._last_sync >= settings.journal_fsync_interval):
+                self.flush()
+            if self._file.tell() >= settings.journal_compact_bytes:
+                self._rotate()
+
+    def _rotate(self) -> None:
+        """Start a new segment and compact the closed ones in the background"""
+        if not self._compacting.acquire(blocking=False):
+            return
+        self.flush()
+        self._file.close()
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+        threading.Thread(
+            target=self._compact, args=(self._segment,), name="journal-compaction", daemon=True
+        ).start()
+
+    def _compact(self, upto: int) -> None:
+        """Fold all segments before `upto` into a new snapshot"""
+        try:
+            seq, state = self._read_snapshot()
+            closed = [s for s in self._segments() if seq <= s < upto]
+            state = self._replay(state, closed)
+            if state is not None:
+                tmp_path = self.directory / (SNAPSHOT_FILE + ".tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'seq': upto, 'state': pack_state(state)}, f, separators=(',', ':'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    metrics.inc('storage_bytes_written_total', f.tell(), backend='journal')
+                os.replace(tmp_path, self.directory / SNAPSHOT_FILE)
+            for s in closed:
+                self._segment_path(s).unlink(missing_ok=True)
+            logger.info(f"Journal compacted into snapshot {upto} ({len(closed)} segments)")
+        except Exception as e:
+            logger.error(f"Journal compaction failed: {e}")
+        finally:
+            self._compacting.release()
+
+    def save_state(self, state: Dict) -> None:
+        """Record a full state replacement (structural changes only)"""
+        self._append({'e': 'state', 's': pack_state(state)})
+
+    def save_meta(self, state: Dict) -> None:
+        """Record round counters and tournament flags"""
+        self._append({'e': 'meta', 's': {
+            'current_round': state.get('current_round', 1),
+            'total_rounds': state.get('total_rounds', 0),
+            'tournament_started': state.get('tournament_started', False),
+            'tournament_finished': state.get('tournament_finished', False)
+        }})
+
+    def add_team(self, position: int, name: str) -> None:
+        """Record a team being added"""
+        self._append({'e': 'team', 'p': position, 'n': name})
+
+    def set_round_completed(self, round_num: int, completed: bool = True) -> None:
+        """Record a round being completed"""
+        self._append({'e': 'round_done', 'r': round_num})
+
+    def add_rounds(self, round_nums: List[int], matches: List[Tuple[str, str]], total_rounds: int) -> None:
+        """Record additional rounds"""
+        self._append({'e': 'rounds', 'r': list(round_nums), 'f': [list(match) for match in matches], 't': total_rounds})
+
+    def upsert_result(self, match_id: str, home_score: int, away_score: int) -> None:
+        """Record a match result"""
+        self._append({'e': 'result', 'm': match_id, 'h': home_score, 'a': away_score})
+
+    def upsert_results(self, results: List[Tuple[str, int, int]]) -> None:
+        """Record several match results as one event"""
+        self._append({'e': 'results', 'r': [list(result) for result in results]})
+
+    def migrate_json(self, json_file: Path) -> bool:
+        """One-shot import of a legacy JSON data file as the first snapshot"""
+        json_file = Path(json_file)
+        if not json_file.exists() or self.exists():
+            return False
+
+        with open(json_file, 'r') as f:
+            data = json.load(f)
+        data['rounds'] = {int(k): v for k, v in data.get('rounds', {}).items()}
+        self.save_state(data)
+        self.flush()
+        json_file.rename(json_file.with_suffix(json_file.suffix + ".migrated"))
+        logger.info(f"Migrated {json_file} into journal {self.directory}")
+        return True
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from telegram.ext import BasePersistence, CallbackContext, ExtBot, PersistenceInput
+from bot.config.settings import settings
+from bot.database.storage import UserDataStorage
+from bot.database.worker import persistence
+from bot.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def chat_key(key: str) -> bool:
+    """Whether a stored user_data key is a chat id, see ChatUserContext"""
+    return key.lstrip("-").isdigit()
+
+
+class ChatUserContext(CallbackContext[ExtBot, Dict, Dict, Dict]):
+    """Callback context whose user_data is the user's state in the current chat
+
+    application.user_data maps each user to their state per chat id (as a
+    string), so a conversation started in one chat is not continued in
+    another. With sharded workers every chat, and so every piece of a
+    user's state, has exactly one owning process.
+    """
+
+    @property
+    def user_data(self) -> Optional[Dict]:
+        data = super().user_data
+        if data is None:
+            return None
+        # Updates without a chat belong to the private chat, whose id is the user's
+        chat_id = self._chat_id if self._chat_id is not None else self._user_id
+        return data.setdefault(str(chat_id), {})
+
+    async def refresh_data(self) -> None:
+        """Load the user's state in every chat (ConversationPersistence stores only user_data)"""
+        persistence = self.application.persistence
+        if persistence and persistence.store_data.user_data and self._user_id is not None:
+            await persistence.refresh_user_data(
+                user_id=self._user_id,
+                user_data=self.application.user_data[self._user_id]
+            )
+
+
+class ConversationPersistence(BasePersistence[Dict, Dict, Dict]):
+    """python-telegram-bot persistence for the conversation state in user_data
+
+    Only user_data is stored (waiting_for, current_match, ...), one row per
+    user and chat (see ChatUserContext) in the tournament database. Nothing
+    is read at startup: a user's rows are loaded the first time an update
+    of theirs is processed, so a restart costs nothing however many users
+    have state. The application hands over the users touched since the
+    last run every update_interval; only chats whose state changed are
+    written, all of them in one batch of the persistence worker.
+
+    A row is only ever written by the process owning its chat, so sharded
+    workers that each cache the same user never overwrite each other's
+    state.
+    """
+
+    def __init__(self, storage: UserDataStorage, update_interval: float = 5):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        self.storage = storage
+        # JSON of every chat's state as last loaded or written, per user seen by this process
+        self._stored: Dict[int, Dict[str, str]] = {}
+
+    @classmethod
+    def from_settings(cls) -> "ConversationPersistence":
+        return cls(
+            UserDataStorage(settings.data_dir / settings.database_file),
+            update_interval=settings.conversation_flush_interval
+        )
+
+    def _submit(self, operation: str, *args) -> None:
+        if persistence.running:
+            persistence.submit(self.storage, operation, *args)
+        else:
+            getattr(self.storage, operation)(*args)
+
+    async def get_user_data(self) -> Dict[int, Dict]:
+        """Nothing up front, see refresh_user_data()"""
+        return {}
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict) -> None:
+        """Load a user's stored state the first time they are seen"""
+        if user_id in self._stored:
+            return
+        stored = await asyncio.to_thread(self.storage.load_user, user_id)
+        if user_id in self._stored:
+            # Loaded by a concurrent update of the same user meanwhile
+            return
+        # Keys from before state was kept per chat cannot be placed in a chat
+        legacy = [key for key in stored if not chat_key(key)]
+        for key in legacy:
+            del stored[key]
+        if legacy:
+            self._submit('write_keys', [(user_id, key, None) for key in legacy])
+        self._stored[user_id] = stored
+        for key, value in stored.items():
+            user_data.setdefault(key, json.loads(value))
+        metrics.inc('conversation_loads_total')
+
+    async def update_user_data(self, user_id: int, data: Dict) -> None:
+        """Queue the chats of a user whose state changed since it was last stored"""
+        stored = self._stored.setdefault(user_id, {})
+        changes: List[Tuple[int, str, Optional[str]]] = []
+        current = set()
+        for key, value in data.items():
+            if not value:
+                # Nothing pending in this chat, its row is deleted
+                continue
+            current.add(key)
+            try:
+                encoded = json.dumps(value, separators=(',', ':'))
+            except TypeError:
+                logger.warning(f"Not persisting user_data of user {user_id} in chat {key}: not JSON serializable")
+                continue
+            if stored.get(key) != encoded:
+                stored[key] = encoded
+                changes.append((user_id, key, encoded))
+        for key in [key for key in stored if key not in current]:
+            del stored[key]
+            changes.append((user_id, key, None))
+        if changes:
+            self._submit('write_keys', changes)
+            metrics.inc('conversation_keys_written_total', len(changes))
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._stored[user_id] = {}
+        self._submit('drop_user', user_id)
+
+    async def flush(self) -> None:
+        """Wait until everything queued is written"""
+        if persistence.running:
+            await asyncio.to_thread(persistence.flush)
+
+    # Chat, bot and callback data and ConversationHandler states are not stored
+
+    async def get_chat_data(self) -> Dict[int, Dict]:
+        return {}
+
+    async def get_bot_data(self) -> Dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> Dict:
+        return {}
+
+    async def update_conversation(self, name: str, key: Tuple[int, ...], new_state: Optional[object]) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data: Dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: Dict) -> None:
+        pass
+
+    async def update_callback_data(self, data: Any) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: Dict) -> None:
+        pass
@@ -0,0 +1,413 @@
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from bot.config.settings import settings
+from bot.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tournaments (
+    id TEXT PRIMARY KEY,
+    current_round INTEGER NOT NULL DEFAULT 1,
+    total_rounds INTEGER NOT NULL DEFAULT 0,
+    tournament_started INTEGER NOT NULL DEFAULT 0,
+    tournament_finished INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS teams (
+    tournament_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, position)
+);
+CREATE TABLE IF NOT EXISTS fixtures (
+    tournament_id TEXT NOT NULL,
+    template INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    home TEXT NOT NULL,
+    away TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, template, position)
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    tournament_id TEXT NOT NULL,
+    round_num INTEGER NOT NULL,
+    template INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tournament_id, round_num)
+);
+CREATE TABLE IF NOT EXISTS results (
+    tournament_id TEXT NOT NULL,
+    match_id TEXT NOT NULL,
+    home_score INTEGER NOT NULL,
+    away_score INTEGER NOT NULL,
+    PRIMARY KEY (tournament_id, match_id)
+);
+CREATE TABLE IF NOT EXISTS user_data (
+    user_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (user_id, key)
+) WITHOUT ROWID;
+"""
+
+
+_connections: Dict[Path, Tuple[sqlite3.Connection, threading.RLock]] = {}
+_connections_lock = threading.Lock()
+
+
+def _connect(db_path: Path) -> Tuple[sqlite3.Connection, threading.RLock]:
+    """Open (once per database file) the connection shared by all tournaments"""
+    db_path = Path(db_path).resolve()
+    with _connections_lock:
+        if db_path not in _connections:
+            conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            _connections[db_path] = (conn, threading.RLock())
+        return _connections[db_path]
+
+
+def _write(conn: sqlite3.Connection, sql: str, rows: List[Tuple]) -> None:
+    """executemany() counting the bytes of the values written
+
+    SQLite does not report its own I/O, so storage_bytes_written_total
+    counts the bound values (text as UTF-8, numbers as 8 bytes).
+    """
+    conn.executemany(sql, rows)
+    if metrics.enabled:
+        size = sum(len(value.encode('utf-8')) if isinstance(value, str) else 8 for row in rows for value in row)
+        metrics.inc('storage_bytes_written_total', size, backend='sqlite')
+
+
+def close_connections() -> None:
+    """Close all shared database connections"""
+    with _connections_lock:
+        for conn, lock in _connections.values():
+            with lock:
+                conn.close()
+        _connections.clear()
+
+
+class TournamentStorage:
+    """SQLite storage for a single tournament
+
+    Fixture lists are stored once per distinct template and referenced by
+    rounds, so the database does not grow with rounds x teams^2. Recording
+    a result is a single-row upsert. All tournaments in one database file
+    share a single connection.
+    """
+
+    def __init__(self, db_path: Path, tournament_id: str = "default"):
+        self.db_path = Path(db_path)
+        self.tournament_id = tournament_id
+        self._conn, self._lock = _connect(self.db_path)
+
+    def close(self) -> None:
+        """Release this tournament, the shared connection stays open"""
+
+    def _transaction(self):
+        """Return a context manager running statements in one transaction"""
+        return _Transaction(self._conn, self._lock)
+
+    def exists(self) -> bool:
+        """Check if this tournament has been stored before"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM tournaments WHERE id = ?", (self.tournament_id,)
+            ).fetchone()
+        return row is not None
+
+    def load(self) -> Optional[Dict]:
+        """Load tournament state in the same shape as the legacy JSON file"""
+        tid = self.tournament_id
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT current_round, total_rounds, tournament_started, tournament_finished "
+                "FROM tournaments WHERE id = ?", (tid,)
+            ).fetchone()
+            if meta is None:
+                return None
+
+            teams = [name for (name,) in self._conn.execute(
+                "SELECT name FROM teams WHERE tournament_id = ? ORDER BY position", (tid,)
+            )]
+
+            templates: Dict[int, List[Tuple[str, str]]] = {}
+            for template, home, away in self._conn.execute(
+                "SELECT template, home, away FROM fixtures WHERE tournament_id = ? "
+                "ORDER BY template, position", (tid,)
+            ):
+                templates.setdefault(template, []).append((home, away))
+
+            rounds = {}
+            for round_num, template, completed in self._conn.execute(
+                "SELECT round_num, template, completed FROM rounds WHERE tournament_id = ?", (tid,)
+            ):
+                rounds[round_num] = {
+                    'matches': templates.get(template, []),
+                    'completed': bool(completed)
+                }
+
+            match_results = {
+                match_id: {'home_score': home_score, 'away_score': away_score}
+                for match_id, home_score, away_score in self._conn.execute(
+                    "SELECT match_id, home_score, away_score FROM results WHERE tournament_id = ?", (tid,)
+                )
+            }
+
+        current_round, total_rounds, started, finished = meta
+        return {
+            'teams': teams,
+            'rounds': rounds,
+            'current_round': current_round,
+            'total_rounds': total_rounds,
+            'match_results': match_results,
+            'tournament_finished': bool(finished),
+            'tournament_started': bool(started)
+        }
+
+    def save_state(self, state: Dict) -> None:
+        """Replace the whole stored tournament (structural changes only)"""
+        tid = self.tournament_id
+        with self._transaction() as conn:
+            for table in ("teams", "fixtures", "rounds", "results"):
+                conn.execute(f"DELETE FROM {table} WHERE tournament_id = ?", (tid,))
+            self._write_meta(conn, state)
+
+            _write(
+                conn,
+                "INSERT INTO teams (tournament_id, position, name) VALUES (?, ?, ?)",
+                [(tid, position, name) for position, name in enumerate(state.get('teams', []))]
+            )
+
+            templates: Dict[Tuple, int] = {}
+            for round_num, round_data in state.get('rounds', {}).items():
+                matches = tuple(tuple(match) for match in round_data['matches'])
+                template = templates.get(matches)
+                if template is None:
+                    template = templates[matches] = len(templates)
+                    _write(
+                        conn,
+                        "INSERT INTO fixtures (tournament_id, template, position, home, away) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [(tid, template, position, home, away) for position, (home, away) in enumerate(matches)]
+                    )
+                _write(
+                    conn,
+                    "INSERT INTO rounds (tournament_id, round_num, template, completed) VALUES (?, ?, ?, ?)",
+                    [(tid, int(round_num), template, int(bool(round_data.get('completed'))))]
+                )
+
+            _write(
+                conn,
+                "INSERT INTO results (tournament_id, match_id, home_score, away_score) VALUES (?, ?, ?, ?)",
+                [(tid, match_id, result['home_score'], result['away_score'])
+                 for match_id, result in state.get('match_results', {}).items()]
+            )
+
+    def save_meta(self, state: Dict) -> None:
+        """Persist round counters and tournament flags"""
+        with self._transaction() as conn:
+            self._write_meta(conn, state)
+
+    def _write_meta(self, conn: sqlite3.Connection, state: Dict) -> None:
+        _write(
+            conn,
+            "INSERT INTO tournaments (id, current_round, total_rounds, tournament_started, tournament_finished) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET current_round = excluded.current_round, "
+            "total_rounds = excluded.total_rounds, tournament_started = excluded.tournament_started, "
+            "tournament_finished = excluded.tournament_finished",
+            [(
+                self.tournament_id,
+                state.get('current_round', 1),
+                state.get('total_rounds', 0),
+                int(bool(state.get('tournament_started'))),
+                int(bool(state.get('tournament_finished')))
+            )]
+        )
+
+    def add_team(self, position: int, name: str) -> None:
+        """Append a single team"""
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO tournaments (id) VALUES (?)", (self.tournament_id,))
+            _write(
+                conn,
+                "INSERT OR REPLACE INTO teams (tournament_id, position, name) VALUES (?, ?, ?)",
+                [(self.tournament_id, position, name)]
+            )
+
+    def set_round_completed(self, round_num: int, completed: bool = True) -> None:
+        """Update the completed flag of a single round"""
+        with self._transaction() as conn:
+            _write(
+                conn,
+                "UPDATE rounds SET completed = ? WHERE tournament_id = ? AND round_num = ?",
+                [(int(completed), self.tournament_id, round_num)]
+            )
+
+    def add_rounds(self, round_nums: List[int], matches: List[Tuple[str, str]], total_rounds: int) -> None:
+        """Append rounds sharing one fixture list, reusing a stored template if identical"""
+        tid = self.tournament_id
+        matches = [tuple(match) for match in matches]
+        with self._transaction() as conn:
+            templates: Dict[int, List[Tuple[str, str]]] = {}
+            for template, home, away in conn.execute(
+                "SELECT template, home, away FROM fixtures WHERE tournament_id = ? "
+                "ORDER BY template, position", (tid,)
+            ):
+                templates.setdefault(template, []).append((home, away))
+
+            template = next((t for t, stored in templates.items() if stored == matches), None)
+            if template is None:
+                template = max(templates, default=-1) + 1
+                _write(
+                    conn,
+                    "INSERT INTO fixtures (tournament_id, template, position, home, away) VALUES (?, ?, ?, ?, ?)",
+                    [(tid, template, position, home, away) for position, (home, away) in enumerate(matches)]
+                )
+            _write(
+                conn,
+                "INSERT OR REPLACE INTO rounds (tournament_id, round_num, template, completed) VALUES (?, ?, ?, 0)",
+                [(tid, round_num, template) for round_num in round_nums]
+            )
+            _write(conn, "UPDATE tournaments SET total_rounds = ? WHERE id = ?", [(total_rounds, tid)])
+
+    def upsert_result(self, match_id: str, home_score: int, away_score: int) -> None:
+        """Insert or overwrite a single match result"""
+        with self._transaction() as conn:
+            _write(
+                conn,
+                "INSERT INTO results (tournament_id, match_id, home_score, away_score) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(tournament_id, match_id) DO UPDATE SET "
+                "home_score = excluded.home_score, away_score = excluded.away_score",
+                [(self.tournament_id, match_id, home_score, away_score)]
+            )
+
+    def upsert_results(self, results: List[Tuple[str, int, int]]) -> None:
+        """Insert or overwrite several match results in one transaction"""
+        with self._transaction() as conn:
+            _write(
+                conn,
+                "INSERT INTO results (tournament_id, match_id, home_score, away_score) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(tournament_id, match_id) DO UPDATE SET "
+                "home_score = excluded.home_score, away_score = excluded.away_score",
+                [(self.tournament_id, match_id, home_score, away_score) for match_id, home_score, away_score in results]
+            )
+
+    def batch(self):
+        """Group several operations into a single transaction"""
+        return self._transaction()
+
+    def flush(self) -> None:
+        """Nothing to do, every write is committed immediately"""
+
+    def migrate_json(self, json_file: Path) -> bool:
+        """One-shot import of a legacy JSON data file
+
+        The JSON file is renamed to ``*.migrated`` afterwards so the import
+        never runs twice.
+        """
+        json_file = Path(json_file)
+        if not json_file.exists() or self.exists():
+            return False
+
+        with open(json_file, 'r') as f:
+            data = json.load(f)
+        self.save_state(data)
+        json_file.rename(json_file.with_suffix(json_file.suffix + ".migrated"))
+        logger.info(f"Migrated {json_file} into {self.db_path} as tournament '{self.tournament_id}'")
+        return True
+
+
+class _Transaction:
+    """BEGIN/COMMIT wrapper holding the storage lock
+
+    Nested use (inside batch()) becomes a savepoint so a failing operation
+    does not roll back the rest of the batch.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self._conn = conn
+        self._lock = lock
+        self._nested = False
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._lock.acquire()
+        self._nested = self._conn.in_transaction
+        # IMMEDIATE takes the write lock up front, so with several worker
+        # processes on one file a read-then-write transaction waits for the
+        # lock instead of failing with SQLITE_BUSY
+        self._conn.execute("SAVEPOINT nested" if self._nested else "BEGIN IMMEDIATE")
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if self._nested:
+                if exc_type:
+                    self._conn.execute("ROLLBACK TO nested")
+                self._conn.execute("RELEASE nested")
+            else:
+                self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._lock.release()
+
+
+class UserDataStorage:
+    """Per-user conversation state, one JSON encoded row per chat the user has state in
+
+    Shares the connection of the tournament database file.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn, self._lock = _connect(self.db_path)
+
+    def load_user(self, user_id: int) -> Dict[str, str]:
+        """Stored keys of one user with their JSON encoded values"""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT key, value FROM user_data WHERE user_id = ?", (user_id,)
+            ))
+
+    def write_keys(self, changes: List[Tuple[int, str, Optional[str]]]) -> None:
+        """Upsert (user_id, key, value) rows, a value of None deletes the key"""
+        with self._transaction() as conn:
+            _write(
+                conn,
+                "INSERT INTO user_data (user_id, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id, key) DO UPDATE SET value = excluded.value",
+                [change for change in changes if change[2] is not None]
+            )
+            conn.executemany(
+                "DELETE FROM user_data WHERE user_id = ? AND key = ?",
+                [(user_id, key) for user_id, key, value in changes if value is None]
+            )
+
+    def drop_user(self, user_id: int) -> None:
+        """Delete all stored state of one user"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM user_data WHERE user_id = ?", (user_id,))
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def batch(self):
+        """Group several operations into a single transaction"""
+        return self._transaction()
+
+    def flush(self) -> None:
+        """Nothing to do, every write is committed immediately"""
+
+
+def open_storage(tournament_id: str = "default"):
+    """Open the storage backend selected by settings.storage_backend"""
+    if settings.storage_backend == "journal":
+        from bot.database.journal import JournalStorage
+        return JournalStorage(settings.data_dir / "journal" / tournament_id)
+    return TournamentStorage(settings.data_dir / settings.database_file, tournament_id)
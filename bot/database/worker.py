@@ -0,0 +1,168 @@
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+from bot.config.settings import settings
+from bot.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Operations where only the latest call matters, keyed by these leading args
+_SUPERSEDING_OPS = {'save_meta': 0, 'upsert_result': 1}
+
+
+def coalesce(batch: List[Tuple[Any, str, tuple]]) -> List[Tuple[Any, str, tuple]]:
+    """Drop storage operations made redundant by later ones in the same batch"""
+    pending: "OrderedDict[tuple, Tuple[Any, str, tuple]]" = OrderedDict()
+    for seq, (storage, operation, args) in enumerate(batch):
+        if operation == 'save_state':
+            # A full rewrite makes every earlier operation on this storage redundant
+            for key in [k for k, item in pending.items() if item[0] is storage]:
+                del pending[key]
+            key = (id(storage), operation, seq)
+        elif operation in _SUPERSEDING_OPS:
+            key = (id(storage), operation) + args[:_SUPERSEDING_OPS[operation]]
+            pending.pop(key, None)
+        else:
+            key = (id(storage), operation, seq)
+        pending[key] = (storage, operation, args)
+    return list(pending.values())
+
+
+class PersistenceWorker:
+    """Background thread applying storage operations off the event loop
+
+    Handlers mutate the in-memory tournament and enqueue the matching
+    storage operation. The worker waits for the coalescing window after the
+    first pending operation, then writes the whole burst in one batch per
+    storage (one SQLite transaction or one journal fsync).
+    """
+
+    def __init__(self, window: float = 0.5):
+        self.window = window
+        self._queue: List[Tuple[Any, str, tuple]] = []
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopping = False
+
+        self.last_flush_latency: float = 0.0
+        self.last_batch_size: int = 0
+        self.flushes: int = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def pending(self) -> int:
+        """Number of operations not yet written"""
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    def start(self) -> None:
+        """Start the worker thread"""
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="persistence-worker", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"Persistence worker started (window={self.window}s)")
+
+    def submit(self, storage: Any, operation: str, *args) -> None:
+        """Queue a storage operation"""
+        with self._cond:
+            self._queue.append((storage, operation, args))
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Write everything pending now and wait for it, returns False on timeout"""
+        with self._cond:
+            if not self._queue and not self._in_flight:
+                return True
+        self._wake.set()
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._in_flight, timeout)
+
+    def stop(self) -> None:
+        """Flush pending writes and stop the worker"""
+        if not self.running:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        logger.info("Persistence worker stopped")
+
+    def stats(self) -> Dict[str, float]:
+        """Current queue depth and last flush figures"""
+        return {
+            'pending': self.pending,
+            'last_flush_latency': self.last_flush_latency,
+            'last_batch_size': self.last_batch_size,
+            'flushes': self.flushes
+        }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._stopping)
+                if not self._queue and self._stopping:
+                    return
+
+            if not self._stopping:
+                self._wake.wait(self.window)
+            self._wake.clear()
+
+            with self._cond:
+                batch, self._queue = self._queue, []
+                self._in_flight = len(batch)
+            try:
+                self._write(batch)
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+    def _write(self, batch: List[Tuple[Any, str, tuple]]) -> None:
+        started = time.perf_counter()
+        operations = coalesce(batch)
+
+        by_storage: "OrderedDict[int, List[Tuple[Any, str, tuple]]]" = OrderedDict()
+        for item in operations:
+            by_storage.setdefault(id(item[0]), []).append(item)
+
+        for items in by_storage.values():
+            storage = items[0][0]
+            try:
+                with storage.batch():
+                    for _, operation, args in items:
+                        try:
+                            with metrics.timer('persist_operation_seconds', operation=operation):
+                                getattr(storage, operation)(*args)
+                        except Exception as e:
+                            logger.error(f"Failed to persist tournament data ({operation}): {e}")
+                storage.flush()
+            except Exception as e:
+                logger.error(f"Failed to write persistence batch: {e}")
+
+        self.last_flush_latency = time.perf_counter() - started
+        self.last_batch_size = len(batch)
+        self.flushes += 1
+        metrics.observe('persist_batch_seconds', self.last_flush_latency)
+        metrics.inc('persist_operations_total', len(operations))
+        metrics.inc('persist_operations_coalesced_total', len(batch) - len(operations))
+        logger.debug(
+            f"Persisted {len(operations)}/{len(batch)} operations in "
+            f"{self.last_flush_latency * 1000:.1f}ms"
+        )
+
+
+# Global persistence worker, started by main.py
+persistence = PersistenceWorker(settings.persist_coalesce_window)
@@ -1,13 +1,13 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from bot.models.tournament import tournament
+from bot.config.settings import settings
+from bot.models.registry import get_tournament, writes_tournament, tournaments
+from bot.utils.callback_data import decode_callback
 from bot.utils.keyboards import Keyboards
-from bot.handlers.matches import (
-    setup_tournament, start_tournament_setup, add_rounds_setup,
-    enter_results, finalize_tournament
-)
-from bot.handlers.statistics import view_tournament_table, view_detailed_stats
-from bot.handlers.matches import view_current_round
+from bot.handlers.router import callback_routes
+# Handler modules register their callback routes on import
+from bot.handlers import statistics  # noqa: F401
+from bot.handlers.matches import setup_tournament, results_keyboard, view_current_round
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,45 +19,15 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await query.answer()
     
     data = query.data
+    action, args = decode_callback(data)
     user_id = update.effective_user.id
     logger.info(f"User {user_id} clicked button: {data}")
     
     try:
-        if data == "add_team":
-            await handle_add_team(query, context)
-        elif data == "clear_teams":
-            await handle_clear_teams(query, context)
-        elif data == "start_tournament":
-            await start_tournament_setup(query, context)
-        elif data == "add_rounds":
-            await add_rounds_setup(query, context)
-        elif data.startswith("rounds_"):
-            await handle_rounds_selection(query, context, data)
-        elif data.startswith("add_rounds_"):
-            await handle_add_rounds_selection(query, context, data)
-        elif data.startswith("finish_round_"):
-            await handle_finish_round(query, context, data)
-        elif data == "enter_results":
-            await enter_results(query, context)
-        elif data == "advance_round":
-            await handle_advance_round(query, context)
-        elif data == "finish_tournament":
-            await handle_finish_tournament(query, context)
-        elif data == "force_finish":
-            await finalize_tournament(query, context)
-        elif data == "view_table":
-            await view_tournament_table(query, context)
-        elif data == "detailed_stats":
-            await view_detailed_stats(query, context)
-        elif data == "view_current_round":
-            await view_current_round(query, context)
-        elif data.startswith("view_round_"):
-            await handle_view_round(query, context, data)
-        elif data.startswith("result_"):
-            await handle_result_input(query, context, data)
-        elif data == "cancel":
-            await handle_cancel(query, context)
-        else:
+        # Cold tournaments are loaded off the event loop before any handler runs
+        await tournaments.load(update.effective_chat.id)
+        
+        if not await callback_routes.dispatch(action, query, context, *args):
             logger.warning(f"Unknown callback data: {data}")
             
     except Exception as e:
@@ -65,6 +35,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await query.edit_message_text("❌ An error occurred. Please try again.")
 
 
+@callback_routes.route("add_team")
 async def handle_add_team(query, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle add team button"""
     await query.edit_message_text(
@@ -74,19 +45,24 @@ async def handle_add_team(query, context: ContextTypes.DEFAULT_TYPE) -> None:
     context.user_data['waiting_for'] = 'team_name'
 
 
+@callback_routes.route("clear_teams")
+@writes_tournament
 async def handle_clear_teams(query, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle clear teams button"""
-    tournament.teams = []
-    tournament.reset_tournament()
+    tournament = get_tournament(query)
+    tournament.clear_teams()
     await query.edit_message_text("🗑️ All teams cleared and tournament reset!")
     await setup_tournament(query, context)
 
 
+@callback_routes.route("rounds_", prefix=True)
+@writes_tournament
 async def handle_rounds_selection(query, context: ContextTypes.DEFAULT_TYPE, data: str) -> None:
     """Handle rounds selection"""
+    tournament = get_tournament(query)
     if data == "rounds_custom":
         await query.edit_message_text(
-            f"Please enter the number of rounds (1-{tournament.config.max_rounds}):",
+            f"Please enter the number of rounds (1-{settings.max_rounds}):",
             reply_markup=Keyboards.cancel()
         )
         context.user_data['waiting_for'] = 'custom_rounds'
@@ -104,11 +80,14 @@ async def handle_rounds_selection(query, context: ContextTypes.DEFAULT_TYPE, dat
             await query.edit_message_text("❌ Failed to create tournament!")
 
 
+@callback_routes.route("add_rounds_", prefix=True)
+@writes_tournament
 async def handle_add_rounds_selection(query, context: ContextTypes.DEFAULT_TYPE, data: str) -> None:
     """Handle add rounds selection"""
+    tournament = get_tournament(query)
     if data == "add_rounds_custom":
         await query.edit_message_text(
-            f"Please enter the number of additional rounds (1-{tournament.config.max_additional_rounds}):",
+            f"Please enter the number of additional rounds (1-{settings.max_additional_rounds}):",
             reply_markup=Keyboards.cancel()
         )
         context.user_data['waiting_for'] = 'custom_add_rounds'
@@ -125,8 +104,11 @@ async def handle_add_rounds_selection(query, context: ContextTypes.DEFAULT_TYPE,
             await query.edit_message_text("❌ Failed to add rounds!")
 
 
+@callback_routes.route("finish_round_", prefix=True)
+@writes_tournament
 async def handle_finish_round(query, context: ContextTypes.DEFAULT_TYPE, data: str) -> None:
     """Handle finish round button"""
+    tournament = get_tournament(query)
     round_num = int(data.split("_")[2])
     if tournament.is_round_complete(round_num):
         tournament.complete_round(round_num)
@@ -135,47 +117,91 @@ async def handle_finish_round(query, context: ContextTypes.DEFAULT_TYPE, data: s
         await query.edit_message_text(f"❌ Cannot finish Round {round_num} - not all matches completed!")
 
 
+@callback_routes.route("advance_round")
+@writes_tournament
 async def handle_advance_round(query, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle advance round button"""
+    tournament = get_tournament(query)
     if tournament.advance_to_next_round():
         await query.edit_message_text(f"🔄 Advanced to Round {tournament.current_round}!")
     else:
         await query.edit_message_text("❌ Cannot advance to next round!")
 
 
+@callback_routes.route("finish_tournament")
 async def handle_finish_tournament(query, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle finish tournament button"""
     from bot.handlers.matches import finish_tournament_command
     await finish_tournament_command(query, context)
 
 
+@callback_routes.route("view_round_", prefix=True)
 async def handle_view_round(query, context: ContextTypes.DEFAULT_TYPE, data: str) -> None:
     """Handle view round button"""
     round_num = int(data.split("_")[2])
-    old_round = tournament.current_round
-    tournament.current_round = round_num
-    await view_current_round(query, context)
-    tournament.current_round = old_round  # Restore current round
+    await view_current_round(query, context, round_num)
 
 
-async def handle_result_input(query, context: ContextTypes.DEFAULT_TYPE, data: str) -> None:
+@callback_routes.route("result")
+async def handle_result_input(query, context: ContextTypes.DEFAULT_TYPE, round_num: int, fixture: int) -> None:
     """Handle result input button"""
-    match_id = data[7:]  # Remove "result_" prefix
+    tournament = get_tournament(query)
+    match = tournament.match_at(round_num, fixture)
+    if match is None:
+        await query.edit_message_text("❌ Unknown match! Please select it again from Enter Results.")
+        return
+    
+    match_id, home_team, away_team = match
     context.user_data['current_match'] = match_id
     context.user_data['waiting_for'] = 'match_result'
     
-    # Parse match info
-    parts = match_id.split("_")
-    round_num = parts[0][1:]  # Remove 'R'
-    home_team = parts[1]
-    away_team = parts[3]
-    
     await query.edit_message_text(
         f"🏆 **Enter Result**\n\n**Round {round_num}**\n{home_team} vs {away_team}\n\nPlease enter the result in format: home_score-away_score\nExample: 2-1",
         reply_markup=Keyboards.cancel()
     )
 
 
+@callback_routes.route("results_page")
+async def handle_results_page(query, context: ContextTypes.DEFAULT_TYPE, round_num: int, page: int, pending_only: bool) -> None:
+    """Handle results keyboard page and filter buttons"""
+    tournament = get_tournament(query)
+    if round_num not in tournament.rounds:
+        await query.edit_message_text("❌ No matches for this round.")
+        return
+    
+    context.user_data['results_page'] = (page, pending_only)
+    await query.edit_message_reply_markup(
+        reply_markup=results_keyboard(tournament, round_num, page, pending_only)
+    )
+
+
+@callback_routes.route("bulk_results")
+async def handle_bulk_results(query, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle bulk result entry button"""
+    tournament = get_tournament(query)
+    if not tournament.tournament_started or tournament.current_round not in tournament.rounds:
+        await query.edit_message_text("❌ No matches for current round.")
+        return
+    
+    context.user_data['waiting_for'] = 'bulk_results'
+    context.user_data['bulk_round'] = tournament.current_round
+    await query.edit_message_text(
+        f"📝 **Bulk Entry - Round {tournament.current_round}**\n\n"
+        "Send all results in one message, one per line, either by team names or by match number:\n"
+        "`Home Team 2-1 Away Team`\n"
+        "`12 2-1`\n\n"
+        "Nothing is saved unless every line is valid.",
+        reply_markup=Keyboards.cancel(),
+        parse_mode='Markdown'
+    )
+
+
+@callback_routes.route("noop")
+async def handle_noop(query, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle buttons that only display information"""
+
+
+@callback_routes.route("cancel")
 async def handle_cancel(query, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle cancel button"""
     context.user_data.clear()
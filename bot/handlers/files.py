@@ -0,0 +1,90 @@
+import csv
+import tempfile
+from telegram import Update
+from telegram.ext import ContextTypes
+from bot.config.settings import settings
+from bot.models.registry import get_tournament, tournaments, writes_tournament
+from bot.utils.tabular import (
+    FIXTURE_FIELDS, FORMATS, SPOOL_BYTES, TABLE_FIELDS,
+    iter_fixtures, iter_table, parse_fixture_rows, read_rows, write_rows
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORTS = {
+    'fixtures': (FIXTURE_FIELDS, lambda tournament: iter_fixtures(tournament)),
+    'results': (FIXTURE_FIELDS, lambda tournament: iter_fixtures(tournament, played_only=True)),
+    'table': (TABLE_FIELDS, iter_table),
+}
+
+
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Send fixtures, results or the table as a CSV/JSONL document"""
+    args = [arg.lower() for arg in (context.args or [])]
+    kind = args[0] if args else 'results'
+    fmt = args[1] if len(args) > 1 else 'csv'
+    if kind not in EXPORTS or fmt not in FORMATS:
+        await update.message.reply_text(
+            f"Usage: /export [{'|'.join(EXPORTS)}] [{'|'.join(FORMATS)}]\nExample: /export results csv"
+        )
+        return
+    
+    await tournaments.load(update.effective_chat.id)
+    tournament = get_tournament(update)
+    fields, rows = EXPORTS[kind]
+    with write_rows(rows(tournament), fields, fmt) as document:
+        await update.message.reply_document(document=document, filename=f"{kind}.{fmt}")
+
+
+@writes_tournament
+async def handle_import_document(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Import teams and results from an uploaded fixtures/results file"""
+    document = update.message.document
+    name = document.file_name or ""
+    fmt = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if fmt not in FORMATS:
+        await update.message.reply_text(f"❌ Nothing imported: send a .{' or .'.join(FORMATS)} file")
+        return
+    await tournaments.load(update.effective_chat.id)
+    tournament = get_tournament(update)
+    
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as buffer:
+        telegram_file = await document.get_file()
+        await telegram_file.download_to_memory(out=buffer)
+        buffer.seek(0)
+        try:
+            teams, num_rounds, results, errors = parse_fixture_rows(read_rows(buffer, fmt))
+        except (UnicodeDecodeError, csv.Error) as e:
+            logger.info(f"Unreadable import file {name}: {e}")
+            await update.message.reply_text(f"❌ Nothing imported: {name} is not a UTF-8 text file in {fmt.upper()} format")
+            return
+    
+    if errors:
+        if len(errors) > 20:
+            errors = errors[:20] + [f"...and {len(errors) - 20} more"]
+        await update.message.reply_text("❌ Nothing imported:\n" + "\n".join(errors))
+        return
+    
+    if tournament.tournament_started:
+        # Results for the running tournament, all fixtures must already exist
+        match_ids = [(tournament.find_match(r, home, away), hs, as_) for r, home, away, hs, as_ in results]
+        if not results or not tournament.record_results(match_ids):
+            await update.message.reply_text(
+                "❌ Nothing imported: the file has no results or some of them are not fixtures of this tournament."
+            )
+            return
+        await update.message.reply_text(f"✅ Imported {len(results)} results")
+        return
+    
+    if not tournament.load_season(teams, num_rounds, results):
+        await update.message.reply_text(
+            f"❌ Nothing imported: a season needs 2 to {settings.max_teams} teams and "
+            f"1 to {settings.max_rounds + settings.max_additional_rounds} rounds."
+        )
+        return
+    await update.message.reply_text(
+        f"✅ Imported {len(teams)} teams, {num_rounds} rounds and {len(results)} results\n"
+        f"**Current Round:** {tournament.current_round}",
+        parse_mode='Markdown'
+    )
@@ -1,15 +1,20 @@
-from telegram import Update
+from typing import Optional
+from telegram import InlineKeyboardButton, Update
 from telegram.ext import ContextTypes
-from bot.models.tournament import tournament
+from bot.config.settings import settings
+from bot.handlers.router import callback_routes, text_routes
+from bot.models.registry import get_tournament, writes_tournament
+from bot.utils.cache import render_cache
 from bot.utils.keyboards import Keyboards
-from bot.utils.helpers import calculate_team_statistics
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@text_routes.route("⚽ Setup Tournament", "Setup Tournament")
 async def setup_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Setup tournament by adding teams"""
+    tournament = get_tournament(update)
     teams_text = "**Current Teams:**\n"
     if tournament.teams:
         for i, team in enumerate(tournament.teams, 1):
@@ -30,8 +35,11 @@ async def setup_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     )
 
 
+@text_routes.route("🎯 Start Tournament", "Start Tournament")
+@callback_routes.route("start_tournament")
 async def start_tournament_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Start tournament setup with round selection"""
+    tournament = get_tournament(update)
     if len(tournament.teams) < 2:
         await update.message.reply_text("❌ Need at least 2 teams to start tournament!")
         return
@@ -61,8 +69,11 @@ Each round will contain ALL possible matches:
     )
 
 
+@text_routes.route("➕ Add Rounds", "Add Rounds")
+@callback_routes.route("add_rounds")
 async def add_rounds_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Setup for adding additional rounds"""
+    tournament = get_tournament(update)
     if not tournament.tournament_started:
         await update.message.reply_text("❌ No tournament started yet! Start a tournament first.")
         return
@@ -90,52 +101,63 @@ How many rounds would you like to add?
     )
 
 
-async def view_current_round(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """View current round matches and status"""
+@text_routes.route("📅 View Round", "View Round")
+@callback_routes.route("view_current_round")
+async def view_current_round(update: Update, context: ContextTypes.DEFAULT_TYPE, round_num: Optional[int] = None) -> None:
+    """View matches and status of a round (the current round by default)"""
+    tournament = get_tournament(update)
     if not tournament.tournament_started:
         await update.message.reply_text("❌ No tournament started yet. Please start a tournament first.")
         return
     
-    current_round = tournament.current_round
+    current_round = round_num if round_num is not None else tournament.current_round
     if current_round not in tournament.rounds:
         await update.message.reply_text("❌ No matches for current round.")
         return
     
+    round_text, reply_markup = render_cache.get_or_render(
+        tournament, 'round', lambda: render_round(tournament, current_round), current_round
+    )
+    
+    await update.message.reply_text(round_text, reply_markup=reply_markup, parse_mode='Markdown')
+
+
+def render_round(tournament, current_round: int) -> tuple:
+    """Build round view text and navigation keyboard"""
     matches = tournament.rounds[current_round]['matches']
     round_complete = tournament.is_round_complete(current_round)
     round_marked_complete = tournament.rounds[current_round]['completed']
     
-    round_text = f"📅 **Round {current_round} of {tournament.total_rounds}**\n"
+    lines = [f"📅 **Round {current_round} of {tournament.total_rounds}**"]
     
     if round_marked_complete:
-        round_text += f"**Status:** ✅ Completed\n\n"
+        lines.append("**Status:** ✅ Completed\n")
     elif round_complete:
-        round_text += f"**Status:** 🎯 Ready to Finish\n\n"
+        lines.append("**Status:** 🎯 Ready to Finish\n")
     else:
-        round_text += f"**Status:** ⏳ In Progress\n\n"
+        lines.append("**Status:** ⏳ In Progress\n")
     
     completed_matches = 0
-    for i, (home, away) in enumerate(matches, 1):
-        match_id = tournament.create_match_id(current_round, home, away)
-        result = tournament.match_results.get(match_id, {})
-        
+    for i, ((home, away), result) in enumerate(zip(matches, tournament.round_results(current_round)), 1):
         if result:
-            round_text += f"{i}. {home} {result['home_score']}-{result['away_score']} {away} ✅\n"
+            lines.append(f"{i}. {home} {result['home_score']}-{result['away_score']} {away} ✅")
             completed_matches += 1
         else:
-            round_text += f"{i}. {home} vs {away} ⏳\n"
+            lines.append(f"{i}. {home} vs {away} ⏳")
     
-    round_text += f"\n**Progress:** {completed_matches}/{len(matches)} matches completed"
+    lines.append(f"\n**Progress:** {completed_matches}/{len(matches)} matches completed")
     
     reply_markup = Keyboards.round_navigation(
         current_round, tournament.total_rounds, round_complete, round_marked_complete
     )
-    
-    await update.message.reply_text(round_text, reply_markup=reply_markup, parse_mode='Markdown')
+    return "\n".join(lines), reply_markup
 
 
-async def enter_results(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+@text_routes.route("🏆 Enter Results", "Enter Results")
+@callback_routes.route("enter_results")
+async def enter_results(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int = 0, pending_only: bool = False) -> None:
     """Enter match results for current round"""
+    tournament = get_tournament(update)
     if not tournament.tournament_started:
         await update.message.reply_text("❌ No tournament started yet.")
         return
@@ -145,22 +167,18 @@ async def enter_results(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await update.message.reply_text("❌ No matches for current round.")
         return
     
-    matches = tournament.rounds[current_round]['matches']
-    
-    # Add Finish Round button if all matches are completed
     round_complete = tournament.is_round_complete(current_round)
     round_marked_complete = tournament.rounds[current_round]['completed']
     
     status_text = ""
-    additional_buttons = []
     if round_complete and not round_marked_complete:
         status_text = "\n\n✅ **All matches completed! You can now finish this round.**"
-        # Add finish round button to keyboard
-        additional_buttons.append([{"text": "🏁 Finish Round", "callback_data": f"finish_round_{current_round}"}])
     elif round_marked_complete:
         status_text = "\n\n🎯 **Round completed and finished!**"
 
-    reply_markup = Keyboards.match_results(matches, current_round, tournament.match_results, additional_buttons)
+    reply_markup = results_keyboard(tournament, current_round, page, pending_only)
+    # Remembered so entering a score returns to the same page
+    context.user_data['results_page'] = (page, pending_only)
     
     await update.message.reply_text(
         f"🏆 **Enter Results - Round {current_round}**\n\nSelect a match to enter/edit the result:{status_text}",
@@ -169,8 +187,32 @@ async def enter_results(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     )
 
 
+def results_keyboard(tournament, round_num: int, page: int = 0, pending_only: bool = False):
+    """One page of a round's results keyboard, cached until a result on that page changes"""
+    def render():
+        additional_buttons = []
+        if tournament.is_round_complete(round_num) and not tournament.rounds[round_num]['completed']:
+            # Add finish round button to keyboard
+            additional_buttons.append([InlineKeyboardButton("🏁 Finish Round", callback_data=f"finish_round_{round_num}")])
+        return Keyboards.match_results(
+            tournament.rounds[round_num]['matches'], round_num, tournament.round_results(round_num), additional_buttons,
+            page=page, page_size=settings.results_page_size, pending_only=pending_only
+        )
+    
+    if pending_only:
+        # Pages of pending matches shift whenever one is played
+        version = tournament.results_version(round_num)
+    else:
+        page_size = settings.results_page_size
+        pages = max(1, -(-len(tournament.rounds[round_num]['matches']) // page_size))
+        page = min(max(page, 0), pages - 1)
+        version = tournament.results_version(round_num, range(page * page_size, (page + 1) * page_size))
+    return render_cache.get_or_render(tournament, 'results_page', render, round_num, page, pending_only, version=version)
+
+
 async def finish_tournament_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Finish the tournament"""
+    tournament = get_tournament(update)
     if tournament.tournament_finished:
         await update.message.reply_text("🏁 Tournament is already finished!")
         return
@@ -201,15 +243,14 @@ async def finish_tournament_command(update: Update, context: ContextTypes.DEFAUL
         await finalize_tournament(update, context)
 
 
+@callback_routes.route("force_finish")
+@writes_tournament
 async def finalize_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Finalize tournament and show results"""
+    tournament = get_tournament(update)
     tournament.finish_tournament()
-    teams_stats = calculate_team_statistics(tournament.teams, tournament.match_results)
-    sorted_teams = sorted(
-        teams_stats.items(),
-        key=lambda x: (x[1]['points'], x[1]['goal_difference'], x[1]['goals_for']),
-        reverse=True
-    )
+    teams_stats = tournament.get_team_statistics()
+    sorted_teams = tournament.get_ranked_standings()
     
     finish_text = "🏁 **Tournament Finished!**\n\n"
     
@@ -223,7 +264,7 @@ async def finalize_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE
             finish_text += f"🥉 **Third Place:** {sorted_teams[2][0]} ({sorted_teams[2][1]['points']} pts)\n"
         
         # Tournament statistics
-        total_goals = sum(stats['goals_for'] for stats in teams_stats.values()) // 2
+        total_goals = sum(stats['goals_for'] for stats in teams_stats.values())
         total_matches = sum(stats['played'] for stats in teams_stats.values()) // 2
         
         finish_text += f"\n📊 **Tournament Statistics:**\n"
@@ -236,8 +277,16 @@ async def finalize_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE
     await update.message.reply_text(finish_text, parse_mode='Markdown')
 
 
+@text_routes.route("ℹ️ Tournament Info", "Tournament Info")
 async def tournament_info(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Display comprehensive tournament information"""
+    tournament = get_tournament(update)
+    info_text = render_cache.get_or_render(tournament, 'info', lambda: render_tournament_info(tournament))
+    await update.message.reply_text(info_text, parse_mode='Markdown')
+
+
+def render_tournament_info(tournament) -> str:
+    """Build tournament information text"""
     info_text = f"""
 ℹ️ **Tournament Information**
 
@@ -267,4 +316,4 @@ async def tournament_info(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         info_text += f"• Completed Matches: {progress['completed_matches']}/{progress['total_matches']}\n"
         info_text += f"• Current Round Complete: {'Yes' if progress['current_round_complete'] else 'No'}\n"
     
-    await update.message.reply_text(info_text, parse_mode='Markdown')
+    return info_text
@@ -0,0 +1,116 @@
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from bot.utils.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class Route:
+    """A registered handler with its invocation metrics"""
+
+    def __init__(self, name: str, handler: Callable[..., Awaitable], prefix: bool = False):
+        self.name = name
+        self.handler = handler
+        self.prefix = prefix
+        self.count = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+    def stats(self) -> Dict:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'latency_sum': self.latency.total,
+            'latency_p50': self.latency.quantile(0.5),
+            'latency_p95': self.latency.quantile(0.95),
+            'latency_buckets': dict(zip(self.latency.buckets + (float('inf'),), self.latency.counts))
+        }
+
+
+class Router:
+    """Dispatch table of exact keys plus a prefix trie
+
+    Exact keys are looked up in a dict; otherwise the longest registered
+    prefix matching the key wins. Prefix handlers receive the full key as
+    their last argument.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._exact: Dict[str, Route] = {}
+        self._trie: Dict = {}
+
+    def route(self, *keys: str, prefix: bool = False) -> Callable:
+        """Register the decorated handler under one or more keys"""
+        def decorator(handler: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+            for key in keys:
+                self.add(key, handler, prefix)
+            return handler
+        return decorator
+
+    def add(self, key: str, handler: Callable[..., Awaitable], prefix: bool = False) -> Route:
+        route = Route(key, handler, prefix)
+        if prefix:
+            node = self._trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[None] = route
+        else:
+            self._exact[key] = route
+        return route
+
+    def resolve(self, key: str) -> Optional[Route]:
+        """Find the route for a key, exact matches first"""
+        route = self._exact.get(key)
+        if route is not None:
+            return route
+
+        node = self._trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                break
+            route = node.get(None, route)
+        return route
+
+    async def dispatch(self, key: str, update, context, *args) -> bool:
+        """Run the handler routed for key, returns False if there is none"""
+        route = self.resolve(key)
+        if route is None:
+            return False
+        if route.prefix:
+            args += (key,)
+
+        route.count += 1
+        started = time.perf_counter()
+        try:
+            await route.handler(update, context, *args)
+        except Exception:
+            route.errors += 1
+            raise
+        finally:
+            route.latency.observe(time.perf_counter() - started)
+        return True
+
+    def routes(self) -> List[Route]:
+        routes = list(self._exact.values())
+        stack = [self._trie]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char is None:
+                    routes.append(child)
+                else:
+                    stack.append(child)
+        return routes
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-route metrics of routes that have been hit"""
+        return {route.name: route.stats() for route in self.routes() if route.count}
+
+
+# Global routers for inline buttons, menu texts and awaited user input
+callback_routes = Router("callback")
+text_routes = Router("text")
+input_routes = Router("input")
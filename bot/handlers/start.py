@@ -38,6 +38,15 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 ℹ️ **Tournament Info** - View status
 🔄 **Reset Tournament** - Start over
 
+**Import & Export:**
+/export results csv - Download fixtures, results or table (csv or jsonl)
+Send a fixtures/results .csv or .jsonl file to import teams and scores
+
+**History:**
+/alltime - All-time table of finished tournaments
+/alltime Team A - One team's record season by season
+/alltime Team A vs Team B - Head-to-head history
+
 Ready to manage your professional tournament!
     """
     
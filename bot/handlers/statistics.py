@@ -1,23 +1,46 @@
+import asyncio
+import re
 from telegram import Update
 from telegram.ext import ContextTypes
-from bot.models.tournament import tournament
+from bot.database.archive import SeasonArchive
+from bot.handlers.router import callback_routes, text_routes
+from bot.models.registry import get_tournament, tournaments
+from bot.utils.cache import render_cache
 from bot.utils.keyboards import Keyboards
-from bot.utils.helpers import calculate_team_statistics, format_tournament_table, format_detailed_stats
+from bot.utils.helpers import (
+    format_all_time_table, format_detailed_stats, format_head_to_head, format_team_record, format_tournament_table
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@text_routes.route("📊 View Table", "View Table")
+@callback_routes.route("view_table")
 async def view_tournament_table(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Display comprehensive tournament table"""
+    tournament = get_tournament(update)
     if not tournament.match_results:
         await update.message.reply_text("❌ No match results available yet.")
         return
     
-    teams_stats = calculate_team_statistics(tournament.teams, tournament.match_results)
+    table_text, reply_markup = render_cache.get_or_render(
+        tournament, 'table', lambda: render_tournament_table(tournament)
+    )
+    
+    await update.message.reply_text(
+        table_text, 
+        reply_markup=reply_markup, 
+        parse_mode='Markdown'
+    )
+
+
+def render_tournament_table(tournament) -> tuple:
+    """Build tournament table text and keyboard"""
+    teams_stats = tournament.get_team_statistics()
     progress = tournament.get_tournament_progress()
     
-    table_text, sorted_teams = format_tournament_table(teams_stats)
+    table_text, sorted_teams = format_tournament_table(teams_stats, tournament.get_ranked_standings())
     
     table_text += "\n**Legend:** P=Played, W=Won, D=Drawn, L=Lost, GF=Goals For, GA=Goals Against, GD=Goal Difference, Pts=Points"
     
@@ -33,24 +56,61 @@ async def view_tournament_table(update: Update, context: ContextTypes.DEFAULT_TY
             winner = sorted_teams[0][0]
             table_text += f"\n🥇 **Champion:** {winner}"
     
-    await update.message.reply_text(
-        table_text, 
-        reply_markup=Keyboards.tournament_table(), 
-        parse_mode='Markdown'
-    )
+    return table_text, Keyboards.tournament_table()
 
 
+@text_routes.route("📈 Detailed Stats", "Detailed Stats")
+@callback_routes.route("detailed_stats")
 async def view_detailed_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Display detailed team statistics"""
+    tournament = get_tournament(update)
     if not tournament.match_results:
         await update.message.reply_text("❌ No match results available yet.")
         return
     
-    teams_stats = calculate_team_statistics(tournament.teams, tournament.match_results)
-    stats_text = format_detailed_stats(teams_stats, tournament.rounds)
+    stats_text, reply_markup = render_cache.get_or_render(
+        tournament, 'detailed_stats',
+        lambda: (
+            format_detailed_stats(tournament.get_team_statistics(), tournament.rounds, tournament.get_round_totals()),
+            Keyboards.detailed_stats()
+        )
+    )
     
     await update.message.reply_text(
         stats_text, 
-        reply_markup=Keyboards.detailed_stats(), 
+        reply_markup=reply_markup, 
         parse_mode='Markdown'
     )
+
+
+async def alltime_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """All-time table, one team's record or a head-to-head from archived seasons"""
+    tournament = await tournaments.load(update.effective_chat.id)
+    # Opening the archive and queries read its files, keep them off the event loop
+    archive = await asyncio.to_thread(tournament.archive)
+    if not len(archive):
+        await update.message.reply_text("❌ No finished tournaments archived yet.")
+        return
+    
+    text = await asyncio.to_thread(render_all_time, archive, " ".join(context.args or []).strip())
+    await update.message.reply_text(text, parse_mode='Markdown')
+
+
+def render_all_time(archive: SeasonArchive, query: str) -> str:
+    """Build the answer to /alltime, /alltime <team> or /alltime <team> vs <team>"""
+    if not query:
+        return format_all_time_table(archive.all_time(), len(archive))
+    
+    names = [name.strip() for name in re.split(r"\s+vs\.?\s+", query, maxsplit=1, flags=re.IGNORECASE)]
+    teams = [archive.find_team(name) for name in names]
+    missing = [name for name, team in zip(names, teams) if team is None]
+    if missing:
+        return f"❌ No archived results for {', '.join(missing)}."
+    
+    if len(teams) == 1:
+        totals, history = archive.team_record(teams[0])
+        return format_team_record(teams[0], totals, history)
+    if teams[0] == teams[1]:
+        return "❌ Please name two different teams."
+    table, meetings = archive.head_to_head(*teams)
+    return format_head_to_head(teams[0], teams[1], table, meetings)
@@ -1,11 +1,13 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from bot.models.tournament import tournament
-from bot.handlers.matches import (
-    setup_tournament, start_tournament_setup, add_rounds_setup,
-    view_current_round, enter_results, tournament_info
-)
-from bot.handlers.statistics import view_tournament_table, view_detailed_stats
+from bot.config.settings import settings
+from bot.models.registry import get_tournament, writes_tournament, tournaments
+from bot.handlers.router import input_routes, text_routes
+# Handler modules register their menu routes on import
+from bot.handlers import statistics  # noqa: F401
+from bot.handlers.matches import setup_tournament, enter_results
+from bot.utils.helpers import parse_bulk_results
+from bot.utils.keyboards import Keyboards
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,37 +20,23 @@ async def handle_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     logger.info(f"User {user_id} sent: {text}")
     
+    # Cold tournaments are loaded off the event loop before any handler runs
+    await tournaments.load(update.effective_chat.id)
+    
     # Handle menu buttons
-    if text in ["⚽ Setup Tournament", "Setup Tournament"]:
-        await setup_tournament(update, context)
-    elif text in ["🎯 Start Tournament", "Start Tournament"]:
-        await start_tournament_setup(update, context)
-    elif text in ["📅 View Round", "View Round"]:
-        await view_current_round(update, context)
-    elif text in ["🏆 Enter Results", "Enter Results"]:
-        await enter_results(update, context)
-    elif text in ["📊 View Table", "View Table"]:
-        await view_tournament_table(update, context)
-    elif text in ["📈 Detailed Stats", "Detailed Stats"]:
-        await view_detailed_stats(update, context)
-    elif text in ["🔄 Next Round", "Next Round"]:
-        await handle_next_round(update, context)
-    elif text in ["➕ Add Rounds", "Add Rounds"]:
-        await add_rounds_setup(update, context)
-    elif text in ["🏁 Finish Tournament", "Finish Tournament"]:
-        await handle_finish_tournament(update, context)
-    elif text in ["ℹ️ Tournament Info", "Tournament Info"]:
-        await tournament_info(update, context)
-    elif text in ["🔄 Reset Tournament", "Reset Tournament"]:
-        await handle_reset_tournament(update, context)
-    elif 'waiting_for' in context.user_data:
+    if await text_routes.dispatch(text, update, context):
+        return
+    if 'waiting_for' in context.user_data:
         await handle_user_input(update, context)
     else:
         await update.message.reply_text("Please use the menu buttons or commands.")
 
 
+@text_routes.route("🔄 Next Round", "Next Round")
+@writes_tournament
 async def handle_next_round(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle next round advancement"""
+    tournament = get_tournament(update)
     if tournament.can_advance_to_next_round():
         if tournament.advance_to_next_round():
             await update.message.reply_text(f"🔄 Advanced to Round {tournament.current_round}!")
@@ -58,14 +46,18 @@ async def handle_next_round(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("❌ Current round is not complete yet!")
 
 
+@text_routes.route("🏁 Finish Tournament", "Finish Tournament")
 async def handle_finish_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle tournament finishing"""
     from bot.handlers.matches import finish_tournament_command
     await finish_tournament_command(update, context)
 
 
+@text_routes.route("🔄 Reset Tournament", "Reset Tournament")
+@writes_tournament
 async def handle_reset_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle tournament reset"""
+    tournament = get_tournament(update)
     tournament.reset_tournament()
     await update.message.reply_text("🔄 Tournament reset! You can now set up a new tournament.")
 
@@ -75,21 +67,15 @@ async def handle_user_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
     waiting_for = context.user_data.get('waiting_for')
     text = update.message.text
     
-    if waiting_for == 'team_name':
-        await handle_team_name_input(update, context, text)
-    elif waiting_for == 'custom_rounds':
-        await handle_custom_rounds_input(update, context, text)
-    elif waiting_for == 'custom_add_rounds':
-        await handle_custom_add_rounds_input(update, context, text)
-    elif waiting_for == 'match_result':
-        await handle_match_result_input(update, context, text)
+    await input_routes.dispatch(waiting_for, update, context, text)
 
 
+@input_routes.route('team_name')
+@writes_tournament
 async def handle_team_name_input(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
     """Handle team name input"""
-    if text not in tournament.teams:
-        tournament.teams.append(text)
-        tournament.save_data()
+    tournament = get_tournament(update)
+    if tournament.add_team(text):
         await update.message.reply_text(f"✅ Team '{text}' added successfully!")
     else:
         await update.message.reply_text(f"❌ Team '{text}' already exists!")
@@ -98,11 +84,14 @@ async def handle_team_name_input(update: Update, context: ContextTypes.DEFAULT_T
     await setup_tournament(update, context)
 
 
+@input_routes.route('custom_rounds')
+@writes_tournament
 async def handle_custom_rounds_input(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
     """Handle custom rounds input"""
+    tournament = get_tournament(update)
     try:
         rounds = int(text)
-        if 1 <= rounds <= tournament.config.max_rounds:
+        if 1 <= rounds <= settings.max_rounds:
             if tournament.create_tournament_structure(rounds):
                 await update.message.reply_text(
                     f"✅ Tournament created!\n\n"
@@ -114,18 +103,21 @@ async def handle_custom_rounds_input(update: Update, context: ContextTypes.DEFAU
             else:
                 await update.message.reply_text("❌ Failed to create tournament!")
         else:
-            await update.message.reply_text(f"❌ Please enter a number between 1 and {tournament.config.max_rounds}!")
+            await update.message.reply_text(f"❌ Please enter a number between 1 and {settings.max_rounds}!")
     except ValueError:
         await update.message.reply_text("❌ Please enter a valid number!")
     
     context.user_data.clear()
 
 
+@input_routes.route('custom_add_rounds')
+@writes_tournament
 async def handle_custom_add_rounds_input(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
     """Handle custom add rounds input"""
+    tournament = get_tournament(update)
     try:
         additional_rounds = int(text)
-        if 1 <= additional_rounds <= tournament.config.max_additional_rounds:
+        if 1 <= additional_rounds <= settings.max_additional_rounds:
             if tournament.add_additional_rounds(additional_rounds):
                 await update.message.reply_text(
                     f"✅ Added {additional_rounds} additional rounds!\n\n"
@@ -136,30 +128,66 @@ async def handle_custom_add_rounds_input(update: Update, context: ContextTypes.D
             else:
                 await update.message.reply_text("❌ Failed to add rounds!")
         else:
-            await update.message.reply_text(f"❌ Please enter a number between 1 and {tournament.config.max_additional_rounds}!")
+            await update.message.reply_text(f"❌ Please enter a number between 1 and {settings.max_additional_rounds}!")
     except ValueError:
         await update.message.reply_text("❌ Please enter a valid number!")
     
     context.user_data.clear()
 
 
+@input_routes.route('bulk_results')
+@writes_tournament
+async def handle_bulk_results_input(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
+    """Handle a message with many match results"""
+    tournament = get_tournament(update)
+    round_num = context.user_data.get('bulk_round')
+    if round_num not in tournament.rounds:
+        await update.message.reply_text("❌ No matches for this round.")
+        context.user_data.clear()
+        return
+    
+    parsed, errors = parse_bulk_results(text, tournament.rounds[round_num]['matches'])
+    if errors:
+        # Nothing is applied, the corrected message can simply be sent again
+        if len(errors) > 20:
+            errors = errors[:20] + [f"...and {len(errors) - 20} more"]
+        await update.message.reply_text(
+            "❌ No results saved:\n" + "\n".join(errors) + "\n\nFix these lines and send the results again.",
+            reply_markup=Keyboards.cancel()
+        )
+        return
+    
+    results = []
+    for index, home_score, away_score in parsed:
+        match_id, _, _ = tournament.match_at(round_num, index)
+        results.append((match_id, home_score, away_score))
+    tournament.record_results(results)
+    
+    await update.message.reply_text(f"✅ {len(results)} results recorded for Round {round_num}")
+    context.user_data.clear()
+    await enter_results(update, context)
+
+
+@input_routes.route('match_result')
+@writes_tournament
 async def handle_match_result_input(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
     """Handle match result input"""
+    tournament = get_tournament(update)
     try:
         # Parse score format: "2-1"
         if '-' in text and len(text.split('-')) == 2:
             home_score, away_score = map(int, text.split('-'))
             match_id = context.user_data['current_match']
             
-            tournament.match_results[match_id] = {
-                'home_score': home_score,
-                'away_score': away_score
-            }
-            tournament.save_data()
+            if not tournament.record_result(match_id, home_score, away_score):
+                await update.message.reply_text("❌ Unknown match! Please select it again from Enter Results.")
+                context.user_data.clear()
+                return
             
             await update.message.reply_text(f"✅ Result recorded: {text}")
+            page, pending_only = context.user_data.get('results_page', (0, False))
             context.user_data.clear()
-            await enter_results(update, context)
+            await enter_results(update, context, page, pending_only)
         else:
             await update.message.reply_text("❌ Invalid format! Please use format: home_score-away_score (e.g., 2-1)")
     except ValueError:
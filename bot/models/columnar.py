@@ -0,0 +1,222 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+from bot.models.standings import empty_team_stats
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, aggregates fall back to plain loops
+    np = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('season', 'round', 'home', 'away', 'home_score', 'away_score')
+
+
+class ResultColumns:
+    """Match results of one or more seasons stored as parallel integer columns
+
+    Teams are interned: ``home`` and ``away`` hold indexes into ``teams``,
+    so the same team name is the same team in every season. Columns are
+    NumPy arrays when NumPy is installed and ``array('l')`` otherwise.
+    """
+
+    def __init__(self, teams: Optional[List[str]] = None):
+        self.teams: List[str] = []
+        self._team_index: Dict[str, int] = {}
+        self.seasons: List[str] = []
+        self._columns = {name: array('l') for name in COLUMNS}
+        self._arrays = None
+        for team in teams or []:
+            self.team_id(team)
+
+    def __len__(self) -> int:
+        return len(self._columns['round'])
+
+    def team_id(self, team: str) -> int:
+        """Index of a team, adding it on first sight"""
+        index = self._team_index.get(team)
+        if index is None:
+            index = self._team_index[team] = len(self.teams)
+            self.teams.append(team)
+        return index
+
+    def add_season(self, name: str) -> int:
+        """Register a season and return its index"""
+        self.seasons.append(name)
+        return len(self.seasons) - 1
+
+    def append(self, season: int, round_num: int, home: str, away: str, home_score: int, away_score: int) -> int:
+        """Append one result and return its row"""
+        for name, value in zip(COLUMNS, (season, round_num, self.team_id(home), self.team_id(away), home_score, away_score)):
+            self._columns[name].append(value)
+        self._arrays = None
+        return len(self) - 1
+
+    def set_scores(self, row: int, home_score: int, away_score: int) -> None:
+        """Overwrite the scores of one result"""
+        self._columns['home_score'][row] = home_score
+        self._columns['away_score'][row] = away_score
+        if self._arrays is not None:
+            self._arrays['home_score'][row] = home_score
+            self._arrays['away_score'][row] = away_score
+
+    def extend(self, rows: Iterable[Tuple[int, int, int, int, int, int]]) -> None:
+        """Append many (season, round, home id, away id, home score, away score) rows at once"""
+        for name, values in zip(COLUMNS, zip(*rows)):
+            self._columns[name].extend(values)
+        self._arrays = None
+
+    def extend_season(self, name: str, teams: Iterable[str], results: Iterable[Tuple[int, str, str, Dict]]) -> int:
+        """Add a whole season from its teams and (round, home, away, result) rows"""
+        season = self.add_season(name)
+        for team in teams:
+            self.team_id(team)
+        team_id = self.team_id
+        self.extend(
+            (season, round_num, team_id(home), team_id(away), result['home_score'], result['away_score'])
+            for round_num, home, away, result in results
+        )
+        return season
+
+    def column(self, name: str):
+        """One column as a NumPy array (or the raw array without NumPy)"""
+        if np is None:
+            return self._columns[name]
+        if self._arrays is None:
+            self._arrays = {key: np.array(values, dtype=np.int64) for key, values in self._columns.items()}
+        return self._arrays[name]
+
+
+def _rows(columns: ResultColumns, season: Optional[int]):
+    rows = zip(*(columns.column(name) for name in COLUMNS))
+    if season is None:
+        return rows
+    return (row for row in rows if row[0] == season)
+
+
+def _totals_numpy(columns: ResultColumns, season: Optional[int]) -> Dict[str, List[int]]:
+    home, away = columns.column('home'), columns.column('away')
+    home_score, away_score = columns.column('home_score'), columns.column('away_score')
+    if season is not None:
+        mask = columns.column('season') == season
+        home, away, home_score, away_score = home[mask], away[mask], home_score[mask], away_score[mask]
+
+    size = len(columns.teams)
+
+    def count(index, weights=None):
+        return np.bincount(index, weights=weights, minlength=size)
+
+    home_win = home_score > away_score
+    away_win = home_score < away_score
+    draw = ~(home_win | away_win)
+    totals = {
+        'played': count(home) + count(away),
+        'won': count(home[home_win]) + count(away[away_win]),
+        'drawn': count(home[draw]) + count(away[draw]),
+        'lost': count(home[away_win]) + count(away[home_win]),
+        'goals_for': count(home, home_score) + count(away, away_score),
+        'goals_against': count(home, away_score) + count(away, home_score),
+    }
+    return {key: values.astype(np.int64).tolist() for key, values in totals.items()}
+
+
+def _totals_python(columns: ResultColumns, season: Optional[int]) -> Dict[str, List[int]]:
+    size = len(columns.teams)
+    totals = {key: [0] * size for key in ('played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against')}
+    for _, _, home, away, home_score, away_score in _rows(columns, season):
+        totals['played'][home] += 1
+        totals['played'][away] += 1
+        totals['goals_for'][home] += home_score
+        totals['goals_against'][home] += away_score
+        totals['goals_for'][away] += away_score
+        totals['goals_against'][away] += home_score
+        if home_score > away_score:
+            totals['won'][home] += 1
+            totals['lost'][away] += 1
+        elif home_score < away_score:
+            totals['won'][away] += 1
+            totals['lost'][home] += 1
+        else:
+            totals['drawn'][home] += 1
+            totals['drawn'][away] += 1
+    return totals
+
+
+def team_table(columns: ResultColumns, teams: Optional[List[str]] = None, season: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+    """Standings in calculate_team_statistics format, optionally for one season
+
+    Without ``teams`` every team that played is included.
+    """
+    totals = (_totals_numpy if np is not None else _totals_python)(columns, season)
+    if teams is None:
+        teams = [team for i, team in enumerate(columns.teams) if totals['played'][i]]
+
+    table = {}
+    for team in teams:
+        row = empty_team_stats()
+        index = columns._team_index.get(team)
+        if index is not None:
+            for key, values in totals.items():
+                row[key] = values[index]
+            row['points'] = 3 * row['won'] + row['drawn']
+            row['goal_difference'] = row['goals_for'] - row['goals_against']
+        table[team] = row
+    return table
+
+
+def round_totals(columns: ResultColumns, season: Optional[int] = None) -> Dict[Tuple[int, int], Dict[str, int]]:
+    """Matches played and goals scored per (season, round)"""
+    if np is not None:
+        seasons, rounds = columns.column('season'), columns.column('round')
+        goals = columns.column('home_score') + columns.column('away_score')
+        if season is not None:
+            mask = seasons == season
+            seasons, rounds, goals = seasons[mask], rounds[mask], goals[mask]
+        if not len(rounds):
+            return {}
+        # One integer key per (season, round) so a single unique/bincount pass groups them
+        span = int(rounds.max()) + 1
+        keys, inverse = np.unique(seasons * span + rounds, return_inverse=True)
+        matches = np.bincount(inverse)
+        scored = np.bincount(inverse, weights=goals)
+        return {
+            (int(key // span), int(key % span)): {'matches': int(count), 'goals': int(total)}
+            for key, count, total in zip(keys, matches, scored)
+        }
+
+    totals: Dict[Tuple[int, int], Dict[str, int]] = {}
+    for row_season, round_num, _, _, home_score, away_score in _rows(columns, season):
+        entry = totals.setdefault((row_season, round_num), {'matches': 0, 'goals': 0})
+        entry['matches'] += 1
+        entry['goals'] += home_score + away_score
+    return dict(sorted(totals.items()))
+
+
+def all_time_table(columns: ResultColumns) -> Dict[str, Dict[str, int]]:
+    """Aggregated standings over every season, with the number of seasons played"""
+    table = team_table(columns)
+    size = len(columns.teams)
+    seasons = columns.column('season')
+    if np is not None:
+        # Distinct (season, team) pairs, counted per team
+        pairs = np.unique(np.concatenate((seasons * size + columns.column('home'), seasons * size + columns.column('away'))))
+        appearances = np.bincount(pairs % size, minlength=size).tolist() if size else []
+    else:
+        appearances = [0] * size
+        for season, team in set(zip(seasons, columns.column('home'))) | set(zip(seasons, columns.column('away'))):
+            appearances[team] += 1
+    for team, row in table.items():
+        row['seasons'] = appearances[columns._team_index[team]]
+    return table
+
+
+def team_history(columns: ResultColumns, team: str) -> Dict[str, Dict[str, int]]:
+    """Season by season record of one team"""
+    history = {}
+    for season, name in enumerate(columns.seasons):
+        row = team_table(columns, [team], season=season)[team]
+        if row['played']:
+            history[name] = row
+    return history
+
@@ -0,0 +1,188 @@
+import asyncio
+import functools
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Union
+from bot.config.settings import settings
+from bot.database.storage import open_storage
+from bot.database.worker import persistence
+from bot.models.tournament import FootballTournament
+
+logger = logging.getLogger(__name__)
+
+
+class TournamentRegistry:
+    """Per-chat tournaments, loaded lazily and kept behind an LRU cap
+
+    Each chat owns one tournament stored under its own id. Only tournaments
+    that are actually used are loaded; once more than ``capacity`` are in
+    memory the least recently used one is flushed and dropped.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self._tournaments: "OrderedDict[str, FootballTournament]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._write_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self._tournaments)
+
+    def __contains__(self, chat_id: Union[int, str]) -> bool:
+        return self.tournament_id(chat_id) in self._tournaments
+
+    def loaded(self) -> List[FootballTournament]:
+        """Tournaments currently held in memory"""
+        with self._lock:
+            return list(self._tournaments.values())
+
+    @staticmethod
+    def tournament_id(chat_id: Union[int, str]) -> str:
+        """Storage id of the tournament owned by a chat"""
+        if settings.legacy_chat_id is not None and str(chat_id) == str(settings.legacy_chat_id):
+            # This chat adopts the pre-registry single tournament
+            return "default"
+        return str(chat_id)
+
+    def check_legacy(self) -> bool:
+        """Warn when the pre-registry tournament exists but no chat adopts it"""
+        if settings.legacy_chat_id is not None:
+            return False
+        found = (settings.data_dir / "tournament_data.json").exists()
+        if not found and settings.storage_backend == "journal":
+            directory = settings.data_dir / "journal" / "default"
+            found = directory.is_dir() and any(path.stat().st_size for path in directory.iterdir())
+        elif not found:
+            storage = open_storage("default")
+            found = storage.exists()
+            storage.close()
+        if found:
+            logger.warning(
+                "A tournament from before per-chat tournaments exists but no chat is mapped to it. "
+                "Set LEGACY_CHAT_ID to the chat it belongs to, otherwise that chat starts an empty league."
+            )
+        return found
+
+    def get(self, chat_id: Union[int, str]) -> FootballTournament:
+        """Get a chat's tournament, loading it from storage on first access
+
+        Does not evict (that flushes storage), see load().
+        """
+        tournament_id = self.tournament_id(chat_id)
+        while True:
+            with self._lock:
+                tournament = self._tournaments.get(tournament_id)
+                if tournament is not None:
+                    self._tournaments.move_to_end(tournament_id)
+                    return tournament
+                loading = self._loading.setdefault(tournament_id, threading.Lock())
+
+            with loading:
+                with self._lock:
+                    if self._loading.get(tournament_id) is not loading:
+                        # Loaded by another thread or evicted meanwhile, look again
+                        continue
+                tournament = FootballTournament(
+                    data_file="tournament_data.json" if tournament_id == "default" else None,
+                    tournament_id=tournament_id
+                )
+                with self._lock:
+                    self._tournaments[tournament_id] = tournament
+                    self._loading.pop(tournament_id, None)
+                logger.debug(f"Loaded tournament {tournament_id} ({len(self._tournaments)} in memory)")
+                return tournament
+
+    async def load(self, chat_id: Union[int, str]) -> FootballTournament:
+        """Get a chat's tournament without blocking the event loop on a cold load
+
+        Tournaments above capacity are flushed and dropped here, off the
+        event loop as well.
+        """
+        tournament_id = self.tournament_id(chat_id)
+        with self._lock:
+            tournament = self._tournaments.get(tournament_id)
+            if tournament is not None:
+                self._tournaments.move_to_end(tournament_id)
+                return tournament
+        tournament = await asyncio.to_thread(self.get, chat_id)
+        if len(self._tournaments) > self.capacity:
+            await asyncio.to_thread(self._evict)
+        return tournament
+
+    def lock(self, chat_id: Union[int, str]) -> asyncio.Lock:
+        """Write lock of a chat's tournament, writes to one tournament are serialized"""
+        tournament_id = self.tournament_id(chat_id)
+        with self._lock:
+            lock = self._write_locks.get(tournament_id)
+            if lock is None:
+                lock = self._write_locks[tournament_id] = asyncio.Lock()
+        return lock
+
+    def _evict(self) -> None:
+        """Flush and drop least recently used tournaments above capacity
+
+        An evicted tournament's loading lock is held until its queued writes
+        are on disk and its storage is closed, so get() for the same chat
+        waits and then loads everything that was written.
+        """
+        evicted = []
+        with self._lock:
+            # Tournaments with a write in progress are skipped
+            candidates = []
+            for tournament_id in self._tournaments:
+                lock = self._write_locks.get(tournament_id)
+                if lock is None or not lock.locked():
+                    candidates.append(tournament_id)
+            for tournament_id in candidates[:max(0, len(self._tournaments) - self.capacity)]:
+                # Nothing else holds the loading lock of a loaded tournament
+                loading = self._loading[tournament_id] = threading.Lock()
+                loading.acquire()
+                evicted.append((tournament_id, self._tournaments.pop(tournament_id), loading))
+        if not evicted:
+            return
+
+        try:
+            persistence.flush()
+        finally:
+            for tournament_id, tournament, loading in evicted:
+                try:
+                    tournament.storage.close()
+                except Exception as e:
+                    logger.error(f"Failed to close storage of tournament {tournament_id}: {e}")
+                with self._lock:
+                    self._loading.pop(tournament_id, None)
+                loading.release()
+                logger.debug(f"Evicted tournament {tournament_id}")
+
+    def close_all(self) -> None:
+        """Flush and close every loaded tournament"""
+        persistence.flush()
+        with self._lock:
+            tournaments, self._tournaments = self._tournaments, OrderedDict()
+        for tournament in tournaments.values():
+            tournament.storage.close()
+
+
+def writes_tournament(handler):
+    """Run a handler that mutates the tournament under that tournament's write lock
+
+    Handlers without this decorator must only read tournament state, so
+    they can run concurrently with anything else.
+    """
+    @functools.wraps(handler)
+    async def wrapper(update, context, *args, **kwargs):
+        async with tournaments.lock(update.message.chat_id):
+            return await handler(update, context, *args, **kwargs)
+    return wrapper
+
+
+def get_tournament(update) -> FootballTournament:
+    """Tournament of the chat an Update or CallbackQuery belongs to"""
+    return tournaments.get(update.message.chat_id)
+
+
+# Global tournament registry
+tournaments = TournamentRegistry(settings.max_cached_tournaments)
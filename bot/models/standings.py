@@ -0,0 +1,163 @@
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def empty_team_stats() -> Dict[str, int]:
+    """Create a zeroed statistics row for one team"""
+    return {
+        'points': 0,
+        'played': 0,
+        'won': 0,
+        'drawn': 0,
+        'lost': 0,
+        'goals_for': 0,
+        'goals_against': 0,
+        'goal_difference': 0
+    }
+
+
+# Tiebreak criteria computed from the overall table, higher is better
+OVERALL_CRITERIA = ('points', 'goal_difference', 'goals_for', 'won')
+# Tiebreak criteria computed only from matches among the tied teams
+HEAD_TO_HEAD_CRITERIA = ('h2h_points', 'h2h_goal_difference', 'h2h_goals_for')
+DEFAULT_TIEBREAKERS = ('points', 'goal_difference', 'goals_for')
+
+
+def parse_tiebreakers(text: str) -> Tuple[str, ...]:
+    """Parse a comma separated tiebreak chain, dropping unknown criteria"""
+    chain = []
+    for name in (part.strip() for part in text.split(",")):
+        if name in OVERALL_CRITERIA or name in HEAD_TO_HEAD_CRITERIA:
+            chain.append(name)
+        elif name:
+            logger.warning(f"Unknown tiebreaker ignored: {name}")
+    return tuple(chain) or DEFAULT_TIEBREAKERS
+
+
+class Standings:
+    """League table maintained incrementally as results are recorded
+
+    Next to the table it keeps a teams x teams head-to-head matrix: points
+    and goals each team took off each other team, so tiebreaks among any
+    group of teams never rescan the results.
+    """
+
+    def __init__(self, teams: Optional[List[str]] = None):
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._index: Dict[str, int] = {}
+        self.h2h_points: List[List[int]] = []
+        self.h2h_goals: List[List[int]] = []
+        self.reset(teams or [])
+
+    def reset(self, teams: List[str]) -> None:
+        """Reset the table to zero for the given teams"""
+        self.stats = {}
+        self._index = {}
+        self.h2h_points = []
+        self.h2h_goals = []
+        for team in teams:
+            self.add_team(team)
+
+    def add_team(self, team: str) -> None:
+        """Add a team with an empty row"""
+        if team in self.stats:
+            return
+        self.stats[team] = empty_team_stats()
+        self._index[team] = len(self._index)
+        for matrix in (self.h2h_points, self.h2h_goals):
+            for row in matrix:
+                row.append(0)
+            matrix.append([0] * len(self._index))
+
+    def apply(self, home_team: str, away_team: str, home_score: int, away_score: int, sign: int = 1) -> None:
+        """Add (sign=1) or subtract (sign=-1) a single result from the table"""
+        home = self.stats.get(home_team)
+        away = self.stats.get(away_team)
+        if home is None or away is None:
+            return
+
+        home['played'] += sign
+        away['played'] += sign
+
+        home['goals_for'] += sign * home_score
+        home['goals_against'] += sign * away_score
+        away['goals_for'] += sign * away_score
+        away['goals_against'] += sign * home_score
+        home['goal_difference'] += sign * (home_score - away_score)
+        away['goal_difference'] += sign * (away_score - home_score)
+
+        if home_score > away_score:  # Home team wins
+            home_points, away_points = 3, 0
+            home['won'] += sign
+            away['lost'] += sign
+        elif home_score < away_score:  # Away team wins
+            home_points, away_points = 0, 3
+            away['won'] += sign
+            home['lost'] += sign
+        else:  # Draw
+            home_points, away_points = 1, 1
+            home['drawn'] += sign
+            away['drawn'] += sign
+        home['points'] += sign * home_points
+        away['points'] += sign * away_points
+
+        i, j = self._index[home_team], self._index[away_team]
+        self.h2h_points[i][j] += sign * home_points
+        self.h2h_points[j][i] += sign * away_points
+        self.h2h_goals[i][j] += sign * home_score
+        self.h2h_goals[j][i] += sign * away_score
+
+    def replace_result(self, home_team: str, away_team: str,
+                       old_result: Optional[Dict], new_result: Optional[Dict]) -> None:
+        """Swap a previously recorded result for a new one"""
+        if old_result:
+            self.apply(home_team, away_team, old_result['home_score'], old_result['away_score'], sign=-1)
+        if new_result:
+            self.apply(home_team, away_team, new_result['home_score'], new_result['away_score'])
+
+    def rebuild(self, teams: List[str], results: Iterable[Tuple[str, str, Dict]]) -> None:
+        """Recompute the whole table from (home, away, result) triples"""
+        self.reset(teams)
+        for home_team, away_team, result in results:
+            try:
+                self.apply(home_team, away_team, result['home_score'], result['away_score'])
+            except (KeyError, TypeError) as e:
+                logger.error(f"Error processing result {home_team} vs {away_team}: {e}")
+
+    def _criterion(self, name: str, group: List[str]) -> Dict[str, int]:
+        """Value of one tiebreak criterion for every team of a group"""
+        if name in OVERALL_CRITERIA:
+            return {team: self.stats[team][name] for team in group}
+
+        indexes = [self._index[team] for team in group]
+        values = {}
+        for team, i in zip(group, indexes):
+            if name == 'h2h_points':
+                values[team] = sum(self.h2h_points[i][j] for j in indexes)
+            elif name == 'h2h_goals_for':
+                values[team] = sum(self.h2h_goals[i][j] for j in indexes)
+            else:  # h2h_goal_difference
+                values[team] = sum(self.h2h_goals[i][j] - self.h2h_goals[j][i] for j in indexes)
+        return values
+
+    def _rank(self, group: List[str], chain: Sequence[str]) -> List[str]:
+        if len(group) < 2 or not chain:
+            return group
+        values = self._criterion(chain[0], group)
+        ordered = sorted(group, key=lambda team: -values[team])
+        ranked = []
+        # Teams still level on this criterion go on to the rest of the chain, as their own mini-league
+        for _, tied in groupby(ordered, key=values.get):
+            ranked.extend(self._rank(list(tied), chain[1:]))
+        return ranked
+
+    def ranked(self, tiebreakers: Sequence[str] = DEFAULT_TIEBREAKERS) -> List[Tuple[str, Dict[str, int]]]:
+        """Table rows in final order, ties resolved by the tiebreak chain"""
+        return [(team, dict(self.stats[team])) for team in self._rank(list(self.stats), tiebreakers)]
+
+    def as_dict(self) -> Dict[str, Dict[str, int]]:
+        """Return a copy of the table in calculate_team_statistics format"""
+        return {team: dict(row) for team, row in self.stats.items()}
@@ -1,13 +1,40 @@
-import json
+import itertools
 import logging
-from typing import Dict, List, Tuple
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
 from bot.config.settings import settings
+from bot.database.archive import SeasonArchive, open_archive
+from bot.database.storage import TournamentStorage, open_storage
+from bot.database.worker import persistence
+from bot.models.columnar import ResultColumns, round_totals
+from bot.models.standings import Standings, parse_tiebreakers
+from bot.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Process-wide so versions stay unique even when a tournament is evicted and reloaded
+_versions = itertools.count(1)
+
+# Result keys are "R<round>_<fixture index>", see match_id()
+_MATCH_ID = re.compile(r"R(\d+)_(\d+)")
+
+
+def match_id(round_num: int, fixture: int) -> str:
+    """Key of a result: its round and the fixture's position in that round"""
+    return f"R{round_num}_{fixture}"
+
+
+def _legacy_match_id(round_num: int, home_team: str, away_team: str) -> str:
+    """Result key used before results were keyed by fixture position (not unique)"""
+    return f"R{round_num}_{home_team}_vs_{away_team}".replace(" ", "_")
+
 
 class FootballTournament:
-    def __init__(self, data_file: str = "tournament_data.json"):
+    def __init__(self, data_file: Optional[str] = "tournament_data.json",
+                 storage: Optional[TournamentStorage] = None, tournament_id: str = "default"):
+        self.tournament_id = tournament_id
         self.teams: List[str] = []
         self.rounds: Dict[int, Dict] = {}
         self.current_round: int = 1
@@ -15,8 +42,28 @@ class FootballTournament:
         self.match_results: Dict[str, Dict] = {}
         self.tournament_finished: bool = False
         self.tournament_started: bool = False
+        self.standings = Standings()
+        # Bumped on every mutation, used to key rendered views
+        self.version: int = next(_versions)
+        self._match_index: Dict[str, Tuple[int, str, str]] = {}
+        # Recorded results per round and number of rounds marked completed
+        self._round_results: Dict[int, int] = {}
+        # Versions of the rounds' fixture lists and of each result, see results_version()
+        self._structure_version: int = self.version
+        self._result_versions: Dict[str, int] = {}
+        self._completed_rounds: int = 0
+        # Columnar copy of the results and the row of each result in it, see result_columns()
+        self._columns: Optional[ResultColumns] = None
+        self._column_rows: Dict[str, int] = {}
+        # Fixture lists shared by every round that plays them
+        self._fixture_templates: Dict[Tuple, Tuple[Tuple[str, str], ...]] = {}
+        # Finished seasons, opened on first use and dropped with the tournament
+        self._archive: Optional[SeasonArchive] = None
+        self._archive_lock = threading.Lock()
         
-        self.data_file = settings.data_dir / data_file
+        # Legacy JSON file, only read once to migrate into storage
+        self.data_file = settings.data_dir / data_file if data_file else None
+        self.storage = storage or open_storage(tournament_id)
         self.load_data()
     
     def generate_single_round_matches(self) -> List[Tuple[str, str]]:
@@ -27,6 +74,11 @@ class FootballTournament:
                 matches.append((self.teams[i], self.teams[j]))
         return matches
     
+    def _shared_fixtures(self, matches) -> Tuple[Tuple[str, str], ...]:
+        """Return the single shared (immutable) copy of a fixture list"""
+        key = tuple(tuple(match) for match in matches)
+        return self._fixture_templates.setdefault(key, key)
+    
     def create_tournament_structure(self, num_rounds: int) -> bool:
         """Create tournament structure with specified number of rounds"""
         if len(self.teams) < 2 or num_rounds > settings.max_rounds:
@@ -35,12 +87,13 @@ class FootballTournament:
         
         self.total_rounds = num_rounds
         self.rounds = {}
+        self._fixture_templates = {}
         
-        round_matches = self.generate_single_round_matches()
+        round_matches = self._shared_fixtures(self.generate_single_round_matches())
         
         for round_num in range(1, num_rounds + 1):
             self.rounds[round_num] = {
-                'matches': round_matches.copy(),
+                'matches': round_matches,
                 'completed': False
             }
         
@@ -48,6 +101,7 @@ class FootballTournament:
         self.tournament_started = True
         self.tournament_finished = False
         self.match_results = {}
+        self._rebuild_indexes()
         self.save_data()
         logger.info(f"Tournament created with {num_rounds} rounds and {len(self.teams)} teams")
         return True
@@ -61,16 +115,18 @@ class FootballTournament:
             logger.warning(f"Cannot add {additional_rounds} rounds, max allowed: {settings.max_additional_rounds}")
             return False
         
-        round_matches = self.generate_single_round_matches()
+        round_matches = self._shared_fixtures(self.generate_single_round_matches())
         
         for round_num in range(self.total_rounds + 1, self.total_rounds + additional_rounds + 1):
             self.rounds[round_num] = {
-                'matches': round_matches.copy(),
+                'matches': round_matches,
                 'completed': False
             }
         
+        new_rounds = list(range(self.total_rounds + 1, self.total_rounds + additional_rounds + 1))
         self.total_rounds += additional_rounds
-        self.save_data()
+        self._index_rounds(new_rounds)
+        self._persist('add_rounds', new_rounds, list(round_matches), self.total_rounds)
         logger.info(f"Added {additional_rounds} additional rounds")
         return True
     
@@ -79,18 +135,15 @@ class FootballTournament:
         if round_num not in self.rounds:
             return False
         
-        matches = self.rounds[round_num]['matches']
-        for home, away in matches:
-            match_id = self.create_match_id(round_num, home, away)
-            if match_id not in self.match_results:
-                return False
-        return True
+        return self._round_results.get(round_num, 0) >= len(self.rounds[round_num]['matches'])
     
     def complete_round(self, round_num: int) -> None:
         """Mark a round as completed"""
         if round_num in self.rounds:
+            if not self.rounds[round_num]['completed']:
+                self._completed_rounds += 1
             self.rounds[round_num]['completed'] = True
-            self.save_data()
+            self._persist('set_round_completed', round_num)
             logger.info(f"Round {round_num} marked as completed")
     
     def can_advance_to_next_round(self) -> bool:
@@ -103,83 +156,373 @@ class FootballTournament:
             if self.can_advance_to_next_round():
                 self.complete_round(self.current_round)
             self.current_round += 1
-            self.save_data()
+            self._persist('save_meta', self._meta())
             logger.info(f"Advanced to round {self.current_round}")
             return True
         return False
     
     def finish_tournament(self) -> None:
-        """Mark tournament as finished"""
+        """Mark tournament as finished and archive the season"""
+        already_finished = self.tournament_finished
         self.tournament_finished = True
         if self.can_advance_to_next_round():
             self.complete_round(self.current_round)
-        self.save_data()
+        self._persist('save_meta', self._meta())
+        if settings.archive_enabled and not already_finished and self.match_results:
+            self._archive_season()
         logger.info("Tournament finished")
     
+    def archive(self) -> SeasonArchive:
+        """This tournament's archive of finished seasons, reads its index on first use"""
+        with self._archive_lock:
+            if self._archive is None:
+                self._archive = open_archive(self.tournament_id)
+            return self._archive
+
+    def _archive_season(self) -> None:
+        """Append the finished season to this tournament's archive"""
+        archive = self.archive()
+        season = {
+            'finished_at': time.time(),
+            'rounds': self.total_rounds,
+            'teams': list(self.teams),
+            'standings': [team for team, _ in self.get_ranked_standings()],
+            'results': [
+                (round_num, home, away, result['home_score'], result['away_score'])
+                for round_num, home, away, result in self.iter_results()
+            ]
+        }
+        if persistence.running:
+            persistence.submit(archive, 'add_season', season)
+            return
+        try:
+            archive.add_season(season)
+        except Exception as e:
+            logger.error(f"Failed to archive tournament {self.tournament_id}: {e}")
+    
     def reset_tournament(self) -> None:
         """Reset tournament to start fresh"""
         self.rounds = {}
+        self._fixture_templates = {}
         self.current_round = 1
         self.total_rounds = 0
         self.match_results = {}
         self.tournament_finished = False
         self.tournament_started = False
+        self._rebuild_indexes()
         self.save_data()
         logger.info("Tournament reset")
     
-    def create_match_id(self, round_num: int, home_team: str, away_team: str) -> str:
-        """Create unique match ID"""
-        return f"R{round_num}_{home_team}_vs_{away_team}".replace(" ", "_")
+    def load_season(self, teams: List[str], num_rounds: int, results: List[Tuple[int, str, str, int, int]]) -> bool:
+        """Replace the tournament with imported teams, rounds and results in one storage write"""
+        if not 2 <= len(teams) <= settings.max_teams or not 1 <= num_rounds <= settings.max_rounds + settings.max_additional_rounds:
+            logger.warning(f"Cannot import season: teams={len(teams)}, rounds={num_rounds}")
+            return False
+        
+        self.teams = list(teams)
+        self._fixture_templates = {}
+        round_matches = self._shared_fixtures(self.generate_single_round_matches())
+        fixtures = {fixture: index for index, fixture in enumerate(round_matches)}
+        if any((home, away) not in fixtures or not 1 <= round_num <= num_rounds for round_num, home, away, _, _ in results):
+            logger.warning("Imported results do not match the generated fixtures")
+            return False
+        
+        self.match_results = {
+            match_id(round_num, fixtures[home, away]): {'home_score': home_score, 'away_score': away_score}
+            for round_num, home, away, home_score, away_score in results
+        }
+        played = {}
+        for round_num, _, _, _, _ in results:
+            played[round_num] = played.get(round_num, 0) + 1
+        self.rounds = {
+            round_num: {'matches': round_matches, 'completed': played.get(round_num, 0) == len(round_matches)}
+            for round_num in range(1, num_rounds + 1)
+        }
+        # Continue from the first round that still has matches to play
+        self.current_round = next((n for n in self.rounds if not self.rounds[n]['completed']), num_rounds)
+        self.total_rounds = num_rounds
+        self.tournament_started = True
+        self.tournament_finished = False
+        self._rebuild_indexes()
+        self.save_data()
+        logger.info(f"Imported season with {len(teams)} teams, {num_rounds} rounds and {len(results)} results")
+        return True
+    
+    def add_team(self, team: str) -> bool:
+        """Add a team, returns False if it already exists"""
+        if team in self.teams:
+            return False
+        self.teams.append(team)
+        self.standings.add_team(team)
+        self._persist('add_team', len(self.teams) - 1, team)
+        return True
+    
+    def clear_teams(self) -> None:
+        """Remove all teams and reset the tournament"""
+        self.teams = []
+        self.reset_tournament()
+    
+    def record_result(self, match_id: str, home_score: int, away_score: int) -> bool:
+        """Record or overwrite a match result and update standings incrementally"""
+        match = self._match_index.get(match_id)
+        if match is None:
+            logger.warning(f"Unknown match id: {match_id}")
+            return False
+        
+        self._apply_result(match, match_id, home_score, away_score)
+        self._persist('upsert_result', match_id, home_score, away_score)
+        return True
+    
+    def record_results(self, results: List[Tuple[str, int, int]]) -> bool:
+        """Record several results at once with a single storage write, all or nothing"""
+        matches = [self._match_index.get(match_id) for match_id, _, _ in results]
+        if None in matches:
+            logger.warning("Unknown match id in bulk results")
+            return False
+        
+        for match, (match_id, home_score, away_score) in zip(matches, results):
+            self._apply_result(match, match_id, home_score, away_score)
+        self._persist('upsert_results', [list(result) for result in results])
+        return True
+    
+    def _apply_result(self, match: Tuple[int, str, str], match_id: str, home_score: int, away_score: int) -> None:
+        """Update results, round counters, standings and the result columns for one result"""
+        round_num, home_team, away_team = match
+        new_result = {'home_score': home_score, 'away_score': away_score}
+        old_result = self.match_results.get(match_id)
+        self.match_results[match_id] = new_result
+        self._result_versions[match_id] = next(_versions)
+        if old_result is None:
+            self._round_results[round_num] = self._round_results.get(round_num, 0) + 1
+        self.standings.replace_result(home_team, away_team, old_result, new_result)
+        if self._columns is not None:
+            row = self._column_rows.get(match_id)
+            if row is None:
+                self._column_rows[match_id] = self._columns.append(0, round_num, home_team, away_team, home_score, away_score)
+            else:
+                self._columns.set_scores(row, home_score, away_score)
+    
+    def results_version(self, round_num: int, fixtures: Optional[range] = None) -> Tuple:
+        """State a view of some of a round's fixtures depends on
+
+        With fixtures the version moves only when one of their results
+        changes; without, whenever a result of the round is first recorded
+        (which fixtures are pending). Either way it also moves with the
+        round's completion and any structural change.
+        """
+        state = (self._structure_version, self.rounds[round_num]['completed'], self.is_round_complete(round_num))
+        if fixtures is None:
+            return state + (self._round_results.get(round_num, 0),)
+        return state + (max((self._result_versions.get(match_id(round_num, i), 0) for i in fixtures), default=0),)
+
+    def get_team_statistics(self) -> Dict:
+        """Get current standings without rescanning match results"""
+        return self.standings.as_dict()
+    
+    def get_ranked_standings(self) -> List[Tuple[str, Dict]]:
+        """Table rows in final order using the configured tiebreak chain"""
+        return self.standings.ranked(parse_tiebreakers(settings.tiebreakers))
+    
+    def result_columns(self) -> ResultColumns:
+        """Results as columns for the vectorized statistics engine
+
+        Built on first use after a load or structural change, results
+        recorded afterwards are written into it by _apply_result().
+        """
+        if self._columns is None:
+            columns = ResultColumns(self.teams)
+            season = columns.add_season(self.tournament_id)
+            self._column_rows = {}
+            for match_id, result in self.match_results.items():
+                match = self._match_index.get(match_id)
+                if match is not None:
+                    round_num, home_team, away_team = match
+                    self._column_rows[match_id] = columns.append(
+                        season, round_num, home_team, away_team, result['home_score'], result['away_score']
+                    )
+            self._columns = columns
+        return self._columns
+    
+    def get_round_totals(self) -> Dict[int, Dict[str, int]]:
+        """Matches played and goals scored per round"""
+        return {round_num: totals for (_, round_num), totals in round_totals(self.result_columns()).items()}
+    
+    def iter_results(self) -> Iterator[Tuple[int, str, str, Dict]]:
+        """Iterate over recorded results as (round, home, away, result)"""
+        for match_id, result in self.match_results.items():
+            match = self._match_index.get(match_id)
+            if match is not None:
+                round_num, home_team, away_team = match
+                yield round_num, home_team, away_team, result
+    
+    def _index_rounds(self, round_nums) -> None:
+        """Add match ids of the given rounds to the match index"""
+        for round_num in round_nums:
+            for index, (home, away) in enumerate(self.rounds.get(round_num, {}).get('matches', [])):
+                self._match_index[match_id(round_num, index)] = (round_num, home, away)
+    
+    def _rebuild_indexes(self) -> None:
+        """Rebuild match index and standings from scratch (load and reset only)"""
+        self._match_index = {}
+        self._result_versions = {}
+        self._columns = None
+        self._index_rounds(self.rounds)
+        self.standings.rebuild(
+            self.teams,
+            ((home, away, result) for _, home, away, result in self.iter_results())
+        )
+        
+        self._round_results = {}
+        for round_num, _, _, _ in self.iter_results():
+            self._round_results[round_num] = self._round_results.get(round_num, 0) + 1
+        self._completed_rounds = sum(1 for r in self.rounds.values() if r['completed'])
+        self._check_consistency()
+    
+    def _check_consistency(self) -> None:
+        """Verify the round counters against the stored results (run at load)"""
+        orphaned = len(self.match_results) - sum(self._round_results.values())
+        if orphaned:
+            logger.warning(f"Tournament {self.tournament_id}: {orphaned} results do not match any fixture")
+        
+        for round_num, round_data in self.rounds.items():
+            recorded = sum(
+                1 for index in range(len(round_data['matches']))
+                if match_id(round_num, index) in self.match_results
+            )
+            if recorded != self._round_results.get(round_num, 0):
+                logger.error(
+                    f"Tournament {self.tournament_id}: round {round_num} counter mismatch "
+                    f"({self._round_results.get(round_num, 0)} != {recorded}), using recount"
+                )
+                self._round_results[round_num] = recorded
+            if round_data['completed'] and recorded < len(round_data['matches']):
+                logger.warning(
+                    f"Tournament {self.tournament_id}: round {round_num} is marked completed "
+                    f"with {recorded}/{len(round_data['matches'])} results"
+                )
+    
+    def match_at(self, round_num: int, index: int) -> Optional[Tuple[str, str, str]]:
+        """Match id, home and away team of a round's fixture by its position"""
+        matches = self.rounds.get(round_num, {}).get('matches', ())
+        if not 0 <= index < len(matches):
+            return None
+        home_team, away_team = matches[index]
+        return match_id(round_num, index), home_team, away_team
+    
+    def find_match(self, round_num: int, home_team: str, away_team: str) -> Optional[str]:
+        """Match id of the fixture between two teams in a round"""
+        matches = self.rounds.get(round_num, {}).get('matches', ())
+        try:
+            return match_id(round_num, matches.index((home_team, away_team)))
+        except ValueError:
+            return None
+    
+    def round_results(self, round_num: int) -> List[Optional[Dict]]:
+        """Result (or None) of every fixture of a round, in fixture order"""
+        matches = self.rounds.get(round_num, {}).get('matches', ())
+        return [self.match_results.get(match_id(round_num, index)) for index in range(len(matches))]
+    
+    def _migrate_match_ids(self) -> bool:
+        """Re-key results stored under team-name ids, returns whether any were found
+
+        Legacy ids of different fixtures could collide; such an id is given
+        to the last fixture carrying it, the one it used to count for.
+        """
+        if all(_MATCH_ID.fullmatch(key) for key in self.match_results):
+            return False
+        legacy: Dict[str, str] = {}
+        for round_num, round_data in self.rounds.items():
+            for index, (home, away) in enumerate(round_data['matches']):
+                legacy[_legacy_match_id(round_num, home, away)] = match_id(round_num, index)
+        migrated = {}
+        for key, result in self.match_results.items():
+            new_key = key if _MATCH_ID.fullmatch(key) else legacy.get(key)
+            if new_key is None:
+                logger.warning(f"Tournament {self.tournament_id}: dropping result {key} of no fixture")
+                continue
+            migrated[new_key] = result
+        self.match_results = migrated
+        logger.info(f"Tournament {self.tournament_id}: re-keyed results by fixture position")
+        return True
     
     def get_tournament_progress(self) -> Dict:
         """Get overall tournament progress"""
-        completed_rounds = sum(1 for r in self.rounds.values() if r['completed'])
         total_matches = len(self.rounds.get(1, {}).get('matches', [])) * self.total_rounds
         completed_matches = len(self.match_results)
         
         return {
-            'completed_rounds': completed_rounds,
+            'completed_rounds': self._completed_rounds,
             'total_rounds': self.total_rounds,
             'completed_matches': completed_matches,
             'total_matches': total_matches,
             'current_round_complete': self.is_round_complete(self.current_round)
         }
     
-    def save_data(self) -> None:
-        """Save bot data to file"""
+    def to_dict(self) -> Dict:
+        """Serialize tournament state (copied, safe to hand to the persistence worker)"""
+        return {
+            'teams': list(self.teams),
+            'rounds': {num: dict(data) for num, data in self.rounds.items()},
+            'current_round': self.current_round,
+            'total_rounds': self.total_rounds,
+            'match_results': {match_id: dict(result) for match_id, result in self.match_results.items()},
+            'tournament_finished': self.tournament_finished,
+            'tournament_started': self.tournament_started
+        }
+    
+    def _meta(self) -> Dict:
+        """Round counters and flags only"""
+        return {
+            'current_round': self.current_round,
+            'total_rounds': self.total_rounds,
+            'tournament_finished': self.tournament_finished,
+            'tournament_started': self.tournament_started
+        }
+    
+    def _persist(self, operation: str, *args) -> None:
+        """Queue a storage operation on the persistence worker, or run it inline when it is not running"""
+        # Every mutation is persisted through here, so this is where the state version moves
+        self.version = next(_versions)
+        if persistence.running:
+            persistence.submit(self.storage, operation, *args)
+            return
         try:
-            data = {
-                'teams': self.teams,
-                'rounds': self.rounds,
-                'current_round': self.current_round,
-                'total_rounds': self.total_rounds,
-                'match_results': self.match_results,
-                'tournament_finished': self.tournament_finished,
-                'tournament_started': self.tournament_started
-            }
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.debug("Tournament data saved successfully")
+            with metrics.timer('persist_operation_seconds', operation=operation):
+                getattr(self.storage, operation)(*args)
         except Exception as e:
-            logger.error(f"Failed to save tournament data: {e}")
+            logger.error(f"Failed to persist tournament data ({operation}): {e}")
+    
+    def save_data(self) -> None:
+        """Save full bot data to storage (structural changes only)"""
+        self._persist('save_state', self.to_dict())
+        self._structure_version = self.version
+        logger.debug("Tournament data saved successfully")
     
     def load_data(self) -> None:
-        """Load bot data from file"""
+        """Load bot data from storage, migrating the legacy JSON file once"""
         try:
-            if self.data_file.exists():
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.teams = data.get('teams', [])
-                    self.rounds = {int(k): v for k, v in data.get('rounds', {}).items()}
-                    self.current_round = data.get('current_round', 1)
-                    self.total_rounds = data.get('total_rounds', 0)
-                    self.match_results = data.get('match_results', {})
-                    self.tournament_finished = data.get('tournament_finished', False)
-                    self.tournament_started = data.get('tournament_started', False)
+            with metrics.timer('load_seconds', backend=settings.storage_backend):
+                if self.data_file is not None:
+                    self.storage.migrate_json(self.data_file)
+                data = self.storage.load()
+            if data is not None:
+                self.teams = data.get('teams', [])
+                self._fixture_templates = {}
+                self.rounds = {
+                    int(k): {'matches': self._shared_fixtures(v.get('matches', [])), 'completed': v.get('completed', False)}
+                    for k, v in data.get('rounds', {}).items()
+                }
+                self.current_round = data.get('current_round', 1)
+                self.total_rounds = data.get('total_rounds', 0)
+                self.match_results = data.get('match_results', {})
+                self.tournament_finished = data.get('tournament_finished', False)
+                self.tournament_started = data.get('tournament_started', False)
+                migrated = self._migrate_match_ids()
+                self._rebuild_indexes()
+                if migrated:
+                    self.save_data()
+                self.version = self._structure_version = next(_versions)
                 logger.info("Tournament data loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load tournament data: {e}")
 
-
-# Global tournament instance
-tournament = FootballTournament()
@@ -0,0 +1,123 @@
+import logging
+import time
+from pathlib import Path
+from typing import Iterable, List
+from telegram.request import HTTPXRequest
+from bot.config.settings import settings
+from bot.database.worker import persistence
+from bot.handlers.router import callback_routes, input_routes, text_routes
+from bot.models.registry import tournaments
+from bot.utils.cache import render_cache
+from bot.utils.metrics import format_histogram, format_sample, metrics
+
+logger = logging.getLogger(__name__)
+
+METRICS = {
+    'handler_seconds': ('histogram', 'Update handler latency per route'),
+    'handler_errors_total': ('counter', 'Update handler exceptions per route'),
+    'load_seconds': ('histogram', 'Tournament load duration'),
+    'persist_operation_seconds': ('histogram', 'Storage operation duration'),
+    'persist_batch_seconds': ('histogram', 'Persistence worker batch duration'),
+    'persist_operations_total': ('counter', 'Storage operations written'),
+    'persist_operations_coalesced_total': ('counter', 'Storage operations dropped as redundant'),
+    'persist_pending': ('gauge', 'Storage operations waiting to be written'),
+    'storage_bytes_written_total': ('counter', 'Bytes written per storage backend (SQLite: values written)'),
+    'conversation_loads_total': ('counter', 'Users whose stored conversation state was loaded'),
+    'conversation_keys_written_total': ('counter', 'Changed user_data keys written or deleted'),
+    'data_file_bytes': ('gauge', 'Size of the tournament data on disk'),
+    'tournaments_loaded': ('gauge', 'Tournaments held in memory'),
+    'tournament_teams': ('gauge', 'Teams of the loaded tournaments, total and largest'),
+    'tournament_rounds': ('gauge', 'Rounds of the loaded tournaments, total and largest'),
+    'tournament_results': ('gauge', 'Recorded results of the loaded tournaments, total and largest'),
+    'render_cache_hits_total': ('counter', 'Render cache hits'),
+    'render_cache_misses_total': ('counter', 'Render cache misses'),
+    'render_cache_hit_ratio': ('gauge', 'Render cache hit ratio'),
+    'telegram_api_seconds': ('histogram', 'Bot API request latency per method'),
+    'telegram_api_errors_total': ('counter', 'Failed Bot API requests per method'),
+    'outbound_wait_seconds': ('histogram', 'Time outbound requests waited for their send slot'),
+    'outbound_retry_after_total': ('counter', 'Bot API flood limit (429) responses per method'),
+    'outbound_coalesced_total': ('counter', 'Message edits replaced by a newer pending edit'),
+    'shard_misrouted_updates_total': ('counter', 'Updates a worker received for a chat it does not own'),
+    'log_records_sampled_out_total': ('counter', 'Log records dropped by LOG_SAMPLE per logger'),
+}
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest recording Bot API latency and errors per method"""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            metrics.inc('telegram_api_errors_total', method=api_method)
+            raise
+        finally:
+            metrics.observe('telegram_api_seconds', time.perf_counter() - started, method=api_method)
+        if code >= 400:
+            metrics.inc('telegram_api_errors_total', method=api_method)
+        return code, payload
+
+
+def _data_size() -> int:
+    if settings.storage_backend == "journal":
+        paths = (settings.data_dir / "journal").rglob("*")
+    else:
+        db_file = settings.data_dir / settings.database_file
+        paths = [db_file, Path(f"{db_file}-wal")]
+    return sum(path.stat().st_size for path in paths if path.is_file())
+
+
+def collect_routes() -> Iterable[str]:
+    lines: List[str] = metrics.header('handler_seconds')
+    errors = metrics.header('handler_errors_total')
+    for router in (callback_routes, text_routes, input_routes):
+        for route in router.routes():
+            if not route.count:
+                continue
+            labels = {'router': router.name, 'route': route.name}
+            lines.extend(format_histogram('handler_seconds', route.latency, labels))
+            errors.append(format_sample('handler_errors_total', route.errors, labels))
+    return lines + errors
+
+
+def collect_state() -> Iterable[str]:
+    loaded = tournaments.loaded()
+    lines = metrics.header('persist_pending') + [format_sample('persist_pending', persistence.pending)]
+    lines += metrics.header('data_file_bytes') + [format_sample('data_file_bytes', _data_size())]
+    lines += metrics.header('tournaments_loaded') + [format_sample('tournaments_loaded', len(loaded))]
+    # Aggregated, a series per tournament would mean one per chat
+    for name, value in (
+        ('tournament_teams', lambda t: len(t.teams)),
+        ('tournament_rounds', lambda t: len(t.rounds)),
+        ('tournament_results', lambda t: len(t.match_results))
+    ):
+        values = [value(t) for t in loaded]
+        lines += metrics.header(name)
+        lines += [
+            format_sample(name, sum(values), {'stat': 'total'}),
+            format_sample(name, max(values, default=0), {'stat': 'max'})
+        ]
+    return lines
+
+
+def collect_render_cache() -> Iterable[str]:
+    stats = render_cache.stats()
+    lines = []
+    for name, value in (
+        ('render_cache_hits_total', stats['hits']),
+        ('render_cache_misses_total', stats['misses']),
+        ('render_cache_hit_ratio', stats['hit_rate'])
+    ):
+        lines += metrics.header(name) + [format_sample(name, value)]
+    return lines
+
+
+def start_metrics_server() -> None:
+    """Register collectors and serve /metrics on the configured port"""
+    for name, (kind, help_text) in METRICS.items():
+        metrics.describe(name, kind, help_text)
+    for collector in (collect_routes, collect_state, collect_render_cache):
+        metrics.add_collector(collector)
+    metrics.serve(settings.metrics_listen, settings.metrics_port)
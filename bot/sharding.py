@@ -0,0 +1,321 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+import signal
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+import tornado.httpserver
+import tornado.web
+from bot.config.settings import settings
+from bot.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Same update types as main.py and bot.webhook
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+# Updates this worker received for chats another worker owns, see check_shard()
+misrouted = 0
+
+
+def shard_for(chat_id: int, shards: int) -> int:
+    """Index of the worker owning a chat, stable across restarts and machines"""
+    return zlib.crc32(str(chat_id).encode()) % shards
+
+
+def routing_key(update: Dict) -> int:
+    """Chat an update belongs to, its sender when it has no chat"""
+    query = update.get('callback_query')
+    if query is not None:
+        message = query.get('message')
+        return message['chat']['id'] if message else query['from']['id']
+    for value in update.values():
+        if isinstance(value, dict):
+            if isinstance(value.get('chat'), dict):
+                return value['chat']['id']
+            if isinstance(value.get('from'), dict):
+                return value['from']['id']
+    return 0
+
+
+async def check_shard(update, context) -> None:
+    """Count updates for chats this worker does not own (runs before every handler)"""
+    global misrouted
+    chat = update.effective_chat
+    if chat is None or settings.shard_index is None:
+        return
+    owner = shard_for(chat.id, settings.shard_count)
+    if owner != settings.shard_index:
+        misrouted += 1
+        metrics.inc('shard_misrouted_updates_total')
+        logger.warning(f"Worker {settings.shard_index} got an update for chat {chat.id} owned by worker {owner}")
+
+
+class ShardWorker:
+    """One bot process (main.py in webhook mode) and the updates queued for it
+
+    The worker listens on localhost only and accepts updates carrying the
+    supervisor's secret token. Updates are forwarded one at a time, so a
+    chat's updates reach its worker in the order they arrived.
+    """
+
+    def __init__(self, index: int, count: int, port: int, secret: str):
+        self.index = index
+        self.count = count
+        self.port = port
+        self.secret = secret
+        self.queue: "asyncio.Queue[Dict]" = asyncio.Queue()
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.restarts = 0
+        self.forwarded = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def environment(self) -> Dict[str, str]:
+        log_dir = settings.log_dir / f"worker-{self.index}"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        return {
+            **os.environ,
+            'RUN_MODE': "webhook",
+            'WEBHOOK_LISTEN': "127.0.0.1",
+            'WEBHOOK_PORT': str(self.port),
+            # The supervisor owns the public webhook, workers never register one
+            'WEBHOOK_URL': "",
+            'WEBHOOK_SECRET_TOKEN': self.secret,
+            'SHARD_INDEX': str(self.index),
+            'SHARD_COUNT': str(self.count),
+            'LOG_DIR': str(log_dir),
+            'METRICS_PORT': str(settings.metrics_port + self.index),
+            # Every worker sends on its own, together they keep the bot-wide budget
+            'SEND_GLOBAL_RATE': str(settings.send_global_rate / self.count),
+        }
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, str(ROOT / "main.py"), cwd=str(ROOT), env=self.environment(),
+            # Ctrl+C reaches the supervisor only, it stops the workers once their updates are handed over
+            start_new_session=True
+        )
+        logger.info(f"Started worker {self.index} (pid {self.process.pid}) on port {self.port}")
+
+    async def forward(self, client: httpx.AsyncClient) -> None:
+        """Post queued updates to the worker, waiting while it is down or starting"""
+        url = self.url + _path(settings.webhook_path)
+        headers = {'Content-Type': "application/json", 'X-Telegram-Bot-Api-Secret-Token': self.secret}
+        while True:
+            update = await self.queue.get()
+            try:
+                delay = 0.05
+                while True:
+                    try:
+                        response = await client.post(url, content=json.dumps(update), headers=headers)
+                        break
+                    except httpx.TransportError:
+                        await asyncio.sleep(delay)
+                        delay = min(delay * 2, 1.0)
+                if response.status_code != 200:
+                    logger.error(f"Worker {self.index} rejected update {update.get('update_id')}: {response.status_code}")
+                self.forwarded += 1
+            finally:
+                self.queue.task_done()
+
+    async def health(self, client: httpx.AsyncClient) -> Dict:
+        status = {
+            'index': self.index,
+            'pid': self.process.pid if self.process else None,
+            'port': self.port,
+            'restarts': self.restarts,
+            'queued': self.queue.qsize(),
+            'forwarded': self.forwarded,
+        }
+        try:
+            response = await client.get(self.url + _path(settings.webhook_health_path), timeout=2.0)
+            status['health'] = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            status['health'] = {'status': 'unreachable', 'error': str(e)}
+        return status
+
+
+class Supervisor:
+    """Runs worker processes and routes every update to the owner of its chat
+
+    A chat always hashes to the same worker, so each tournament lives in
+    exactly one process and the workers need no locking between them. All
+    workers share DATA_DIR (the SQLite database, journal and archive
+    directories). Workers that exit are restarted; their updates wait in
+    the queue meanwhile.
+    """
+
+    def __init__(self, workers: int):
+        secret = secrets.token_urlsafe(24)
+        self.workers = [ShardWorker(index, workers, settings.shard_base_port + index, secret) for index in range(workers)]
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    def dispatch(self, update: Dict) -> None:
+        """Queue an update for the worker owning its chat"""
+        worker = self.workers[shard_for(routing_key(update), len(self.workers))]
+        worker.queue.put_nowait(update)
+
+    async def start(self) -> None:
+        self._client = httpx.AsyncClient(timeout=10.0)
+        for worker in self.workers:
+            await worker.start()
+            self._tasks.append(asyncio.create_task(worker.forward(self._client)))
+            self._tasks.append(asyncio.create_task(self._watch(worker)))
+
+    async def _watch(self, worker: ShardWorker) -> None:
+        """Restart a worker that exits while the supervisor is running"""
+        while True:
+            code = await worker.process.wait()
+            if self._stopping:
+                return
+            worker.restarts += 1
+            logger.error(f"Worker {worker.index} exited with code {code}, restarting")
+            await asyncio.sleep(1.0)
+            await worker.start()
+
+    async def health(self) -> Dict:
+        workers = await asyncio.gather(*(worker.health(self._client) for worker in self.workers))
+        return {'status': 'ok', 'workers': list(workers)}
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Hand over queued updates, then stop the workers (they flush their writes)"""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(worker.queue.join() for worker in self.workers)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {sum(w.queue.qsize() for w in self.workers)} updates not forwarded on shutdown")
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        for worker in self.workers:
+            if worker.process and worker.process.returncode is None:
+                worker.process.send_signal(signal.SIGTERM)
+        for worker in self.workers:
+            if worker.process:
+                await worker.process.wait()
+        await self._client.aclose()
+        logger.info("All workers stopped")
+
+
+class DispatchHandler(tornado.web.RequestHandler):
+    """Receives Telegram's webhook posts and queues them for their worker"""
+
+    SUPPORTED_METHODS = ("POST",)
+
+    def initialize(self, supervisor: Supervisor) -> None:
+        self.supervisor = supervisor
+
+    def post(self) -> None:
+        token = settings.webhook_secret_token
+        if token and self.request.headers.get('X-Telegram-Bot-Api-Secret-Token') != token:
+            raise tornado.web.HTTPError(403)
+        try:
+            update = json.loads(self.request.body)
+        except ValueError:
+            raise tornado.web.HTTPError(400)
+        self.supervisor.dispatch(update)
+
+
+class ShardHealthHandler(tornado.web.RequestHandler):
+    """Supervisor status with the health of every worker"""
+
+    SUPPORTED_METHODS = ("GET",)
+
+    def initialize(self, supervisor: Supervisor) -> None:
+        self.supervisor = supervisor
+
+    async def get(self) -> None:
+        self.write(await self.supervisor.health())
+
+
+def _path(path: str) -> str:
+    return path if path.startswith("/") else f"/{path}"
+
+
+async def _api(client: httpx.AsyncClient, method: str, **params):
+    base_url = (settings.telegram_base_url or "https://api.telegram.org").rstrip("/")
+    response = await client.post(f"{base_url}/bot{settings.bot_token}/{method}", json=params)
+    payload = response.json()
+    if not payload.get('ok'):
+        raise RuntimeError(f"{method} failed: {payload.get('description')}")
+    return payload['result']
+
+
+async def poll(supervisor: Supervisor, stop: asyncio.Event) -> None:
+    """Fetch updates with getUpdates and dispatch them until stop is set"""
+    offset = 0
+    async with httpx.AsyncClient(timeout=40.0) as client:
+        await _api(client, "deleteWebhook")
+        try:
+            while not stop.is_set():
+                try:
+                    updates = await _api(client, "getUpdates", offset=offset, timeout=30, allowed_updates=ALLOWED_UPDATES)
+                except (httpx.HTTPError, RuntimeError, ValueError) as e:
+                    logger.error(f"getUpdates failed: {e}")
+                    await asyncio.sleep(1.0)
+                    continue
+                for update in updates:
+                    supervisor.dispatch(update)
+                    offset = update['update_id'] + 1
+        finally:
+            if offset:
+                # Confirm the dispatched updates so they are not delivered again after a restart
+                await _api(client, "getUpdates", offset=offset, timeout=0, limit=1)
+
+
+async def run_supervisor(workers: int) -> None:
+    """Run the workers and feed them from polling or the webhook until SIGINT/SIGTERM"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    supervisor = Supervisor(workers)
+    await supervisor.start()
+    server = polling = None
+    try:
+        if settings.run_mode == "webhook":
+            app = tornado.web.Application([
+                (_path(settings.webhook_path), DispatchHandler, {'supervisor': supervisor}),
+                (_path(settings.webhook_health_path), ShardHealthHandler, {'supervisor': supervisor}),
+            ])
+            server = tornado.httpserver.HTTPServer(app)
+            server.listen(settings.webhook_port, settings.webhook_listen)
+            if settings.webhook_url:
+                params = {
+                    'url': settings.webhook_url.rstrip("/") + _path(settings.webhook_path),
+                    'allowed_updates': ALLOWED_UPDATES,
+                }
+                if settings.webhook_secret_token:
+                    params['secret_token'] = settings.webhook_secret_token
+                async with httpx.AsyncClient(timeout=10.0) as client:
+                    await _api(client, "setWebhook", **params)
+            logger.info(
+                f"Dispatching to {workers} workers from {settings.webhook_listen}:{settings.webhook_port}"
+                f"{_path(settings.webhook_path)}"
+            )
+        else:
+            polling = asyncio.create_task(poll(supervisor, stop))
+            logger.info(f"Dispatching to {workers} workers from getUpdates")
+        await stop.wait()
+    finally:
+        if server is not None:
+            server.stop()
+        if polling is not None:
+            polling.cancel()
+            await asyncio.gather(polling, return_exceptions=True)
+        await supervisor.stop()
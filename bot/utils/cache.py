@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import logging
+from bot.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """Bounded LRU cache of rendered messages keyed by tournament state version
+
+    Entries are keyed by (tournament id, tournament version, view, args).
+    Every mutation bumps the tournament version, so stale entries are never
+    returned; they simply age out of the LRU. Views depending on only part
+    of the state pass a narrower ``version`` of their own.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_render(self, tournament, view: str, render: Callable[[], Any], *args: Hashable,
+                      version: Optional[Hashable] = None) -> Any:
+        """Return the cached rendering of a view, rendering it on a miss"""
+        if version is None:
+            version = tournament.version
+        key = (tournament.tournament_id, version, view) + args
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            value = render()
+            self._entries[key] = value
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries)
+        }
+
+
+# Global render cache shared by all handlers
+render_cache = RenderCache(settings.render_cache_size)
@@ -0,0 +1,46 @@
+import base64
+import binascii
+import logging
+import struct
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# Compact callbacks start with this marker, no plain callback string does
+COMPACT_MARKER = "~"
+
+# Compact callback kinds: tag -> (action, struct format of the packed arguments)
+COMPACT_KINDS = {
+    'r': ('result', '>HH'),            # round number, fixture index
+    'p': ('results_page', '>HH?'),     # round number, page, pending only
+}
+_TAGS = {action: (tag, fmt) for tag, (action, fmt) in COMPACT_KINDS.items()}
+
+
+def encode_callback(action: str, *args: int) -> str:
+    """Pack an action and its integer arguments into short callback data"""
+    tag, fmt = _TAGS[action]
+    payload = base64.urlsafe_b64encode(struct.pack(fmt, *args)).rstrip(b"=").decode("ascii")
+    return f"{COMPACT_MARKER}{tag}{payload}"
+
+
+def decode_callback(data: str) -> Tuple[str, tuple]:
+    """Split callback data into (action, args)
+
+    Compact callbacks decode to their action and unpacked arguments, any
+    other callback string is its own action with no arguments.
+    """
+    if not data.startswith(COMPACT_MARKER) or len(data) < 2:
+        return data, ()
+
+    kind = COMPACT_KINDS.get(data[1])
+    if kind is None:
+        return data, ()
+    action, fmt = kind
+    payload = data[2:]
+    try:
+        args = struct.unpack(fmt, base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (binascii.Error, struct.error):
+        logger.warning(f"Malformed callback data: {data}")
+        return data, ()
+    return action, args
@@ -1,87 +1,31 @@
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import logging
+import re
+from bot.models.columnar import ResultColumns, team_table
 
 logger = logging.getLogger(__name__)
 
 
-def calculate_team_statistics(teams: List[str], match_results: Dict[str, Dict]) -> Dict:
-    """Calculate comprehensive team statistics"""
-    teams_stats = {}
-    
-    # Initialize stats for all teams
-    for team in teams:
-        teams_stats[team] = {
-            'points': 0,
-            'played': 0,
-            'won': 0,
-            'drawn': 0,
-            'lost': 0,
-            'goals_for': 0,
-            'goals_against': 0,
-            'goal_difference': 0
-        }
-    
-    # Process all match results
-    for match_id, result in match_results.items():
-        try:
-            # Parse match_id to extract teams: "R1_TeamA_vs_TeamB"
-            parts = match_id.split('_')
-            if len(parts) < 4:
-                continue
-                
-            home_team = parts[1]
-            away_team = parts[3]
-            
-            if home_team not in teams_stats or away_team not in teams_stats:
-                continue
-            
-            home_score = result['home_score']
-            away_score = result['away_score']
-            
-            # Update match count
-            teams_stats[home_team]['played'] += 1
-            teams_stats[away_team]['played'] += 1
-            
-            # Update goals
-            teams_stats[home_team]['goals_for'] += home_score
-            teams_stats[home_team]['goals_against'] += away_score
-            teams_stats[away_team]['goals_for'] += away_score
-            teams_stats[away_team]['goals_against'] += home_score
-            
-            # Update points and match results
-            if home_score > away_score:  # Home team wins
-                teams_stats[home_team]['points'] += 3
-                teams_stats[home_team]['won'] += 1
-                teams_stats[away_team]['lost'] += 1
-            elif home_score < away_score:  # Away team wins
-                teams_stats[away_team]['points'] += 3
-                teams_stats[away_team]['won'] += 1
-                teams_stats[home_team]['lost'] += 1
-            else:  # Draw
-                teams_stats[home_team]['points'] += 1
-                teams_stats[away_team]['points'] += 1
-                teams_stats[home_team]['drawn'] += 1
-                teams_stats[away_team]['drawn'] += 1
-        except (KeyError, IndexError, ValueError) as e:
-            logger.error(f"Error processing match {match_id}: {e}")
-    
-    # Calculate goal difference
-    for team in teams_stats:
-        teams_stats[team]['goal_difference'] = (
-            teams_stats[team]['goals_for'] - teams_stats[team]['goals_against']
-        )
-    
-    return teams_stats
+def calculate_team_statistics(teams: List[str], results: Iterable[Tuple[int, str, str, Dict]]) -> Dict:
+    """Calculate comprehensive team statistics from (round, home, away, result) rows"""
+    columns = ResultColumns(teams)
+    columns.extend_season("current", [], results)
+    return team_table(columns, teams)
 
 
-def format_tournament_table(teams_stats: Dict) -> Tuple[str, List]:
-    """Format tournament table as string"""
-    # Sort teams by points (descending), then by goal difference, then by goals for
-    sorted_teams = sorted(
+def sort_standings(teams_stats: Dict) -> List[Tuple[str, Dict]]:
+    """Order teams by points (descending), then by goal difference, then by goals for"""
+    return sorted(
         teams_stats.items(),
         key=lambda x: (x[1]['points'], x[1]['goal_difference'], x[1]['goals_for']),
         reverse=True
     )
+
+
+def format_tournament_table(teams_stats: Dict, sorted_teams: Optional[List[Tuple[str, Dict]]] = None) -> Tuple[str, List]:
+    """Format tournament table as string, in the given order if sorted_teams is passed"""
+    if sorted_teams is None:
+        sorted_teams = sort_standings(teams_stats)
     
     table_text = "🏆 **Tournament Table**\n\n"
     table_text += "```"
@@ -98,8 +42,8 @@ def format_tournament_table(teams_stats: Dict) -> Tuple[str, List]:
     return table_text, sorted_teams
 
 
-def format_detailed_stats(teams_stats: Dict, tournament_rounds: Dict) -> str:
-    """Format detailed tournament statistics"""
+def format_detailed_stats(teams_stats: Dict, tournament_rounds: Dict, round_totals: Optional[Dict[int, Dict]] = None) -> str:
+    """Format detailed tournament statistics, with per-round figures when round_totals is given"""
     stats_text = "📊 **Detailed Tournament Statistics**\n\n"
     
     # Top scorers (by goals for)
@@ -120,8 +64,8 @@ def format_detailed_stats(teams_stats: Dict, tournament_rounds: Dict) -> str:
     for i, (team, stats) in enumerate(most_wins[:5], 1):
         stats_text += f"{i}. {team}: {stats['won']} wins\n"
     
-    # Calculate total goals and matches
-    total_goals = sum(stats['goals_for'] for stats in teams_stats.values()) // 2
+    # Calculate total goals and matches (every goal is in exactly one team's goals_for)
+    total_goals = sum(stats['goals_for'] for stats in teams_stats.values())
     total_matches = sum(stats['played'] for stats in teams_stats.values()) // 2
     
     stats_text += f"\n📈 **Tournament Overview:**\n"
@@ -137,8 +81,102 @@ def format_detailed_stats(teams_stats: Dict, tournament_rounds: Dict) -> str:
         if round_num in tournament_rounds:
             status = "✅ Complete" if tournament_rounds[round_num]['completed'] else "⏳ In Progress"
             matches_in_round = len(tournament_rounds[round_num]['matches'])
-            completed_in_round = sum(1 for home, away in tournament_rounds[round_num]['matches'] 
-                                   if f"R{round_num}_{home}_vs_{away}".replace(" ", "_") in tournament_rounds)
-            stats_text += f"Round {round_num}: {completed_in_round}/{matches_in_round} matches - {status}\n"
+            if round_totals is None:
+                stats_text += f"Round {round_num}: {matches_in_round} matches - {status}\n"
+                continue
+            totals = round_totals.get(round_num, {'matches': 0, 'goals': 0})
+            goals_text = f", {totals['goals'] / totals['matches']:.1f} goals/match" if totals['matches'] else ""
+            stats_text += f"Round {round_num}: {totals['matches']}/{matches_in_round} matches{goals_text} - {status}\n"
     
     return stats_text
+
+
+def format_all_time_table(table: Dict, seasons: int) -> str:
+    """Format the all-time table of archived seasons"""
+    text = f"📚 **All-Time Table** ({seasons} season{'s' if seasons != 1 else ''})\n\n"
+    text += "```"
+    text += f"{'Pos':<3} {'Team':<12} {'S':<2} {'T':<2} {'P':<3} {'W':<3} {'D':<3} {'L':<3} {'GD':<4} {'Pts':<3}\n"
+    text += "-" * 48 + "\n"
+    for pos, (team, stats) in enumerate(sort_standings(table), 1):
+        gd_str = f"+{stats['goal_difference']}" if stats['goal_difference'] > 0 else str(stats['goal_difference'])
+        text += f"{pos:<3} {team[:12]:<12} {stats['seasons']:<2} {stats['titles']:<2} {stats['played']:<3} {stats['won']:<3} "
+        text += f"{stats['drawn']:<3} {stats['lost']:<3} {gd_str:<4} {stats['points']:<3}\n"
+    text += "```\n"
+    text += "**Legend:** S=Seasons, T=Titles, P=Played, W=Won, D=Drawn, L=Lost, GD=Goal Difference, Pts=Points"
+    return text
+
+
+def format_team_record(team: str, totals: Dict, history: Dict[str, Dict]) -> str:
+    """Format a team's all-time totals and season by season record"""
+    text = f"📚 **{team} - All-Time Record**\n\n"
+    text += f"Seasons: {totals['seasons']}\n"
+    text += f"Played: {totals['played']} (W{totals['won']} D{totals['drawn']} L{totals['lost']})\n"
+    text += f"Goals: {totals['goals_for']}:{totals['goals_against']}\n"
+    text += f"Points: {totals['points']}\n"
+    text += "\n📅 **By Season:**\n"
+    for season, stats in history.items():
+        text += f"{season}: {stats['points']} pts, W{stats['won']} D{stats['drawn']} L{stats['lost']}, {stats['goals_for']}:{stats['goals_against']}\n"
+    return text
+
+
+def format_head_to_head(team: str, opponent: str, table: Dict, meetings: List[Tuple], limit: int = 10) -> str:
+    """Format the archived meetings of two teams, latest first"""
+    stats = table[team]
+    text = f"⚔️ **{team} vs {opponent}**\n\n"
+    text += f"Meetings: {stats['played']}\n"
+    text += f"{team} wins: {stats['won']}, draws: {stats['drawn']}, {opponent} wins: {stats['lost']}\n"
+    text += f"Goals: {stats['goals_for']}-{stats['goals_against']}\n"
+    if meetings:
+        text += f"\n📅 **Last Meetings:**\n"
+        for season, round_num, home, away, home_score, away_score in reversed(meetings[-limit:]):
+            text += f"{season} R{round_num}: {home} {home_score}-{away_score} {away}\n"
+    return text
+
+
+# "12 2-1" / "#12: 2-1" and "Home 2-1 Away"
+_FIXTURE_LINE = re.compile(r"^#?(\d+)[.):]?\s+(\d+)\s*[-:]\s*(\d+)$")
+_TEAMS_LINE = re.compile(r"^(.+?)\s+(\d+)\s*[-:]\s*(\d+)\s+(.+)$")
+
+
+def parse_bulk_results(text: str, matches: List[Tuple[str, str]]) -> Tuple[List[Tuple[int, int, int]], List[str]]:
+    """Parse one result per line against a round's fixtures
+
+    Returns (fixture index, home score, away score) for every valid line and
+    a message for every invalid one.
+    """
+    fixtures = {(home.casefold(), away.casefold()): i for i, (home, away) in enumerate(matches)}
+    results: List[Tuple[int, int, int]] = []
+    errors: List[str] = []
+    seen: Dict[int, int] = {}
+    
+    for line_num, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        
+        match = _FIXTURE_LINE.match(line)
+        if match:
+            index = int(match.group(1)) - 1
+            if not 0 <= index < len(matches):
+                errors.append(f"Line {line_num}: there is no match #{index + 1}")
+                continue
+        else:
+            match = _TEAMS_LINE.match(line)
+            if not match:
+                errors.append(f"Line {line_num}: can't read '{line}'")
+                continue
+            home, away = match.group(1).strip(), match.group(4).strip()
+            index = fixtures.get((home.casefold(), away.casefold()))
+            if index is None:
+                errors.append(f"Line {line_num}: {home} vs {away} is not a match of this round")
+                continue
+        
+        if index in seen:
+            errors.append(f"Line {line_num}: {matches[index][0]} vs {matches[index][1]} already given on line {seen[index]}")
+            continue
+        seen[index] = line_num
+        results.append((index, int(match.group(2)), int(match.group(3))))
+    
+    if not results and not errors:
+        errors.append("No results found")
+    return results, errors
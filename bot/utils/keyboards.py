@@ -1,5 +1,6 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
 from typing import List, Tuple, Dict, Optional
+from bot.utils.callback_data import encode_callback
 
 
 class Keyboards:
@@ -57,20 +58,44 @@ class Keyboards:
         return InlineKeyboardMarkup([[InlineKeyboardButton("❌ Cancel", callback_data="cancel")]])
     
     @staticmethod
-    def match_results(matches: List[Tuple[str, str]], round_num: int, match_results: Dict, additional_buttons: Optional[List[Dict]] = []) -> InlineKeyboardMarkup:
-        """Create match results keyboard"""
-        keyboard = [] + additional_buttons
+    def match_results(matches: List[Tuple[str, str]], round_num: int, results: List[Optional[Dict]],
+                      additional_buttons: Optional[List[List[InlineKeyboardButton]]] = None,
+                      page: int = 0, page_size: int = 10, pending_only: bool = False) -> InlineKeyboardMarkup:
+        """Create one page of the match results keyboard, results[i] being the result of matches[i] or None"""
+        keyboard = list(additional_buttons or [])
         
-        for i, (home, away) in enumerate(matches):
-            match_id = f"R{round_num}_{home}_vs_{away}".replace(" ", "_")
-            result = match_results.get(match_id, {})
+        indices = range(len(matches))
+        if pending_only:
+            indices = [i for i in indices if not results[i]]
+        
+        total_pages = max(1, -(-len(indices) // page_size))
+        page = min(max(page, 0), total_pages - 1)
+        
+        for i in indices[page * page_size:(page + 1) * page_size]:
+            home, away = matches[i]
+            result = results[i]
             
             if result:
-                button_text = f"✅ {home} {result['home_score']}-{result['away_score']} {away}"
+                button_text = f"✅ {i + 1}. {home} {result['home_score']}-{result['away_score']} {away}"
             else:
-                button_text = f"⏳ {home} vs {away}"
+                button_text = f"⏳ {i + 1}. {home} vs {away}"
             
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=f"result_{match_id}")])
+            keyboard.append([InlineKeyboardButton(button_text, callback_data=encode_callback('result', round_num, i))])
+        
+        if total_pages > 1:
+            nav_row = []
+            if page > 0:
+                nav_row.append(InlineKeyboardButton("⬅️", callback_data=encode_callback('results_page', round_num, page - 1, pending_only)))
+            nav_row.append(InlineKeyboardButton(f"{page + 1}/{total_pages}", callback_data="noop"))
+            if page < total_pages - 1:
+                nav_row.append(InlineKeyboardButton("➡️", callback_data=encode_callback('results_page', round_num, page + 1, pending_only)))
+            keyboard.append(nav_row)
+        
+        if pending_only:
+            filter_button = InlineKeyboardButton("📋 Show All", callback_data=encode_callback('results_page', round_num, 0, False))
+        else:
+            filter_button = InlineKeyboardButton("⏳ Pending Only", callback_data=encode_callback('results_page', round_num, 0, True))
+        keyboard.append([filter_button, InlineKeyboardButton("📝 Bulk Entry", callback_data="bulk_results")])
         
         return InlineKeyboardMarkup(keyboard)
     
@@ -0,0 +1,162 @@
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Dict, List, Optional
+from bot.config.settings import settings
+from bot.utils.metrics import metrics
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# The background listener writing queued records, see setup_logging()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def parse_sampling(text: Optional[str]) -> Dict[str, int]:
+    """Parse "logger=N,..." into {logger: keep one record in N}"""
+    rates = {}
+    for item in (text or "").split(","):
+        name, _, every = item.partition("=")
+        if not name.strip():
+            continue
+        try:
+            rates[name.strip()] = max(1, int(every))
+        except ValueError:
+            logging.getLogger(__name__).warning(f"Ignoring invalid log sampling entry: {item.strip()}")
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in N records below WARNING for the configured loggers
+
+    A configured logger also covers its children, the most specific entry
+    wins. WARNING and above always pass.
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = rates
+        self._counters: Dict[str, itertools.count] = {name: itertools.count() for name in rates}
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> Optional[str]:
+        entry = self._resolved.get(name, False)
+        if entry is False:
+            matches = [key for key in self.rates if name == key or name.startswith(key + ".")]
+            entry = self._resolved[name] = max(matches, key=len) if matches else None
+        return entry
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        entry = self._entry(record.name)
+        if entry is None:
+            return True
+        with self._lock:
+            keep = next(self._counters[entry]) % self.rates[entry] == 0
+        if not keep:
+            metrics.inc('log_records_sampled_out_total', logger=entry)
+        return keep
+
+
+class PreparedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that renders the message and traceback before enqueueing
+
+    Formatting stays on the listener thread; only the arguments are merged
+    here so the record no longer references mutable caller objects.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _file_handler() -> logging.Handler:
+    log_file = settings.log_dir / "bot.log"
+    if settings.log_rotate_when:
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file, when=settings.log_rotate_when, backupCount=settings.log_backup_count, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=settings.log_max_bytes, backupCount=settings.log_backup_count, encoding="utf-8"
+    )
+
+
+def build_handlers() -> List[logging.Handler]:
+    """File and console handlers writing on the listener thread"""
+    formatter = JsonFormatter() if settings.log_format == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [_file_handler(), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def setup_logging() -> None:
+    """Route all logging through a queue drained by a background thread"""
+    global _listener
+    if _listener is not None:
+        return
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handlers = build_handlers()
+    queue_handler = PreparedQueueHandler(records)
+    # Sampled records are dropped before they are copied and queued
+    queue_handler.addFilter(SamplingFilter(parse_sampling(settings.log_sample)))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, settings.log_level))
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the listener thread
+
+    The file and console handlers are attached to the root logger directly
+    afterwards, so messages logged late in shutdown are still written.
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    for handler in listener.handlers:
+        root.addHandler(handler)
@@ -0,0 +1,189 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from bot.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "sunday_league_"
+
+# Upper bounds of the latency histogram buckets in seconds, the last bucket is unbounded
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile"""
+        count = sum(self.counts)
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def format_sample(name: str, value: float, labels: Optional[Dict] = None) -> str:
+    """One sample line in Prometheus text format"""
+    return f"{PREFIX}{name}{_labels(labels or {})} {value}"
+
+
+def format_histogram(name: str, histogram: LatencyHistogram, labels: Optional[Dict] = None) -> List[str]:
+    """Cumulative bucket, sum and count lines of a histogram"""
+    labels = labels or {}
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+        cumulative += count
+        le = "+Inf" if bound == float('inf') else repr(bound)
+        lines.append(format_sample(f"{name}_bucket", cumulative, {**labels, 'le': le}))
+    lines.append(format_sample(f"{name}_sum", histogram.total, labels))
+    lines.append(format_sample(f"{name}_count", cumulative, labels))
+    return lines
+
+
+class Metrics:
+    """Process-local metrics registry exposed in Prometheus text format
+
+    Counters and histograms are updated in place by instrumented code. When
+    disabled every update returns immediately. Gauges are computed at
+    scrape time by registered collectors.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple], LatencyHistogram] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        """Register the TYPE and HELP lines of a metric"""
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increase a counter"""
+        if not self.enabled:
+            return
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Record a duration in a histogram"""
+        if not self.enabled:
+            return
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time the enclosed block into a histogram"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Register a callable producing sample lines at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        lines: Dict[str, List[str]] = {}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                lines.setdefault(name, []).append(format_sample(name, value, dict(labels)))
+            for (name, labels), histogram in self._histograms.items():
+                lines.setdefault(name, []).extend(format_histogram(name, histogram, dict(labels)))
+
+        output = []
+        for name, samples in lines.items():
+            output.extend(self.header(name))
+            output.extend(samples)
+        for collector in self._collectors:
+            try:
+                output.extend(collector())
+            except Exception as e:
+                logger.error(f"Metrics collector {collector.__name__} failed: {e}")
+        return "\n".join(output) + "\n"
+
+    def header(self, name: str) -> List[str]:
+        """HELP and TYPE lines of a described metric"""
+        if name not in self._help:
+            return []
+        kind, help_text = self._help[name]
+        return [f"# HELP {PREFIX}{name} {help_text}", f"# TYPE {PREFIX}{name} {kind}"]
+
+    def serve(self, host: str, port: int) -> None:
+        """Serve /metrics from a background thread"""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                logger.debug(format % args)
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info(f"Metrics served on http://{host}:{self._server.server_port}/metrics")
+
+    def stop(self) -> None:
+        """Stop the metrics server"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Global metrics registry, only recording when METRICS_ENABLED is set
+metrics = Metrics(settings.metrics_enabled)
@@ -0,0 +1,208 @@
+import asyncio
+import datetime
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, Hashable, Optional, Tuple, Union
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from bot.config.settings import settings
+from bot.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Edits where only the latest pending content of a message needs to reach Telegram
+COALESCED_ENDPOINTS = ("editMessageText", "editMessageReplyMarkup", "editMessageCaption")
+
+# Per-chat buckets kept before idle ones are dropped
+MAX_CHAT_BUCKETS = 1024
+
+
+class TokenBucket:
+    """Token bucket handing out send slots in arrival order
+
+    Reserving may drive the balance negative; the caller then waits until
+    its token has been refilled, so concurrent senders queue up fairly.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it"""
+        self._refill()
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self.rate)
+
+    def idle(self) -> bool:
+        """Whether the bucket is full again"""
+        self._refill()
+        return self._tokens >= self.burst
+
+
+class PendingEdit:
+    """An edit waiting for its send slot, later edits replace its request"""
+
+    def __init__(self, request: Tuple[Callable, Any, Dict], future: asyncio.Future):
+        self.request = request
+        self.future = future
+
+
+class FloodControl(BaseRateLimiter[int]):
+    """Outbound rate limiter keeping the bot inside Telegram's flood limits
+
+    Requests to a chat take a slot from that chat's bucket (private chats
+    and groups have separate rates) and then from the global bucket.
+    Requests without a chat_id, such as answerCallbackQuery, are not
+    budgeted. A RetryAfter pauses only the chat it came from (everything
+    for requests without a chat) and the request is retried up to
+    max_retries times, or ``rate_limit_args`` when given.
+
+    While an edit of a message waits for its slot, further edits of the
+    same message only replace its content. One request is sent and every
+    caller receives its result.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1.0, group_per_minute: float = 20,
+                 burst: float = 3, max_retries: int = 3):
+        self.chat_rate = chat_rate
+        self.group_rate = group_per_minute / 60
+        self.burst = burst
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_rate) if global_rate > 0 else None
+        self._chats: Dict[Union[int, str], TokenBucket] = {}
+        self._paused_until: Dict[Optional[Union[int, str]], float] = {}
+        self._edits: Dict[Hashable, PendingEdit] = {}
+
+    @classmethod
+    def from_settings(cls) -> "FloodControl":
+        return cls(
+            global_rate=settings.send_global_rate,
+            chat_rate=settings.send_chat_rate,
+            group_per_minute=settings.send_group_per_minute,
+            burst=settings.send_burst,
+            max_retries=settings.send_max_retries
+        )
+
+    async def initialize(self) -> None:
+        """Nothing to set up, buckets are created on demand"""
+
+    async def shutdown(self) -> None:
+        """Forget budgets and pauses"""
+        self._chats.clear()
+        self._paused_until.clear()
+
+    @staticmethod
+    def _chat(chat_id) -> Optional[Union[int, str]]:
+        if chat_id is None:
+            return None
+        try:
+            return int(chat_id)
+        except (TypeError, ValueError):
+            # "@channelusername"
+            return str(chat_id)
+
+    def _bucket(self, chat: Union[int, str]) -> Optional[TokenBucket]:
+        bucket = self._chats.get(chat)
+        if bucket is None:
+            is_group = isinstance(chat, str) or chat < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            if rate <= 0:
+                return None
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                for key in [key for key, other in self._chats.items() if other.idle()]:
+                    del self._chats[key]
+            bucket = self._chats[chat] = TokenBucket(rate, self.burst)
+        return bucket
+
+    def _pause(self, chat: Optional[Union[int, str]], seconds: float) -> None:
+        until = time.monotonic() + seconds
+        self._paused_until[chat] = max(self._paused_until.get(chat, 0.0), until)
+
+    def _pause_remaining(self, chat: Optional[Union[int, str]]) -> float:
+        now = time.monotonic()
+        remaining = 0.0
+        for key in (None, chat) if chat is not None else (None,):
+            until = self._paused_until.get(key)
+            if until is None:
+                continue
+            if until <= now:
+                del self._paused_until[key]
+            else:
+                remaining = max(remaining, until - now)
+        return remaining
+
+    async def _wait_turn(self, chat: Optional[Union[int, str]]) -> None:
+        """Wait out pauses, then take a slot from the chat and global budgets"""
+        started = time.perf_counter()
+        remaining = self._pause_remaining(chat)
+        while remaining > 0:
+            await asyncio.sleep(remaining)
+            remaining = self._pause_remaining(chat)
+
+        if chat is not None:
+            bucket = self._bucket(chat)
+            if bucket is not None:
+                await asyncio.sleep(bucket.reserve())
+            if self._global is not None:
+                await asyncio.sleep(self._global.reserve())
+        metrics.observe('outbound_wait_seconds', time.perf_counter() - started)
+
+    async def _call(self, chat, endpoint: str, callback: Callable[..., Coroutine], args, kwargs, max_retries: int):
+        """Send a request, waiting out and retrying on RetryAfter"""
+        for attempt in range(max_retries + 1):
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as exc:
+                retry_after = exc.retry_after
+                seconds = retry_after.total_seconds() if isinstance(retry_after, datetime.timedelta) else float(retry_after)
+                metrics.inc('outbound_retry_after_total', method=endpoint)
+                self._pause(chat, seconds + 0.1)
+                if attempt == max_retries:
+                    logger.error(f"{endpoint} to chat {chat} still flood limited after {max_retries} retries")
+                    raise
+                logger.warning(f"{endpoint} to chat {chat} flood limited, retrying in {seconds:.1f}s")
+                await self._wait_turn(chat)
+
+    async def process_request(self, callback, args, kwargs, endpoint: str, data: Dict[str, Any],
+                              rate_limit_args: Optional[int]):
+        max_retries = self.max_retries if rate_limit_args is None else rate_limit_args
+        chat = self._chat(data.get("chat_id"))
+        if endpoint not in COALESCED_ENDPOINTS:
+            await self._wait_turn(chat)
+            return await self._call(chat, endpoint, callback, args, kwargs, max_retries)
+
+        key = (endpoint, chat, data.get("message_id"), data.get("inline_message_id"))
+        edit = self._edits.get(key)
+        if edit is not None:
+            edit.request = (callback, args, kwargs)
+            metrics.inc('outbound_coalesced_total', method=endpoint)
+            return await asyncio.shield(edit.future)
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on the shared future, do not warn about its exception then
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        edit = self._edits[key] = PendingEdit((callback, args, kwargs), future)
+        try:
+            try:
+                await self._wait_turn(chat)
+            finally:
+                # Edits arriving from now on carry newer content and queue up again
+                if self._edits.get(key) is edit:
+                    del self._edits[key]
+            result = await self._call(chat, endpoint, *edit.request, max_retries)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        future.set_result(result)
+        return result
@@ -0,0 +1,174 @@
+import csv
+import heapq
+import io
+import json
+import logging
+import tempfile
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl")
+FIXTURE_FIELDS = ["round", "match", "home", "away", "home_score", "away_score"]
+TABLE_FIELDS = [
+    "position", "team", "played", "won", "drawn", "lost",
+    "goals_for", "goals_against", "goal_difference", "points"
+]
+
+# Exports larger than this spill from memory to a temporary file
+SPOOL_BYTES = 1_048_576
+
+
+def iter_fixtures(tournament, played_only: bool = False) -> Iterator[Dict]:
+    """Yield one row per fixture (or per played fixture) in round order"""
+    for round_num in sorted(tournament.rounds):
+        matches = tournament.rounds[round_num]['matches']
+        for number, ((home, away), result) in enumerate(zip(matches, tournament.round_results(round_num)), 1):
+            if played_only and not result:
+                continue
+            yield {
+                'round': round_num,
+                'match': number,
+                'home': home,
+                'away': away,
+                'home_score': result['home_score'] if result else None,
+                'away_score': result['away_score'] if result else None
+            }
+
+
+def iter_table(tournament) -> Iterator[Dict]:
+    """Yield the current standings one team at a time"""
+    for position, (team, stats) in enumerate(tournament.get_ranked_standings(), 1):
+        yield {'position': position, 'team': team, **stats}
+
+
+def write_rows(rows: Iterable[Dict], fields: List[str], fmt: str) -> BinaryIO:
+    """Write rows one by one to a spooled file and return it rewound"""
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+    if fmt == "csv":
+        writer = csv.DictWriter(text, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    else:
+        for row in rows:
+            text.write(json.dumps({field: row.get(field) for field in fields}, ensure_ascii=False) + "\n")
+    text.flush()
+    text.detach()
+    buffer.seek(0)
+    return buffer
+
+
+def _text_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Lines of a text file, csv.Error on a NUL byte (a binary file, Python 3.11+ csv reads them)"""
+    for line in lines:
+        if "\0" in line:
+            raise csv.Error("line contains NUL")
+        yield line
+
+
+def read_rows(stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """Yield (line number, row) from a CSV or JSONL file without reading it whole
+
+    Raises UnicodeDecodeError for files that are not UTF-8 and csv.Error for
+    malformed CSV, either one possibly after rows were yielded.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(_text_lines(text))
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_num, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = None
+            yield line_num, row if isinstance(row, dict) else {}
+
+
+def _score(value) -> Optional[int]:
+    if value is None or str(value).strip() == "":
+        return None
+    score = int(value)
+    if score < 0:
+        raise ValueError(score)
+    return score
+
+
+def _team_order(teams: List[str], fixtures: Iterable[Tuple[str, str]]) -> Optional[List[str]]:
+    """Teams ordered so every fixture's home team comes before its away team, None if no order does
+
+    Generated rounds pair each team with every later one as the away side,
+    so this order plays the given fixtures. Ties keep the order of first
+    appearance, which reproduces the fixture order of an exported tournament.
+    """
+    position = {team: index for index, team in enumerate(teams)}
+    later: Dict[str, set] = {team: set() for team in teams}
+    waiting = dict.fromkeys(teams, 0)
+    for home, away in fixtures:
+        if away not in later[home]:
+            later[home].add(away)
+            waiting[away] += 1
+    ready = [position[team] for team in teams if not waiting[team]]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        team = teams[heapq.heappop(ready)]
+        order.append(team)
+        for away in later[team]:
+            waiting[away] -= 1
+            if not waiting[away]:
+                heapq.heappush(ready, position[away])
+    return order if len(order) == len(teams) else None
+
+
+def parse_fixture_rows(rows: Iterable[Tuple[int, Dict]]) -> Tuple[List[str], int, List[Tuple[int, str, str, int, int]], List[str]]:
+    """Collect teams, round count and results from fixture rows
+
+    Teams are returned in the order whose generated fixtures are the ones
+    in the file (see _team_order), rows may come in any order. Rows
+    without scores only contribute teams, fixtures and rounds.
+    """
+    teams: Dict[str, None] = {}
+    fixtures: Dict[Tuple[str, str], None] = {}
+    num_rounds = 0
+    results: List[Tuple[int, str, str, int, int]] = []
+    errors: List[str] = []
+    seen: Dict[Tuple[int, str, str], int] = {}
+
+    for line_num, row in rows:
+        try:
+            round_num = int(row.get('round'))
+            home = str(row.get('home') or "").strip()
+            away = str(row.get('away') or "").strip()
+            home_score, away_score = _score(row.get('home_score')), _score(row.get('away_score'))
+        except (TypeError, ValueError):
+            errors.append(f"Line {line_num}: invalid round or score")
+            continue
+        if round_num < 1 or not home or not away or home == away:
+            errors.append(f"Line {line_num}: a row needs a round and two different teams")
+            continue
+        if (home_score is None) != (away_score is None):
+            errors.append(f"Line {line_num}: both scores or neither are required")
+            continue
+
+        teams.setdefault(home)
+        teams.setdefault(away)
+        fixtures.setdefault((home, away))
+        num_rounds = max(num_rounds, round_num)
+        if home_score is None:
+            continue
+        if (round_num, home, away) in seen:
+            errors.append(f"Line {line_num}: {home} vs {away} in round {round_num} already given on line {seen[round_num, home, away]}")
+            continue
+        seen[round_num, home, away] = line_num
+        results.append((round_num, home, away, home_score, away_score))
+
+    order = _team_order(list(teams), fixtures)
+    if order is None:
+        errors.append("Fixtures conflict: every round plays the same fixtures, so no two teams can swap home and away")
+    return order or list(teams), num_rounds, results, errors
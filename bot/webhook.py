@@ -0,0 +1,125 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+# Installed with python-telegram-bot's [webhooks] extra
+import tornado.httpserver
+import tornado.web
+from telegram import Bot, Update
+from telegram.ext import Application
+from bot.config.settings import settings
+from bot.database.worker import persistence
+from bot.handlers.router import callback_routes, input_routes, text_routes
+from bot.models.registry import tournaments
+from bot.utils.cache import render_cache
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+
+class UpdateHandler(tornado.web.RequestHandler):
+    """Receives Telegram's webhook posts and puts the updates on the application's queue"""
+
+    SUPPORTED_METHODS = ("POST",)
+
+    def initialize(self, bot: Bot, update_queue: asyncio.Queue) -> None:
+        self.bot = bot
+        self.update_queue = update_queue
+
+    async def post(self) -> None:
+        token = settings.webhook_secret_token
+        if token and self.request.headers.get('X-Telegram-Bot-Api-Secret-Token') != token:
+            raise tornado.web.HTTPError(403)
+        try:
+            update = Update.de_json(json.loads(self.request.body), self.bot)
+        except Exception as e:
+            logger.warning(f"Rejected webhook post: {e}")
+            raise tornado.web.HTTPError(400)
+        await self.update_queue.put(update)
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    """Liveness endpoint for load balancers"""
+
+    SUPPORTED_METHODS = ("GET",)
+
+    def initialize(self, update_queue: asyncio.Queue) -> None:
+        self.update_queue = update_queue
+
+    def get(self) -> None:
+        status = {
+            'status': 'ok',
+            'queued_updates': self.update_queue.qsize(),
+            'pending_writes': persistence.pending,
+            'tournaments_loaded': len(tournaments),
+            'render_cache': render_cache.stats(),
+            'routes': {router.name: router.stats() for router in (callback_routes, text_routes, input_routes)}
+        }
+        if settings.shard_index is not None:
+            from bot import sharding
+            status['shard'] = {
+                'index': settings.shard_index,
+                'pid': os.getpid(),
+                'count': settings.shard_count,
+                'misrouted': sharding.misrouted,
+                'tournaments': [tournament.tournament_id for tournament in tournaments.loaded()]
+            }
+        self.write(status)
+
+
+def _path(path: str) -> str:
+    return path if path.startswith("/") else f"/{path}"
+
+
+def build_webhook_app(bot: Bot, update_queue: asyncio.Queue) -> tornado.web.Application:
+    """Webhook app with the health endpoint mounted next to it
+
+    Posted updates are only parsed and put on ``update_queue``, so the app
+    can be exercised locally with any queue and recorded Update JSON.
+    """
+    return tornado.web.Application([
+        (_path(settings.webhook_path), UpdateHandler, {'bot': bot, 'update_queue': update_queue}),
+        (_path(settings.webhook_health_path), HealthHandler, {'update_queue': update_queue}),
+    ])
+
+
+async def run_webhook(application: Application) -> None:
+    """Serve updates over a webhook until SIGINT/SIGTERM"""
+    server = tornado.httpserver.HTTPServer(build_webhook_app(application.bot, application.update_queue))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    try:
+        if settings.webhook_url:
+            await application.bot.set_webhook(
+                url=settings.webhook_url.rstrip("/") + _path(settings.webhook_path),
+                allowed_updates=ALLOWED_UPDATES,
+                secret_token=settings.webhook_secret_token
+            )
+        server.listen(settings.webhook_port, settings.webhook_listen)
+        logger.info(
+            f"Webhook server listening on {settings.webhook_listen}:{settings.webhook_port}"
+            f"{_path(settings.webhook_path)}"
+        )
+        await stop.wait()
+    finally:
+        server.stop()
+        await server.close_all_connections()
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
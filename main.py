@@ -1,23 +1,38 @@
+import asyncio
 import logging
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
+from telegram import Update
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes, MessageHandler, TypeHandler, filters
 from bot.config.settings import settings
+from bot.database.persistence import ChatUserContext, ConversationPersistence
+from bot.database.storage import close_connections
+from bot.database.worker import persistence
+from bot.models.registry import tournaments
+from bot.utils.log import setup_logging, stop_logging
+from bot.utils.metrics import metrics
 from bot.handlers.start import start_command
+from bot.handlers.files import export_command, handle_import_document
 from bot.handlers.callbacks import button_callback
 from bot.handlers.tournament import handle_text_input
+from bot.handlers.statistics import alltime_command
 
 
-def setup_logging() -> None:
-    """Setup logging configuration"""
-    log_file = settings.log_dir / "bot.log"
-    
-    logging.basicConfig(
-        level=getattr(logging, settings.log_level),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
+async def post_init(application: Application) -> None:
+    """Start background persistence once the application is initialized"""
+    persistence.start()
+    tournaments.check_legacy()
+    if settings.metrics_enabled:
+        from bot.monitoring import start_metrics_server
+        start_metrics_server()
+
+
+async def post_shutdown(application: Application) -> None:
+    """Flush pending tournament writes before the process exits"""
+    tournaments.close_all()
+    persistence.stop()
+    close_connections()
+    metrics.stop()
+    logging.getLogger(__name__).info(f"Persistence flushed on shutdown: {persistence.stats()}")
+    stop_logging()
 
 
 def main() -> None:
@@ -30,16 +45,58 @@ def main() -> None:
         return
     
     # Create application
-    application = Application.builder().token(settings.bot_token).build()
+    builder = (
+        Application.builder()
+        .token(settings.bot_token)
+        .concurrent_updates(settings.concurrent_updates)
+        # user_data is kept per chat, see ChatUserContext
+        .context_types(ContextTypes(context=ChatUserContext))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if settings.telegram_base_url:
+        base_url = settings.telegram_base_url.rstrip("/")
+        builder = builder.base_url(f"{base_url}/bot").base_file_url(f"{base_url}/file/bot")
+    if settings.run_mode == "webhook":
+        # Updates arrive through our webhook server, no polling Updater needed
+        builder = builder.updater(None)
+    if settings.conversation_persistence:
+        builder = builder.persistence(ConversationPersistence.from_settings())
+    if settings.send_rate_limit_enabled:
+        from bot.utils.outbound import FloodControl
+        builder = builder.rate_limiter(FloodControl.from_settings())
+    if settings.metrics_enabled:
+        # Time outbound Bot API calls
+        from bot.monitoring import InstrumentedRequest
+        builder = builder.request(InstrumentedRequest())
+        if settings.run_mode != "webhook":
+            builder = builder.get_updates_request(InstrumentedRequest(connection_pool_size=1))
+    application = builder.build()
     
     # Add handlers
+    if settings.shard_index is not None:
+        from bot.sharding import check_shard
+        application.add_handler(TypeHandler(Update, check_shard), group=-1)
     application.add_handler(CommandHandler("start", start_command))
+    application.add_handler(CommandHandler("export", export_command))
+    application.add_handler(CommandHandler("alltime", alltime_command))
     application.add_handler(CallbackQueryHandler(button_callback))
+    application.add_handler(MessageHandler(
+        filters.Document.FileExtension("csv") | filters.Document.FileExtension("jsonl"), handle_import_document
+    ))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_input))
     
     # Start the bot
-    logger.info(f"{settings.bot_name} is starting in {settings.environment} mode...")
-    application.run_polling(allowed_updates=["message", "callback_query"])
+    logger.info(f"{settings.bot_name} is starting in {settings.environment} mode ({settings.run_mode})...")
+    if settings.run_mode == "webhook":
+        try:
+            from bot.webhook import run_webhook
+        except ImportError:
+            logger.error("Webhook mode requires tornado: pip install 'python-telegram-bot[webhooks]'")
+            return
+        asyncio.run(run_webhook(application))
+    else:
+        application.run_polling(allowed_updates=["message", "callback_query"])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,28 @@
+import asyncio
+import logging
+import os
+from bot.config.settings import settings
+from bot.utils.log import setup_logging
+
+
+def main() -> None:
+    """Start the bot as SHARD_WORKERS worker processes behind one dispatcher"""
+    setup_logging()
+    logger = logging.getLogger(__name__)
+
+    if not settings.bot_token:
+        logger.error("BOT_TOKEN not found in environment variables")
+        return
+    try:
+        from bot.sharding import run_supervisor
+    except ImportError:
+        logger.error("Sharding requires tornado: pip install 'python-telegram-bot[webhooks]'")
+        return
+
+    workers = settings.shard_workers or os.cpu_count() or 1
+    logger.info(f"{settings.bot_name} supervisor is starting {workers} workers ({settings.run_mode})...")
+    asyncio.run(run_supervisor(workers))
+
+
+if __name__ == '__main__':
+    main()
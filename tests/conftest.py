@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Settings are read on import, they need a token and somewhere to write
+os.environ.setdefault("BOT_TOKEN", "123456:test")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="sunday-league-tests-"))
+os.environ.setdefault("LOG_DIR", os.environ["DATA_DIR"])
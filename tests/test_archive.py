@@ -0,0 +1,120 @@
+import pytest
+
+from bot.database.archive import RECORD, RESULTS_FILE, SeasonArchive, season_label
+
+DAY = 86400
+SEASONS = [
+    {
+        'teams': ["Lions", "Tigers", "Bears"],
+        'rounds': 1,
+        'standings': ["Lions", "Bears", "Tigers"],
+        'finished_at': 10 * DAY,
+        'results': [(1, "Lions", "Tigers", 2, 0), (1, "Lions", "Bears", 1, 1), (1, "Tigers", "Bears", 0, 1)],
+    },
+    {
+        'teams': ["Lions", "Tigers", "Wolves"],
+        'rounds': 2,
+        'standings': ["Tigers", "Lions", "Wolves"],
+        'finished_at': 20 * DAY,
+        'results': [
+            (1, "Lions", "Tigers", 0, 3), (1, "Lions", "Wolves", 2, 2), (1, "Tigers", "Wolves", 1, 0),
+            (2, "Lions", "Tigers", 1, 0), (2, "Lions", "Wolves", 4, 1),
+        ],
+    },
+    {
+        'teams': ["Bears", "Wolves"],
+        'rounds': 1,
+        'standings': ["Wolves", "Bears"],
+        'finished_at': 30 * DAY,
+        'results': [(1, "Bears", "Wolves", 0, 2)],
+    },
+]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = SeasonArchive(tmp_path / "archive")
+    for season in SEASONS:
+        archive.add_season(season)
+    return archive
+
+
+def test_reopen_reads_the_index(archive, tmp_path):
+    reopened = SeasonArchive(tmp_path / "archive")
+    assert len(reopened) == 3
+    assert reopened.seasons() == archive.seasons()
+    assert reopened.seasons()[1] == {
+        'number': 2, 'finished_at': 20 * DAY, 'rounds': 2, 'matches': 5,
+        'teams': ["Lions", "Tigers", "Wolves"], 'standings': ["Tigers", "Lions", "Wolves"],
+    }
+    # Every team name is stored once and keeps its id
+    assert reopened._teams == ["Lions", "Tigers", "Bears", "Wolves"]
+    assert reopened.team_seasons("Bears") == [1, 3]
+    assert reopened.all_time() == archive.all_time()
+
+    # Seasons added after a reopen intern new teams after the old ones
+    reopened.add_season({
+        'teams': ["Eagles", "Lions"], 'rounds': 1, 'standings': ["Eagles", "Lions"],
+        'finished_at': 40 * DAY, 'results': [(1, "Eagles", "Lions", 3, 0)],
+    })
+    assert SeasonArchive(tmp_path / "archive")._teams == ["Lions", "Tigers", "Bears", "Wolves", "Eagles"]
+
+
+def test_interrupted_write_is_truncated(archive, tmp_path):
+    path = tmp_path / "archive" / RESULTS_FILE
+    size = path.stat().st_size
+    assert size == 9 * RECORD.size
+    # Records of a season whose index update never happened, and half a record
+    with open(path, 'ab') as f:
+        f.write(RECORD.pack(1, 0, 1, 5, 5) * 2 + b"\x01\x02\x03")
+
+    reopened = SeasonArchive(tmp_path / "archive")
+    assert path.stat().st_size == size
+    assert reopened.all_time() == archive.all_time()
+    reopened.add_season(SEASONS[2])
+    assert path.stat().st_size == size + RECORD.size
+    assert reopened.seasons()[-1]['matches'] == 1
+
+
+def test_all_time_table_and_titles(archive):
+    table = archive.all_time()
+    assert {team: row['titles'] for team, row in table.items()} == {"Lions": 1, "Tigers": 1, "Bears": 0, "Wolves": 1}
+    assert {team: row['seasons'] for team, row in table.items()} == {"Lions": 2, "Tigers": 2, "Bears": 2, "Wolves": 2}
+    lions = table["Lions"]
+    assert (lions['played'], lions['won'], lions['drawn'], lions['lost']) == (6, 3, 2, 1)
+    assert (lions['goals_for'], lions['goals_against'], lions['points']) == (10, 7, 11)
+
+
+def test_team_record(archive):
+    totals, history = archive.team_record("Bears")
+    assert (totals['played'], totals['won'], totals['drawn'], totals['lost']) == (3, 1, 1, 1)
+    assert list(history) == [season_label(archive._seasons[0]), season_label(archive._seasons[2])]
+    assert history[season_label(archive._seasons[2])]['goals_against'] == 2
+    assert archive.team_record("Eagles") == (None, {})
+
+
+def test_head_to_head_keeps_only_the_pair(archive):
+    totals, meetings = archive.head_to_head("Lions", "Tigers")
+    assert [meeting[1:] for meeting in meetings] == [
+        (1, "Lions", "Tigers", 2, 0), (1, "Lions", "Tigers", 0, 3), (2, "Lions", "Tigers", 1, 0),
+    ]
+    assert [meeting[0] for meeting in meetings] == [season_label(archive._seasons[0])] + [season_label(archive._seasons[1])] * 2
+    assert (totals["Lions"]['won'], totals["Lions"]['lost'], totals["Tigers"]['won']) == (2, 1, 1)
+    assert totals["Lions"]['goals_for'] == totals["Tigers"]['goals_against'] == 3
+    # Teams that never shared a season
+    totals, meetings = archive.head_to_head("Bears", "Tigers")
+    assert len(meetings) == 1 and meetings[0][2:4] == ("Tigers", "Bears")
+
+
+@pytest.mark.parametrize("since, until, numbers", [
+    (None, None, [1, 2, 3]),
+    (10 * DAY, None, [1, 2, 3]),
+    (10 * DAY + 1, None, [2, 3]),
+    (None, 20 * DAY, [1]),
+    (None, 20 * DAY + 1, [1, 2]),
+    (15 * DAY, 30 * DAY, [2]),
+    (31 * DAY, None, []),
+    (None, 10 * DAY, []),
+])
+def test_seasons_between(archive, since, until, numbers):
+    assert [season['number'] for season in archive.seasons(since, until)] == numbers
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from bot.database.storage import TournamentStorage
+from bot.models import columnar
+from bot.models.columnar import ResultColumns, round_totals, team_table
+from bot.models.tournament import FootballTournament, match_id
+from bot.utils.helpers import calculate_team_statistics
+
+TEAMS = ["Lions", "Tigers", "Bears", "Wolves", "Eagles"]
+
+
+def season_columns() -> ResultColumns:
+    rng = random.Random(5)
+    columns = ResultColumns(TEAMS + ["Sharks"])
+    for season in range(3):
+        index = columns.add_season(f"Season {season + 1}")
+        for round_num in range(1, 4):
+            for home in TEAMS:
+                for away in TEAMS:
+                    if home != away and rng.random() < 0.5:
+                        columns.append(index, round_num, home, away, rng.randint(0, 4), rng.randint(0, 4))
+    columns.set_scores(0, 7, 7)
+    return columns
+
+
+def aggregates(columns: ResultColumns):
+    return (
+        team_table(columns),
+        team_table(columns, ["Sharks", "Lions"], season=1),
+        round_totals(columns),
+        round_totals(columns, season=2),
+    )
+
+
+def test_numpy_and_python_backends_agree(monkeypatch):
+    pytest.importorskip("numpy")
+    columns = season_columns()
+    vectorized = aggregates(columns)
+    monkeypatch.setattr(columnar, "np", None)
+    assert aggregates(season_columns()) == vectorized
+
+
+def test_python_backend():
+    columns = season_columns()
+    table = team_table(columns)
+    assert "Sharks" not in table
+    assert sum(row['played'] for row in table.values()) == 2 * len(columns)
+    assert sum(row['won'] for row in table.values()) == sum(row['lost'] for row in table.values())
+    totals = round_totals(columns)
+    assert sum(entry['matches'] for entry in totals.values()) == len(columns)
+    assert team_table(columns, ["Sharks"])["Sharks"]['played'] == 0
+
+
+def test_tournament_columns_follow_new_results(tmp_path):
+    tournament = FootballTournament(
+        data_file=None, storage=TournamentStorage(tmp_path / "columns.db", "columns"), tournament_id="columns"
+    )
+    for team in TEAMS:
+        tournament.add_team(team)
+    tournament.create_tournament_structure(2)
+    tournament.record_result(match_id(1, 0), 1, 0)
+    columns = tournament.result_columns()
+
+    rng = random.Random(9)
+    for _ in range(60):
+        fixture = match_id(rng.randint(1, 2), rng.randrange(len(tournament.rounds[1]['matches'])))
+        tournament.record_result(fixture, rng.randint(0, 5), rng.randint(0, 5))
+        # Updated in place, not rebuilt
+        assert tournament.result_columns() is columns
+        assert team_table(columns, tournament.teams) == calculate_team_statistics(tournament.teams, tournament.iter_results())
+    assert len(columns) == len(tournament.match_results)
+    assert tournament.get_round_totals() == {
+        round_num: totals for (_, round_num), totals in round_totals(
+            FootballTournament(data_file=None, storage=tournament.storage, tournament_id="columns").result_columns()
+        ).items()
+    }
+
+    # A new tournament starts from fresh columns
+    tournament.create_tournament_structure(1)
+    assert tournament.result_columns() is not columns
+    assert len(tournament.result_columns()) == 0
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+from bot.handlers.tournament import handle_bulk_results_input
+from bot.models.registry import tournaments
+from bot.utils.helpers import format_detailed_stats, parse_bulk_results
+
+STATS = {
+    'Lions': {'goals_for': 3, 'goals_against': 1, 'won': 1, 'played': 2},
+    'Tigers': {'goals_for': 1, 'goals_against': 3, 'won': 0, 'played': 2},
+}
+ROUNDS = {
+    1: {'matches': [("Lions", "Tigers")], 'completed': True},
+    2: {'matches': [("Tigers", "Lions")], 'completed': False},
+}
+
+
+def test_total_goals_count_every_goal_once():
+    text = format_detailed_stats(STATS, ROUNDS)
+    assert "Total Matches Played: 2\n" in text
+    assert "Total Goals Scored: 4\n" in text
+    assert "Average Goals per Match: 2.00\n" in text
+
+
+def test_round_breakdown_with_round_totals():
+    text = format_detailed_stats(STATS, ROUNDS, {1: {'matches': 1, 'goals': 3}})
+    assert "Round 1: 1/1 matches, 3.0 goals/match - ✅ Complete\n" in text
+    assert "Round 2: 0/1 matches - ⏳ In Progress\n" in text
+
+
+def test_round_breakdown_without_round_totals():
+    text = format_detailed_stats(STATS, ROUNDS)
+    assert "Round 1: 1 matches - ✅ Complete\n" in text
+
+
+MATCHES = [("Lions", "Tigers"), ("Bears", "Wolves"), ("Lions", "Bears")]
+
+
+def test_bulk_fixture_number_lines():
+    results, errors = parse_bulk_results("1 2-1\n#2: 0:0\n3. 4 - 3\n\n", MATCHES)
+    assert errors == []
+    assert results == [(0, 2, 1), (1, 0, 0), (2, 4, 3)]
+
+
+def test_bulk_team_name_lines_ignore_case():
+    results, errors = parse_bulk_results("lions 1-1 TIGERS\n  Bears 3:0 wolves  ", MATCHES)
+    assert errors == []
+    assert results == [(0, 1, 1), (1, 3, 0)]
+
+
+def test_bulk_unknown_and_out_of_range_fixtures():
+    results, errors = parse_bulk_results("0 1-0\n4 1-0\nTigers 1-0 Lions\nLions 2-0 Wolves", MATCHES)
+    assert results == []
+    assert errors == [
+        "Line 1: there is no match #0",
+        "Line 2: there is no match #4",
+        "Line 3: Tigers vs Lions is not a match of this round",
+        "Line 4: Lions vs Wolves is not a match of this round",
+    ]
+
+
+def test_bulk_duplicate_fixture():
+    results, errors = parse_bulk_results("1 2-1\nlions 3-3 tigers", MATCHES)
+    assert results == [(0, 2, 1)]
+    assert errors == ["Line 2: Lions vs Tigers already given on line 1"]
+
+
+def test_bulk_malformed_scores():
+    results, errors = parse_bulk_results("1 2-\n2 a-1\nLions 2 1 Tigers\n3 -1-0", MATCHES)
+    assert results == []
+    assert errors == [
+        "Line 1: can't read '1 2-'",
+        "Line 2: can't read '2 a-1'",
+        "Line 3: can't read 'Lions 2 1 Tigers'",
+        "Line 4: can't read '3 -1-0'",
+    ]
+    assert parse_bulk_results("  \n", MATCHES) == ([], ["No results found"])
+
+
+def test_bulk_any_error_records_nothing():
+    chat_id = -5151
+    tournament = tournaments.get(chat_id)
+    for team in ["Lions", "Tigers", "Bears", "Wolves"]:
+        tournament.add_team(team)
+    tournament.create_tournament_structure(1)
+
+    replies = []
+
+    async def reply_text(text, **kwargs):
+        replies.append(text)
+
+    update = SimpleNamespace(message=SimpleNamespace(chat_id=chat_id, reply_text=reply_text))
+    context = SimpleNamespace(user_data={'waiting_for': 'bulk_results', 'bulk_round': 1})
+    asyncio.run(handle_bulk_results_input(update, context, "1 2-1\n2 1-1\n9 0-0"))
+
+    assert tournament.match_results == {}
+    assert replies == [
+        "❌ No results saved:\nLine 3: there is no match #9\n\nFix these lines and send the results again."
+    ]
+    # Still waiting for the corrected message
+    assert context.user_data == {'waiting_for': 'bulk_results', 'bulk_round': 1}
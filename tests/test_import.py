@@ -0,0 +1,124 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from bot.database.storage import TournamentStorage
+from bot.handlers.files import handle_import_document
+from bot.models.registry import tournaments
+from bot.models.tournament import FootballTournament
+from bot.utils.tabular import FIXTURE_FIELDS, iter_fixtures, parse_fixture_rows, read_rows, write_rows
+
+CHAT_ID = -4242
+
+
+def rows(*fixtures):
+    return [(line_num, dict(zip(('round', 'home', 'away', 'home_score', 'away_score'), fixture)))
+            for line_num, fixture in enumerate(fixtures, 2)]
+
+
+def test_team_order_plays_the_files_fixtures():
+    # Wolves first appear after Lions and Tigers but host Tigers
+    teams, num_rounds, results, errors = parse_fixture_rows(rows(
+        (1, "Lions", "Tigers", 1, 0),
+        (1, "Wolves", "Bears", 2, 2),
+        (1, "Bears", "Lions", 0, 3),
+        (2, "Wolves", "Tigers", "", ""),
+    ))
+    assert not errors
+    assert num_rounds == 2
+    position = {team: index for index, team in enumerate(teams)}
+    for home, away in (("Lions", "Tigers"), ("Wolves", "Bears"), ("Bears", "Lions"), ("Wolves", "Tigers")):
+        assert position[home] < position[away]
+
+
+def test_swapped_home_and_away_is_an_error():
+    _, _, _, errors = parse_fixture_rows(rows(
+        (1, "Lions", "Tigers", 1, 0),
+        (2, "Tigers", "Lions", 0, 0),
+    ))
+    assert len(errors) == 1 and errors[0].startswith("Fixtures conflict")
+
+
+def test_shuffled_export_loads_the_same_season(tmp_path):
+    tournament = FootballTournament(
+        data_file=None, storage=TournamentStorage(tmp_path / "export.db", "export"), tournament_id="export"
+    )
+    for team in ["Lions", "Tigers", "Bears", "Wolves"]:
+        tournament.add_team(team)
+    tournament.create_tournament_structure(2)
+    for index, (home, away) in enumerate(tournament.rounds[1]['matches']):
+        tournament.record_result(tournament.find_match(1, home, away), index, 1)
+
+    with write_rows(iter_fixtures(tournament), FIXTURE_FIELDS, "csv") as document:
+        lines = document.read().decode("utf-8").splitlines()
+    # Last fixture first, the teams no longer appear in their original order
+    shuffled = "\n".join([lines[0]] + lines[:0:-1]) + "\n"
+    teams, num_rounds, results, errors = parse_fixture_rows(read_rows(io.BytesIO(shuffled.encode("utf-8")), "csv"))
+    assert not errors
+
+    imported = FootballTournament(
+        data_file=None, storage=TournamentStorage(tmp_path / "import.db", "import"), tournament_id="import"
+    )
+    assert imported.load_season(teams, num_rounds, results)
+    assert sorted(imported.iter_results()) == sorted(tournament.iter_results())
+    assert imported.get_team_statistics() == tournament.get_team_statistics()
+
+
+class Message:
+    def __init__(self, document):
+        self.document = document
+        self.chat_id = CHAT_ID
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+def document(file_name, content=b""):
+    async def get_file():
+        async def download_to_memory(out):
+            out.write(content)
+        return SimpleNamespace(download_to_memory=download_to_memory)
+    return SimpleNamespace(file_name=file_name, get_file=get_file)
+
+
+def send(doc) -> Message:
+    message = Message(doc)
+    update = SimpleNamespace(message=message, effective_chat=SimpleNamespace(id=CHAT_ID))
+    asyncio.run(handle_import_document(update, SimpleNamespace()))
+    return message
+
+
+@pytest.mark.parametrize("file_name", [None, "results", "results.txt", "results.csv.gz"])
+def test_rejects_other_files(file_name):
+    message = send(document(file_name, b"round,home,away\n1,Lions,Tigers\n"))
+    assert message.replies == ["❌ Nothing imported: send a .csv or .jsonl file"]
+
+
+def test_imports_rows_in_any_order():
+    content = (
+        '{"round": 1, "home": "Wolves", "away": "Bears", "home_score": 1, "away_score": 0}\n'
+        '{"round": 1, "home": "Lions", "away": "Wolves", "home_score": 2, "away_score": 2}\n'
+        '{"round": 1, "home": "Lions", "away": "Bears"}\n'
+    )
+    message = send(document("Season.JSONL", content.encode("utf-8")))
+    assert message.replies[-1].startswith("✅ Imported 3 teams, 1 rounds and 2 results")
+    tournament = tournaments.get(CHAT_ID)
+    assert sorted(tournament.iter_results()) == [
+        (1, "Lions", "Wolves", {'home_score': 2, 'away_score': 2}),
+        (1, "Wolves", "Bears", {'home_score': 1, 'away_score': 0}),
+    ]
+
+
+@pytest.mark.parametrize("file_name, content", [
+    ("latin1.csv", "round,home,away,home_score,away_score\n1,Café,Lions,1,0\n".encode("latin-1")),
+    ("binary.csv", b"round,home,away\n1,Li\x00ons,Tigers\n"),
+    ("latin1.jsonl", '{"round": 1, "home": "Café", "away": "Lions"}\n'.encode("latin-1")),
+])
+def test_unreadable_files_are_reported(file_name, content):
+    message = send(document(file_name, content))
+    assert message.replies == [
+        f"❌ Nothing imported: {file_name} is not a UTF-8 text file in {file_name.rsplit('.', 1)[1].upper()} format"
+    ]
@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from bot.config.settings import settings
+from bot.database.journal import SNAPSHOT_FILE, JournalStorage
+from bot.models.tournament import FootballTournament, match_id
+
+TEAMS = ["Lions", "Tigers", "Bears", "Wolves", "Eagles", "Sharks"]
+
+
+def play(tournament: FootballTournament, seed: int) -> None:
+    """The same session of teams, rounds and results for every storage"""
+    rng = random.Random(seed)
+    for team in TEAMS:
+        tournament.add_team(team)
+    tournament.create_tournament_structure(3)
+    tournament.add_additional_rounds(2)
+    match_ids = [match_id(round_num, index)
+                 for round_num, round_data in tournament.rounds.items()
+                 for index in range(len(round_data['matches']))]
+    for step in range(300):
+        if step % 7 == 0:
+            tournament.record_results([(rng.choice(match_ids), rng.randint(0, 5), rng.randint(0, 5)) for _ in range(4)])
+        else:
+            tournament.record_result(rng.choice(match_ids), rng.randint(0, 5), rng.randint(0, 5))
+        if step % 60 == 59:
+            tournament.advance_to_next_round()
+
+
+def wait_for_compaction(storage: JournalStorage) -> None:
+    with storage._compacting:
+        pass
+
+
+def run(directory, seed: int = 3) -> JournalStorage:
+    storage = JournalStorage(directory)
+    tournament = FootballTournament(data_file=None, storage=storage, tournament_id="journal")
+    play(tournament, seed)
+    wait_for_compaction(storage)
+    storage.close()
+    return tournament.to_dict()
+
+
+@pytest.fixture
+def reference(tmp_path):
+    """State of the session without any rotation"""
+    return run(tmp_path / "reference")
+
+
+def test_reload_across_rotation_and_compaction(tmp_path, monkeypatch, reference):
+    monkeypatch.setattr(settings, "journal_compact_bytes", 2048)
+    directory = tmp_path / "rotated"
+    state = run(directory)
+    assert state == reference
+
+    assert (directory / SNAPSHOT_FILE).exists()
+    # Earlier segments were folded into the snapshot and deleted
+    storage = JournalStorage(directory)
+    segments = storage._segments()
+    assert segments and segments[0] > 0
+    assert storage._snapshot_seq() <= segments[0]
+
+    reloaded = FootballTournament(data_file=None, storage=storage, tournament_id="journal")
+    assert reloaded.to_dict() == reference
+    assert reloaded.get_team_statistics() == FootballTournament(
+        data_file=None, storage=JournalStorage(tmp_path / "reference"), tournament_id="journal"
+    ).get_team_statistics()
+    storage.close()
+
+
+def test_reload_with_closed_segments_not_yet_compacted(tmp_path, monkeypatch, reference):
+    directory = tmp_path / "pending"
+    storage = JournalStorage(directory)
+    tournament = FootballTournament(data_file=None, storage=storage, tournament_id="journal")
+    play(tournament, 3)
+    # A rotation whose compaction never ran, as after a crash mid-compaction
+    storage.close()
+    storage._segment += 1
+    storage._segment_path(storage._segment).touch()
+
+    reopened = JournalStorage(directory)
+    assert len(reopened._segments()) == 2
+    assert FootballTournament(data_file=None, storage=reopened, tournament_id="journal").to_dict() == reference
+
+    # The next compaction folds both segments, the state is unchanged
+    monkeypatch.setattr(settings, "journal_compact_bytes", 0)
+    reopened.upsert_result(match_id(1, 0), 1, 1)
+    wait_for_compaction(reopened)
+    reopened.close()
+    assert (directory / SNAPSHOT_FILE).exists()
+    assert len(JournalStorage(directory)._segments()) == 1
+    reference['match_results'][match_id(1, 0)] = {'home_score': 1, 'away_score': 1}
+    compacted = JournalStorage(directory)
+    assert FootballTournament(data_file=None, storage=compacted, tournament_id="journal").to_dict() == reference
+    compacted.close()
+
+
+def test_torn_final_line_is_dropped_on_open(tmp_path):
+    directory = tmp_path / "torn"
+    storage = JournalStorage(directory)
+    storage.add_team(0, "Lions")
+    storage.close()
+    # A crash in the middle of an append
+    with open(storage._segment_path(storage._segment), 'a', encoding='utf-8') as f:
+        f.write('{"e":"team","p":1,"n":"Tig')
+
+    reopened = JournalStorage(directory)
+    reopened.add_team(1, "Bears")
+    reopened.close()
+    lines = reopened._segment_path(reopened._segment).read_text(encoding='utf-8').splitlines()
+    assert lines == ['{"e":"team","p":0,"n":"Lions"}', '{"e":"team","p":1,"n":"Bears"}']
+    loaded = JournalStorage(directory)
+    assert loaded.load()['teams'] == ["Lions", "Bears"]
+    loaded.close()
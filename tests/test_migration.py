@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from bot.config.settings import settings
+from bot.database.storage import TournamentStorage
+from bot.models.tournament import FootballTournament
+from bot.utils.callback_data import COMPACT_MARKER, decode_callback, encode_callback
+
+# "A B" and "A_B" give the same legacy id against the same opponent
+TEAMS = ["A B", "A_B", "C"]
+FIXTURES = [["A B", "A_B"], ["A B", "C"], ["A_B", "C"]]
+
+
+@pytest.fixture
+def legacy_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    state = {
+        'teams': TEAMS,
+        'rounds': {"1": {'matches': FIXTURES, 'completed': True}, "2": {'matches': FIXTURES, 'completed': False}},
+        'current_round': 2,
+        'total_rounds': 2,
+        'match_results': {
+            "R1_A_B_vs_A_B": {'home_score': 1, 'away_score': 0},
+            "R1_A_B_vs_C": {'home_score': 2, 'away_score': 2},
+            # A fixture that no longer exists
+            "R2_C_vs_A_B": {'home_score': 5, 'away_score': 0},
+            # Already keyed by position
+            "R2_1": {'home_score': 3, 'away_score': 1},
+        },
+        'tournament_finished': False,
+        'tournament_started': True,
+    }
+    path = tmp_path / "tournament_data.json"
+    path.write_text(json.dumps(state))
+    return path
+
+
+def test_legacy_results_are_rekeyed_by_fixture(legacy_file, tmp_path):
+    storage = TournamentStorage(tmp_path / "tournament.db", "default")
+    tournament = FootballTournament(data_file="tournament_data.json", storage=storage)
+
+    assert tournament.match_results == {
+        "R1_0": {'home_score': 1, 'away_score': 0},
+        # The colliding id counted for the last fixture carrying it
+        "R1_2": {'home_score': 2, 'away_score': 2},
+        "R2_1": {'home_score': 3, 'away_score': 1},
+    }
+    assert [result is not None for result in tournament.round_results(1)] == [True, False, True]
+    assert tournament.get_team_statistics()["A_B"]['played'] == 2
+    assert not legacy_file.exists()
+
+    # The re-keyed results were written back, a reload needs no migration
+    reloaded = FootballTournament(data_file="tournament_data.json", storage=TournamentStorage(tmp_path / "tournament.db", "default"))
+    assert reloaded.match_results == tournament.match_results
+    assert reloaded.to_dict() == tournament.to_dict()
+
+
+@pytest.mark.parametrize("action, args", [
+    ('result', (1, 0)),
+    ('result', (65535, 65535)),
+    ('results_page', (3, 2, True)),
+    ('results_page', (1, 0, False)),
+])
+def test_callback_round_trip(action, args):
+    data = encode_callback(action, *args)
+    assert data.startswith(COMPACT_MARKER)
+    # Telegram allows 64 bytes of callback data
+    assert len(data.encode()) <= 64
+    assert decode_callback(data) == (action, args)
+
+
+@pytest.mark.parametrize("data", ["view_table", "team_1", "", COMPACT_MARKER, f"{COMPACT_MARKER}zAAAA", f"{COMPACT_MARKER}rA"])
+def test_other_callback_data_is_its_own_action(data):
+    assert decode_callback(data) == (data, ())
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+from telegram.error import RetryAfter
+from telegram.ext import ExtBot
+from telegram.request import BaseRequest
+
+from bot.utils import outbound
+from bot.utils.outbound import FloodControl
+
+BOT_ID = 123456
+
+
+class StubBotAPI(BaseRequest):
+    """Answers Bot API calls in memory and records when each was sent"""
+
+    def __init__(self):
+        self.calls: List[Tuple[float, str, Dict]] = []
+        # (method, chat_id) -> RetryAfter seconds to answer with, once
+        self.flood: Dict[Tuple[str, int], int] = {}
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(self, url: str, method: str, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None) -> Tuple[int, bytes]:
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        retry_after = self.flood.pop((endpoint, params.get('chat_id')), None)
+        if retry_after is not None:
+            return 429, self._reply({
+                'ok': False, 'error_code': 429, 'description': "Too Many Requests",
+                'parameters': {'retry_after': retry_after}
+            })
+        self.calls.append((time.monotonic(), endpoint, params))
+        return 200, self._reply({'ok': True, 'result': self._result(endpoint, params)})
+
+    @staticmethod
+    def _reply(payload: Dict) -> bytes:
+        return json.dumps(payload).encode()
+
+    def _result(self, endpoint: str, params: Dict):
+        if endpoint == "getMe":
+            return {'id': BOT_ID, 'is_bot': True, 'first_name': "Bot", 'username': "test_bot"}
+        chat_id = params.get('chat_id', 1)
+        return {
+            'message_id': params.get('message_id', len(self.calls)),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': "private" if chat_id > 0 else "group"},
+            'text': params.get('text', ""),
+        }
+
+    def sent(self, endpoint: str, chat_id: Optional[int] = None) -> List[Tuple[float, Dict]]:
+        return [
+            (stamp, params) for stamp, method, params in self.calls
+            if method == endpoint and (chat_id is None or params.get('chat_id') == chat_id)
+        ]
+
+
+def run_bot(limiter: FloodControl, scenario):
+    """Run scenario(bot, api) against the stub with the limiter in place"""
+    api = StubBotAPI()
+
+    async def main():
+        bot = ExtBot(f"{BOT_ID}:test", request=api, get_updates_request=api, rate_limiter=limiter)
+        async with bot:
+            return await scenario(bot, api)
+
+    return asyncio.run(main()), api
+
+
+def spread(calls: List[Tuple[float, Dict]]) -> float:
+    return calls[-1][0] - calls[0][0]
+
+
+def test_chat_budget_spaces_out_one_chat_only():
+    limiter = FloodControl(global_rate=0, chat_rate=10, burst=1)
+
+    async def scenario(bot, api):
+        await asyncio.gather(*(bot.send_message(chat_id, "hi") for chat_id in (1, 1, 1, 1, 2)))
+
+    _, api = run_bot(limiter, scenario)
+    first = api.sent("sendMessage", 1)
+    assert len(first) == 4
+    # Burst of one, then a slot every 0.1s
+    assert spread(first) >= 0.25
+    other = api.sent("sendMessage", 2)
+    assert other[0][0] - first[0][0] < 0.08
+
+
+def test_group_budget_is_per_minute():
+    limiter = FloodControl(global_rate=0, chat_rate=100, group_per_minute=600, burst=1)
+
+    async def scenario(bot, api):
+        await asyncio.gather(*(bot.send_message(-100, "hi") for _ in range(3)))
+
+    _, api = run_bot(limiter, scenario)
+    assert spread(api.sent("sendMessage", -100)) >= 0.15
+
+
+def test_global_budget_spans_chats():
+    limiter = FloodControl(global_rate=10, chat_rate=100, burst=5)
+
+    async def scenario(bot, api):
+        await asyncio.gather(*(bot.send_message(chat_id, "hi") for chat_id in range(1, 16)))
+
+    _, api = run_bot(limiter, scenario)
+    calls = api.sent("sendMessage")
+    assert len(calls) == 15
+    # A burst of 10 (the global rate), then a slot every 0.1s
+    assert spread(calls) >= 0.4
+
+
+def test_requests_without_chat_are_not_budgeted():
+    limiter = FloodControl(global_rate=1, chat_rate=1, burst=1)
+
+    async def scenario(bot, api):
+        started = time.monotonic()
+        await asyncio.gather(*(bot.get_me() for _ in range(5)))
+        return time.monotonic() - started
+
+    elapsed, _ = run_bot(limiter, scenario)
+    assert elapsed < 0.5
+
+
+def test_retry_after_pauses_only_that_chat():
+    limiter = FloodControl(global_rate=0, chat_rate=100, burst=5)
+
+    async def scenario(bot, api):
+        api.flood[("sendMessage", 1)] = 1
+        started = time.monotonic()
+        flooded = asyncio.create_task(bot.send_message(1, "first"))
+        await asyncio.sleep(0.2)
+        await bot.send_message(2, "other")
+        other_done = time.monotonic() - started
+        message = await flooded
+        return other_done, message
+
+    (other_done, message), api = run_bot(limiter, scenario)
+    assert message.text == "first"
+    assert other_done < 0.5
+    sent = api.sent("sendMessage", 1)
+    assert len(sent) == 1
+    assert sent[0][0] - api.sent("sendMessage", 2)[0][0] >= 0.5
+
+
+def test_retry_after_gives_up_after_max_retries():
+    limiter = FloodControl(global_rate=0, chat_rate=100, burst=5, max_retries=0)
+
+    async def scenario(bot, api):
+        api.flood[("sendMessage", 1)] = 1
+        with pytest.raises(RetryAfter):
+            await bot.send_message(1, "first")
+
+    _, api = run_bot(limiter, scenario)
+    assert api.sent("sendMessage") == []
+
+
+def test_pending_edits_are_coalesced():
+    limiter = FloodControl(global_rate=0, chat_rate=5, burst=1)
+
+    async def scenario(bot, api):
+        await bot.send_message(1, "table")
+        # The budget is spent, the first edit waits and the later ones replace its text
+        edits = [bot.edit_message_text(text, chat_id=1, message_id=7) for text in ("v1", "v2", "v3")]
+        return await asyncio.gather(*edits)
+
+    results, api = run_bot(limiter, scenario)
+    edits = api.sent("editMessageText", 1)
+    assert [params['text'] for _, params in edits] == ["v3"]
+    assert [result.text for result in results] == ["v3", "v3", "v3"]
+    assert limiter._edits == {}
+
+
+def test_edits_of_different_messages_are_not_coalesced():
+    limiter = FloodControl(global_rate=0, chat_rate=20, burst=1)
+
+    async def scenario(bot, api):
+        await asyncio.gather(*(
+            bot.edit_message_text("new", chat_id=1, message_id=message_id) for message_id in (1, 2, 3)
+        ))
+
+    _, api = run_bot(limiter, scenario)
+    assert sorted(params['message_id'] for _, params in api.sent("editMessageText")) == [1, 2, 3]
+
+
+def test_failed_wait_forgets_pending_edit(monkeypatch):
+    limiter = FloodControl(global_rate=0, chat_rate=5, burst=1)
+
+    def broken(chat):
+        raise RuntimeError("bucket failed")
+
+    monkeypatch.setattr(limiter, "_bucket", broken)
+
+    async def scenario(bot, api):
+        with pytest.raises(RuntimeError):
+            await bot.edit_message_text("new", chat_id=1, message_id=1)
+        assert limiter._edits == {}
+        monkeypatch.undo()
+        message = await bot.edit_message_text("again", chat_id=1, message_id=1)
+        return message
+
+    message, api = run_bot(limiter, scenario)
+    assert message.text == "again"
+    assert len(api.sent("editMessageText")) == 1
+
+
+def test_idle_chat_buckets_are_dropped(monkeypatch):
+    monkeypatch.setattr(outbound, "MAX_CHAT_BUCKETS", 4)
+    limiter = FloodControl(global_rate=0, chat_rate=100, burst=1)
+
+    async def scenario(bot, api):
+        for chat_id in range(1, 10):
+            await bot.send_message(chat_id, "hi")
+            await asyncio.sleep(0.02)
+
+    run_bot(limiter, scenario)
+    assert len(limiter._chats) <= 4
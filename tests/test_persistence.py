@@ -0,0 +1,63 @@
+import asyncio
+
+from bot.database.persistence import ConversationPersistence
+from bot.database.storage import UserDataStorage
+
+USER = 50
+
+
+def workers(tmp_path, count: int = 2):
+    return [ConversationPersistence(UserDataStorage(tmp_path / "tournament.db")) for _ in range(count)]
+
+
+def test_workers_sharing_a_user_keep_each_chats_state(tmp_path):
+    first, second = workers(tmp_path)
+
+    async def scenario():
+        # The same user, seen by the workers owning chat -1 and chat -2
+        data_first, data_second = {}, {}
+        await first.refresh_user_data(USER, data_first)
+        await second.refresh_user_data(USER, data_second)
+        data_first.setdefault("-1", {})['waiting_for'] = 'team_name'
+        await first.update_user_data(USER, data_first)
+        data_second.setdefault("-2", {})['waiting_for'] = 'match_result'
+        await second.update_user_data(USER, data_second)
+        # The first worker knows nothing of chat -2 and must not delete it
+        data_first["-1"]['waiting_for'] = 'custom_rounds'
+        await first.update_user_data(USER, data_first)
+
+        restarted = {}
+        await workers(tmp_path, 1)[0].refresh_user_data(USER, restarted)
+        return restarted
+
+    assert asyncio.run(scenario()) == {
+        "-1": {'waiting_for': 'custom_rounds'},
+        "-2": {'waiting_for': 'match_result'},
+    }
+
+
+def test_cleared_chat_state_is_deleted(tmp_path):
+    (worker,) = workers(tmp_path, 1)
+    storage = worker.storage
+
+    async def scenario():
+        data = {}
+        await worker.refresh_user_data(USER, data)
+        data["-1"] = {'waiting_for': 'team_name'}
+        await worker.update_user_data(USER, data)
+        assert storage.load_user(USER) == {"-1": '{"waiting_for":"team_name"}'}
+        data["-1"].clear()
+        await worker.update_user_data(USER, data)
+
+    asyncio.run(scenario())
+    assert storage.load_user(USER) == {}
+
+
+def test_state_from_before_per_chat_keys_is_dropped(tmp_path):
+    (worker,) = workers(tmp_path, 1)
+    worker.storage.write_keys([(USER, 'waiting_for', '"team_name"'), (USER, "-1", '{"bulk_round":2}')])
+
+    data = {}
+    asyncio.run(worker.refresh_user_data(USER, data))
+    assert data == {"-1": {'bulk_round': 2}}
+    assert worker.storage.load_user(USER) == {"-1": '{"bulk_round":2}'}
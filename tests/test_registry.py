@@ -0,0 +1,109 @@
+import asyncio
+import threading
+
+import pytest
+
+from bot.database.worker import persistence
+from bot.models.registry import TournamentRegistry
+from bot.models.tournament import match_id
+
+TEAMS = ["Lions", "Tigers", "Bears"]
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """The global persistence worker with a window long enough to hold writes until a flush"""
+    monkeypatch.setattr(persistence, "window", 30.0)
+    persistence.start()
+    yield persistence
+    persistence.stop()
+
+
+def start_league(registry: TournamentRegistry, chat_id: int):
+    tournament = registry.get(chat_id)
+    for team in TEAMS:
+        tournament.add_team(team)
+    tournament.create_tournament_structure(1)
+    return tournament
+
+
+def test_least_recently_used_above_capacity_is_evicted():
+    registry = TournamentRegistry(capacity=2)
+
+    async def main():
+        await registry.load(-101)
+        await registry.load(-102)
+        await registry.load(-101)
+        await registry.load(-103)
+
+    asyncio.run(main())
+    assert -101 in registry and -103 in registry
+    assert -102 not in registry
+    assert len(registry) == 2
+
+
+def test_tournament_with_a_write_in_progress_is_kept():
+    registry = TournamentRegistry(capacity=1)
+
+    async def main():
+        await registry.load(-201)
+        async with registry.lock(-201):
+            await registry.load(-202)
+            assert -201 in registry
+        await registry.load(-203)
+
+    asyncio.run(main())
+    assert -201 not in registry and -202 not in registry
+    assert -203 in registry
+
+
+def test_eviction_flushes_before_the_chat_can_load_again(worker, monkeypatch):
+    registry = TournamentRegistry(capacity=1)
+    tournament = start_league(registry, -301)
+    tournament.record_result(match_id(1, 0), 2, 1)
+    registry.get(-302)
+
+    events = []
+    readers = []
+    reloaded = []
+    flush = worker.flush
+    close = tournament.storage.close
+
+    def slow_flush(timeout=None):
+        # The evicted tournament is gone from the map, a reload has to wait for the flush
+        readers.append(threading.Thread(target=lambda: reloaded.append(registry.get(-301))))
+        readers[0].start()
+        readers[0].join(0.2)
+        events.append('reloaded' if reloaded else 'waiting')
+        events.append('flush')
+        return flush(timeout)
+
+    monkeypatch.setattr(worker, "flush", slow_flush)
+    monkeypatch.setattr(tournament.storage, "close", lambda: (events.append('close'), close()))
+    registry._evict()
+
+    assert events == ['waiting', 'flush', 'close']
+    readers[0].join(10)
+    assert reloaded and reloaded[0] is not tournament
+    assert reloaded[0].match_results == {match_id(1, 0): {'home_score': 2, 'away_score': 1}}
+    assert reloaded[0].teams == TEAMS
+
+
+def test_reload_after_eviction_has_every_write(worker):
+    registry = TournamentRegistry(capacity=1)
+
+    async def main():
+        tournament = await registry.load(-401)
+        for team in TEAMS:
+            tournament.add_team(team)
+        tournament.create_tournament_structure(2)
+        tournament.record_result(match_id(1, 0), 1, 1)
+        tournament.record_result(match_id(2, 1), 0, 3)
+        # Evicts -401 with its writes still queued
+        await registry.load(-402)
+        assert -401 not in registry
+        return tournament, await registry.load(-401)
+
+    evicted, reloaded = asyncio.run(main())
+    assert reloaded is not evicted
+    assert reloaded.to_dict() == evicted.to_dict()
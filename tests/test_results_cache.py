@@ -0,0 +1,93 @@
+import pytest
+
+from bot.config.settings import settings
+from bot.database.storage import TournamentStorage
+from bot.handlers.matches import results_keyboard
+from bot.models.tournament import FootballTournament, match_id
+from bot.utils.cache import render_cache
+
+TEAMS = ["Lions", "Tigers", "Bears", "Wolves", "Eagles", "Sharks"]
+
+
+@pytest.fixture
+def tournament(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "results_page_size", 10)
+    render_cache.clear()
+    tournament = FootballTournament(
+        data_file=None, storage=TournamentStorage(tmp_path / "tournament.db", "cache"), tournament_id="cache"
+    )
+    for team in TEAMS:
+        tournament.add_team(team)
+    tournament.create_tournament_structure(2)
+    # 15 fixtures per round: page 0 holds fixtures 0-9, page 1 fixtures 10-14
+    return tournament
+
+
+def render(tournament, page: int, pending_only: bool = False):
+    misses = render_cache.misses
+    markup = results_keyboard(tournament, 1, page, pending_only)
+    return markup, render_cache.misses > misses
+
+
+def buttons(markup):
+    return [button.text for row in markup.inline_keyboard for button in row]
+
+
+def test_result_invalidates_only_its_page(tournament):
+    render(tournament, 0)
+    render(tournament, 1)
+
+    tournament.record_result(match_id(1, 12), 2, 1)
+    _, missed = render(tournament, 0)
+    assert not missed
+    markup, missed = render(tournament, 1)
+    assert missed
+    assert any(text.startswith("✅ 13.") for text in buttons(markup))
+
+    # Overwriting a result changes its page again
+    tournament.record_result(match_id(1, 12), 3, 1)
+    markup, missed = render(tournament, 1)
+    assert missed
+    assert any("3-1" in text for text in buttons(markup))
+
+
+def test_other_rounds_do_not_invalidate(tournament):
+    render(tournament, 0)
+    tournament.record_result(match_id(2, 0), 1, 1)
+    _, missed = render(tournament, 0)
+    assert not missed
+
+
+def test_pending_pages_follow_every_new_result(tournament):
+    render(tournament, 0, pending_only=True)
+    tournament.record_result(match_id(1, 12), 2, 1)
+    markup, missed = render(tournament, 0, pending_only=True)
+    assert missed
+    assert not any(text.startswith("⏳ 13.") for text in buttons(markup))
+
+
+def test_completing_the_round_invalidates_every_page(tournament):
+    tournament.record_results([(match_id(1, index), 1, 0) for index in range(14)])
+    render(tournament, 0)
+    tournament.record_result(match_id(1, 14), 0, 0)
+    markup, missed = render(tournament, 0)
+    assert missed
+    assert "🏁 Finish Round" in buttons(markup)
+
+
+def test_structural_change_invalidates(tournament):
+    render(tournament, 0)
+    tournament.reset_tournament()
+    tournament.create_tournament_structure(1)
+    _, missed = render(tournament, 0)
+    assert missed
+
+
+def test_out_of_range_page_shares_the_last_page(tournament):
+    render(tournament, 1)
+    _, missed = render(tournament, 5)
+    assert not missed
+    tournament.record_result(match_id(1, 14), 1, 0)
+    markup, missed = render(tournament, 5)
+    assert missed
+    assert any(text.startswith("✅ 15.") for text in buttons(markup))
@@ -0,0 +1,41 @@
+import asyncio
+from typing import Dict, Set
+
+from benchmarks import load, sharding
+from bot.sharding import shard_for
+
+WORKERS = 2
+CHATS = 8
+
+
+def test_every_chat_is_handled_by_exactly_one_worker():
+    args = load.parse_args([
+        "--run-mode", "webhook", "--workers", str(WORKERS), "--chats", str(CHATS),
+        "--teams", "3", "--rounds", "1", "--results", "1", "--spectators", "1", "--spectator-steps", "2",
+    ])
+    result = asyncio.run(sharding.run(args))
+
+    assert result['problems'] == []
+    assert result['timeouts'] == 0
+    workers = result['health']['workers']
+    assert len(workers) == WORKERS
+    pids = set()
+    handled: Dict[str, Set[int]] = {}
+    for worker in workers:
+        shard = worker['health']['shard']
+        # The process answering is the one the supervisor started, and it never restarted
+        assert shard['pid'] == worker['pid']
+        assert worker['restarts'] == 0
+        assert shard['misrouted'] == 0
+        pids.add(shard['pid'])
+        for tournament_id in shard['tournaments']:
+            handled.setdefault(tournament_id, set()).add(shard['pid'])
+    assert len(pids) == WORKERS
+
+    chats = [-(100000 + number) for number in range(CHATS)]
+    # Both workers own some of the chats
+    assert {shard_for(chat_id, WORKERS) for chat_id in chats} == set(range(WORKERS))
+    for chat_id in chats:
+        assert len(handled[str(chat_id)]) == 1, f"chat {chat_id} handled by {handled[str(chat_id)]}"
+        owner = workers[shard_for(chat_id, WORKERS)]
+        assert handled[str(chat_id)] == {owner['pid']}
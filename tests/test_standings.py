@@ -0,0 +1,119 @@
+import random
+
+from bot.database.storage import TournamentStorage
+from bot.models.standings import Standings, parse_tiebreakers
+from bot.models.tournament import FootballTournament, match_id
+from bot.utils.helpers import calculate_team_statistics
+
+TEAMS = ["Lions", "Tigers", "Bears", "Wolves", "Eagles"]
+
+
+def assert_same(incremental: Standings, full: Standings) -> None:
+    assert incremental.stats == full.stats
+    assert incremental.h2h_points == full.h2h_points
+    assert incremental.h2h_goals == full.h2h_goals
+    for tiebreakers in ("points,goal_difference,goals_for", "points,h2h_points,h2h_goal_difference,goal_difference"):
+        chain = parse_tiebreakers(tiebreakers)
+        assert incremental.ranked(chain) == full.ranked(chain)
+
+
+def test_incremental_equals_rebuild():
+    rng = random.Random(7)
+    fixtures = [(home, away) for home in TEAMS for away in TEAMS if home != away]
+    results = {}
+    standings = Standings(TEAMS)
+    for _ in range(500):
+        fixture = rng.choice(fixtures)
+        old = results.get(fixture)
+        if old is not None and rng.random() < 0.3:
+            # Removed result
+            new = None
+            del results[fixture]
+        else:
+            # New or overwritten result
+            new = {'home_score': rng.randint(0, 4), 'away_score': rng.randint(0, 4)}
+            results[fixture] = new
+        standings.replace_result(*fixture, old, new)
+
+        full = Standings()
+        full.rebuild(TEAMS, ((home, away, result) for (home, away), result in results.items()))
+        assert_same(standings, full)
+
+
+def test_removing_every_result_leaves_an_empty_table():
+    standings = Standings(TEAMS)
+    standings.replace_result("Lions", "Tigers", None, {'home_score': 2, 'away_score': 2})
+    standings.replace_result("Lions", "Tigers", {'home_score': 2, 'away_score': 2}, {'home_score': 0, 'away_score': 1})
+    standings.replace_result("Lions", "Tigers", {'home_score': 0, 'away_score': 1}, None)
+    assert_same(standings, Standings(TEAMS))
+
+
+def test_tournament_overwrites_match_full_recompute(tmp_path):
+    tournament = FootballTournament(
+        data_file=None, storage=TournamentStorage(tmp_path / "tournament.db", "standings"), tournament_id="standings"
+    )
+    for team in TEAMS:
+        tournament.add_team(team)
+    tournament.create_tournament_structure(3)
+    match_ids = [match_id(round_num, index)
+                 for round_num, round_data in tournament.rounds.items()
+                 for index in range(len(round_data['matches']))]
+
+    rng = random.Random(11)
+    for _ in range(200):
+        if rng.random() < 0.2:
+            batch = [(rng.choice(match_ids), rng.randint(0, 5), rng.randint(0, 5)) for _ in range(3)]
+            assert tournament.record_results(batch)
+        else:
+            assert tournament.record_result(rng.choice(match_ids), rng.randint(0, 5), rng.randint(0, 5))
+        assert tournament.get_team_statistics() == calculate_team_statistics(tournament.teams, tournament.iter_results())
+
+    # Reloading rebuilds the table from the stored results
+    reloaded = FootballTournament(data_file=None, storage=tournament.storage, tournament_id="standings")
+    assert_same(tournament.standings, reloaded.standings)
+
+
+def table(results):
+    teams = []
+    for home, away, _, _ in results:
+        teams += [team for team in (home, away) if team not in teams]
+    standings = Standings(teams)
+    for home, away, home_score, away_score in results:
+        standings.apply(home, away, home_score, away_score)
+    return standings
+
+
+def order(standings: Standings, tiebreakers: str):
+    return [team for team, _ in standings.ranked(parse_tiebreakers(tiebreakers))]
+
+
+def test_head_to_head_breaks_a_two_way_tie():
+    # A and B on 3 points, A well ahead on goal difference, B won their meeting
+    standings = table([("B", "A", 1, 0), ("A", "C", 5, 0), ("D", "B", 1, 0), ("C", "D", 0, 0)])
+    assert order(standings, "points,goal_difference") == ["D", "A", "B", "C"]
+    assert order(standings, "points,h2h_points,goal_difference") == ["D", "B", "A", "C"]
+
+
+def test_head_to_head_mini_league_of_three():
+    # A, B and C on 6 points; among themselves A beat both and B beat C, goal difference says the reverse
+    standings = table([
+        ("A", "B", 1, 0), ("A", "C", 1, 0), ("B", "C", 1, 0),
+        ("D", "A", 5, 0), ("E", "A", 5, 0), ("B", "D", 1, 0),
+        ("C", "D", 9, 0), ("C", "E", 9, 0),
+    ])
+    assert order(standings, "points,goal_difference") == ["C", "B", "A", "E", "D"]
+    assert order(standings, "points,h2h_points,goal_difference") == ["A", "B", "C", "E", "D"]
+
+
+def test_level_head_to_head_falls_through_to_the_next_criterion():
+    # A beat B, B beat C, C beat A: a three-way tie on head-to-head points too
+    standings = table([("A", "B", 1, 0), ("B", "C", 2, 0), ("C", "A", 4, 0)])
+    assert order(standings, "points,h2h_points,h2h_goal_difference") == ["C", "B", "A"]
+
+
+def test_parse_tiebreakers_rejects_unknown_criteria():
+    assert parse_tiebreakers(" points , h2h_points,fair_play,goal_difference") == (
+        'points', 'h2h_points', 'goal_difference'
+    )
+    # Nothing usable left: the default chain
+    assert parse_tiebreakers("alphabetical, ") == ('points', 'goal_difference', 'goals_for')
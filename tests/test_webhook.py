@@ -0,0 +1,95 @@
+import asyncio
+import json
+import socket
+
+import httpx
+import pytest
+import tornado.httpserver
+from telegram import Bot
+
+from bot.config.settings import settings
+from bot.webhook import build_webhook_app
+
+SECRET = "s3cret"
+UPDATE = {
+    'update_id': 1,
+    'message': {
+        'message_id': 5, 'date': 0, 'text': "📊 View Table",
+        'chat': {'id': 42, 'type': "private"},
+        'from': {'id': 7, 'is_bot': False, 'first_name': "Organizer"},
+    },
+}
+
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setattr(settings, "webhook_secret_token", SECRET)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(scenario):
+    """Run scenario(client, queue) against the webhook app on a local port"""
+    async def main():
+        queue: asyncio.Queue = asyncio.Queue()
+        server = tornado.httpserver.HTTPServer(build_webhook_app(Bot("123456:test"), queue))
+        port = free_port()
+        server.listen(port, "127.0.0.1")
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+                return await scenario(client, queue)
+        finally:
+            server.stop()
+            await server.close_all_connections()
+
+    return asyncio.run(main())
+
+
+def post(client: httpx.AsyncClient, body, token: str = SECRET):
+    content = body if isinstance(body, bytes) else json.dumps(body).encode()
+    return client.post(settings.webhook_path, content=content, headers={
+        'Content-Type': "application/json", 'X-Telegram-Bot-Api-Secret-Token': token
+    })
+
+
+def test_posted_update_is_queued(secret):
+    async def scenario(client, queue):
+        response = await post(client, UPDATE)
+        return response.status_code, queue.get_nowait(), queue.qsize()
+
+    status, update, remaining = serve(scenario)
+    assert status == 200
+    assert update.update_id == 1
+    assert update.message.text == "📊 View Table"
+    assert update.effective_chat.id == 42
+    assert remaining == 0
+
+
+def test_wrong_secret_token_is_rejected(secret):
+    async def scenario(client, queue):
+        response = await post(client, UPDATE, token="wrong")
+        return response.status_code, queue.qsize()
+
+    assert serve(scenario) == (403, 0)
+
+
+def test_malformed_update_is_rejected(secret):
+    async def scenario(client, queue):
+        statuses = [(await post(client, body)).status_code for body in (b"not json", [1, 2])]
+        return statuses, queue.qsize()
+
+    assert serve(scenario) == ([400, 400], 0)
+
+
+def test_health_reports_queue(secret):
+    async def scenario(client, queue):
+        await post(client, UPDATE)
+        return (await client.get(settings.webhook_health_path)).json()
+
+    health = serve(scenario)
+    assert health['status'] == 'ok'
+    assert health['queued_updates'] == 1
@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+
+from bot.database.worker import PersistenceWorker, coalesce
+
+
+class RecordingStorage:
+    """Storage stand-in recording the operations it is given, per batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    @contextmanager
+    def batch(self):
+        self.batches.append([])
+        yield self
+
+    def flush(self) -> None:
+        pass
+
+    def __getattr__(self, operation):
+        def record(*args):
+            self.batches[-1].append((operation,) + args)
+        return record
+
+
+def ops(batch):
+    return [(operation,) + args for _, operation, args in batch]
+
+
+def test_last_upsert_result_per_match_wins():
+    storage = object()
+    batch = [
+        (storage, 'upsert_result', ("r1_m0", 1, 0)),
+        (storage, 'upsert_result', ("r1_m1", 2, 2)),
+        (storage, 'upsert_result', ("r1_m0", 3, 1)),
+        (storage, 'upsert_result', ("r1_m0", 4, 0)),
+    ]
+    assert ops(coalesce(batch)) == [('upsert_result', "r1_m1", 2, 2), ('upsert_result', "r1_m0", 4, 0)]
+
+
+def test_matches_of_other_storages_are_kept():
+    first, second = object(), object()
+    batch = [
+        (first, 'upsert_result', ("r1_m0", 1, 0)),
+        (second, 'upsert_result', ("r1_m0", 2, 0)),
+    ]
+    assert coalesce(batch) == batch
+
+
+def test_save_state_drops_earlier_operations_on_its_storage():
+    storage, other = object(), object()
+    batch = [
+        (storage, 'add_team', (0, "Lions")),
+        (storage, 'upsert_result', ("r1_m0", 1, 0)),
+        (other, 'upsert_result', ("r1_m0", 1, 0)),
+        (storage, 'save_meta', ({'current_round': 2},)),
+        (storage, 'save_state', ({'teams': ["Lions"]},)),
+        (storage, 'upsert_result', ("r1_m0", 2, 0)),
+        (storage, 'save_meta', ({'current_round': 3},)),
+    ]
+    assert coalesce(batch) == [
+        (other, 'upsert_result', ("r1_m0", 1, 0)),
+        (storage, 'save_state', ({'teams': ["Lions"]},)),
+        (storage, 'upsert_result', ("r1_m0", 2, 0)),
+        (storage, 'save_meta', ({'current_round': 3},)),
+    ]
+
+
+def test_order_kept_for_other_operations():
+    storage = object()
+    batch = [
+        (storage, 'add_team', (0, "Lions")),
+        (storage, 'add_team', (1, "Tigers")),
+        (storage, 'set_round_completed', (1,)),
+        (storage, 'upsert_results', ([["r1_m0", 1, 0]],)),
+        (storage, 'upsert_results', ([["r1_m0", 2, 0]],)),
+    ]
+    assert coalesce(batch) == batch
+
+
+def test_worker_writes_a_burst_in_one_batch_per_storage():
+    first, second = RecordingStorage(), RecordingStorage()
+    # A long window, flush() below writes the burst without waiting for it
+    worker = PersistenceWorker(window=1.0)
+    worker.start()
+    try:
+        for score in range(5):
+            worker.submit(first, 'upsert_result', "r1_m0", score, 0)
+        worker.submit(second, 'add_team', 0, "Lions")
+        worker.submit(first, 'save_meta', {'current_round': 2})
+        assert worker.flush(timeout=5)
+    finally:
+        worker.stop()
+
+    assert first.batches == [[('upsert_result', "r1_m0", 4, 0), ('save_meta', {'current_round': 2})]]
+    assert second.batches == [[('add_team', 0, "Lions")]]
+    assert worker.last_batch_size == 7
+    assert worker.pending == 0